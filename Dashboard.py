@@ -1,13 +1,17 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from datetime import datetime, timedelta
+import os
 import warnings
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from dashboard_core import (
+    CompleteEssentialOilDashboard, LiveSession, comparison_frame, kpi_summary, memory_report,
+    similar_oils_frame
+)
+from data_sources import GRANULARITIES, INDICATOR_COLUMNS
+from export import EXPORT_FORMATS, export_download
+from incremental import RunningAggregates, simulated_periods
+from memory_budget import budget_from_env
+from instrumentation import REGISTRY, instrumented_rerun, section, timed
 warnings.filterwarnings('ignore')
 
 # Configuration de la page
@@ -18,553 +22,234 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-class CompleteEssentialOilDashboard:
-    def __init__(self):
-        self.oils_config = self._get_complete_oils_config()
-        self.colors = ['#8B4513', '#228B22', '#FFD700', '#8A2BE2', '#FF6B6B', 
-                      '#4ECDC4', '#45B7D1', '#F9A602', '#6A0572', '#2A9D8F']
-        
-    def _get_complete_oils_config(self):
-        """Configuration complète pour toutes les huiles essentielles"""
-        return {
-            "Lavande": {
-                "production_base": 150, "price_base": 45, "type": "relaxante",
-                "proprietes": ["calmante", "cicatrisante", "antiseptique", "analgésique"],
-                "regions": ["France", "Bulgarie", "Chine"], "rendement": 0.015,
-                "molecules_principales": ["Linalol", "Acétate de linalyle", "Cinéole"],
-                "contre_indications": ["Femmes enceintes", "Enfants < 6 ans"],
-                "prix_evolution": "++", "demande_evolution": "+++",
-                "couleur": "#6A0572"
-            },
-            "Menthe Poivrée": {
-                "production_base": 80, "price_base": 60, "type": "tonique",
-                "proprietes": ["digestive", "rafraichissante", "antalgique", "decongestionnante"],
-                "regions": ["USA", "France", "Inde"], "rendement": 0.012,
-                "molecules_principales": ["Menthol", "Menthone", "Acétate de menthyle"],
-                "contre_indications": ["Épilepsie", "Problèmes biliaires"],
-                "prix_evolution": "++", "demande_evolution": "++",
-                "couleur": "#228B22"
-            },
-            "Arbre à Thé": {
-                "production_base": 120, "price_base": 35, "type": "antiseptique",
-                "proprietes": ["antibacterienne", "antifongique", "antivirale", "immunostimulante"],
-                "regions": ["Australie", "Chine", "Afrique du Sud"], "rendement": 0.020,
-                "molecules_principales": ["Terpinène-4-ol", "γ-Terpinène", "α-Terpinène"],
-                "contre_indications": ["Peau sensible"],
-                "prix_evolution": "+", "demande_evolution": "+++",
-                "couleur": "#2A9D8F"
-            },
-            "Eucalyptus": {
-                "production_base": 200, "price_base": 25, "type": "respiratoire",
-                "proprietes": ["expectorante", "decongestionnante", "antiseptique", "febrifuge"],
-                "regions": ["Australie", "Chine", "Portugal"], "rendement": 0.018,
-                "molecules_principales": ["Eucalyptol", "α-Pinène", "Limonène"],
-                "contre_indications": ["Asthme sévère"],
-                "prix_evolution": "+", "demande_evolution": "++",
-                "couleur": "#45B7D1"
-            },
-            "Ravintsara": {
-                "production_base": 40, "price_base": 55, "type": "immunitaire",
-                "proprietes": ["antivirale", "immunostimulante", "expectorante", "neurotonique"],
-                "regions": ["Madagascar", "Comores"], "rendement": 0.008,
-                "molecules_principales": ["Cinéole", "Sabinène", "α-Terpinéol"],
-                "contre_indications": ["Aucune connue"],
-                "prix_evolution": "+++", "demande_evolution": "+++",
-                "couleur": "#4ECDC4"
-            },
-            "Palmarosa": {
-                "production_base": 25, "price_base": 70, "type": "cosmetique",
-                "proprietes": ["regenerante", "hydratante", "antibacterienne", "equilibrante"],
-                "regions": ["Inde", "Nepal", "Indonesie"], "rendement": 0.006,
-                "molecules_principales": ["Géraniol", "Linalol", "Acétate de géranyle"],
-                "contre_indications": ["Aucune connue"],
-                "prix_evolution": "++", "demande_evolution": "++",
-                "couleur": "#FFD700"
-            },
-            "Ylang-Ylang": {
-                "production_base": 30, "price_base": 85, "type": "aphrodisiaque",
-                "proprietes": ["aphrodisiaque", "sedative", "hypotensive", "regulatrice"],
-                "regions": ["Madagascar", "Comores", "Mayotte"], "rendement": 0.005,
-                "molecules_principales": ["Linalol", "Géraniol", "Para-crésyl méthyl éther"],
-                "contre_indications": ["Hypotension"],
-                "prix_evolution": "+++", "demande_evolution": "++",
-                "couleur": "#8A2BE2"
-            },
-            "Girofle": {
-                "production_base": 60, "price_base": 40, "type": "antiseptique",
-                "proprietes": ["antiseptique", "antalgique", "antiparasitaire", "stimulante"],
-                "regions": ["Madagascar", "Indonesie", "Sri Lanka"], "rendement": 0.015,
-                "molecules_principales": ["Eugénol", "Acétate d'eugényle", "Caryophyllène"],
-                "contre_indications": ["Ulcères gastriques"],
-                "prix_evolution": "+", "demande_evolution": "++",
-                "couleur": "#8B4513"
-            },
-            "Citron": {
-                "production_base": 180, "price_base": 20, "type": "detoxifiante",
-                "proprietes": ["antibacterienne", "detoxifiante", "tonique", "digestive"],
-                "regions": ["Italie", "Espagne", "USA", "Argentine"], "rendement": 0.003,
-                "molecules_principales": ["Limonène", "β-Pinène", "γ-Terpinène"],
-                "contre_indications": ["Photosensibilisante"],
-                "prix_evolution": "+", "demande_evolution": "+++",
-                "couleur": "#FFD700"
-            },
-            "Romarin": {
-                "production_base": 90, "price_base": 38, "type": "tonique",
-                "proprietes": ["tonique", "hepatique", "neurotonique", "antioxydante"],
-                "regions": ["France", "Espagne", "Maroc", "Tunisie"], "rendement": 0.010,
-                "molecules_principales": ["Cinéole", "Camphre", "α-Pinène"],
-                "contre_indications": ["Hypertension", "Épilepsie"],
-                "prix_evolution": "++", "demande_evolution": "++",
-                "couleur": "#228B22"
-            },
-            "Tea Tree": {
-                "production_base": 110, "price_base": 32, "type": "antiseptique",
-                "proprietes": ["antibacterienne", "antifongique", "antivirale", "immunostimulante"],
-                "regions": ["Australie", "Chine"], "rendement": 0.019,
-                "molecules_principales": ["Terpinène-4-ol", "γ-Terpinène", "α-Terpinène"],
-                "contre_indications": ["Peau sensible"],
-                "prix_evolution": "+", "demande_evolution": "+++",
-                "couleur": "#2A9D8F"
-            },
-            "Géranium": {
-                "production_base": 45, "price_base": 75, "type": "equilibrante",
-                "proprietes": ["equilibrante", "hemostatique", "cicatrisante", "antiseptique"],
-                "regions": ["Egypte", "Maroc", "Réunion"], "rendement": 0.007,
-                "molecules_principales": ["Citronellol", "Géraniol", "Linalol"],
-                "contre_indications": ["Aucune connue"],
-                "prix_evolution": "++", "demande_evolution": "++",
-                "couleur": "#FF6B6B"
-            },
-            "Camomille": {
-                "production_base": 35, "price_base": 95, "type": "calmante",
-                "proprietes": ["calmante", "anti-inflammatoire", "antispasmodique", "analgésique"],
-                "regions": ["France", "Egypte", "Allemagne"], "rendement": 0.004,
-                "molecules_principales": ["Chamazulène", "Bisabolol", "Farnésène"],
-                "contre_indications": ["Allergie aux Astéracées"],
-                "prix_evolution": "+++", "demande_evolution": "++",
-                "couleur": "#FFD700"
-            },
-            "Sauge": {
-                "production_base": 28, "price_base": 88, "type": "hormonale",
-                "proprietes": ["equilibrante hormonale", "antiseptique", "digestive", "neurotonique"],
-                "regions": ["France", "Espagne", "Croatie"], "rendement": 0.005,
-                "molecules_principales": ["Thuyone", "Cinéole", "Camphre"],
-                "contre_indications": ["Femmes enceintes", "Épilepsie"],
-                "prix_evolution": "+++", "demande_evolution": "+",
-                "couleur": "#6A0572"
-            },
-            "Niaouli": {
-                "production_base": 55, "price_base": 42, "type": "immunitaire",
-                "proprietes": ["immunostimulante", "antivirale", "expectorante", "decongestionnante"],
-                "regions": ["Madagascar", "Nouvelle-Calédonie"], "rendement": 0.014,
-                "molecules_principales": ["Cinéole", "α-Pinène", "Limonène"],
-                "contre_indications": ["Aucune connue"],
-                "prix_evolution": "++", "demande_evolution": "++",
-                "couleur": "#45B7D1"
-            },
-            "Basilic": {
-                "production_base": 65, "price_base": 48, "type": "digestive",
-                "proprietes": ["digestive", "antispasmodique", "neurotonique", "antibacterienne"],
-                "regions": ["France", "Egypte", "Comores"], "rendement": 0.009,
-                "molecules_principales": ["Estragole", "Linalol", "Eugénol"],
-                "contre_indications": ["Femmes enceintes"],
-                "prix_evolution": "++", "demande_evolution": "++",
-                "couleur": "#228B22"
-            },
-            "Cèdre": {
-                "production_base": 40, "price_base": 65, "type": "grounding",
-                "proprietes": ["grounding", "lymphotonique", "antiseptique", "repulsif"],
-                "regions": ["Maroc", "USA", "Himalaya"], "rendement": 0.008,
-                "molecules_principales": ["Cédrol", "α-Cédrène", "Thujopsène"],
-                "contre_indications": ["Femmes enceintes"],
-                "prix_evolution": "++", "demande_evolution": "+",
-                "couleur": "#8B4513"
-            },
-            "Encens": {
-                "production_base": 22, "price_base": 120, "type": "spirituelle",
-                "proprietes": ["meditative", "anti-inflammatoire", "cicatrisante", "immunostimulante"],
-                "regions": ["Oman", "Somalie", "Ethiopie"], "rendement": 0.003,
-                "molecules_principales": ["α-Pinène", "Limonène", "Incensole"],
-                "contre_indications": ["Aucune connue"],
-                "prix_evolution": "+++", "demande_evolution": "++",
-                "couleur": "#F9A602"
-            },
-            "Myrrhe": {
-                "production_base": 18, "price_base": 110, "type": "spirituelle",
-                "proprietes": ["anti-inflammatoire", "cicatrisante", "antiseptique", "expectorante"],
-                "regions": ["Somalie", "Ethiopie", "Yémen"], "rendement": 0.002,
-                "molecules_principales": ["Furanoeudesma-1,3-diène", "Curzerène", "Lindestrene"],
-                "contre_indications": ["Femmes enceintes"],
-                "prix_evolution": "+++", "demande_evolution": "+",
-                "couleur": "#8B4513"
-            },
-            "Vetiver": {
-                "production_base": 32, "price_base": 78, "type": "grounding",
-                "proprietes": ["grounding", "tonique nerveux", "repulsif", "cicatrisante"],
-                "regions": ["Haïti", "Réunion", "Indonésie"], "rendement": 0.006,
-                "molecules_principales": ["Vetivone", "β-Vetivène", "Khusimol"],
-                "contre_indications": ["Aucune connue"],
-                "prix_evolution": "++", "demande_evolution": "++",
-                "couleur": "#8B4513"
-            }
-        }
-    
-    def generate_comprehensive_data(self, oil_name, start_year=2000, end_year=2025):
-        """Génère des données complètes pour le dashboard"""
-        config = self.oils_config[oil_name]
-        
-        dates = pd.date_range(start=f'{start_year}-01-01', end=f'{end_year}-12-31', freq='Y')
-        years = [date.year for date in dates]
-        
-        # Génération de données réalistes avec tendances
-        data = {
-            'Annee': years,
-            'Production_Mondiale': self._generate_trend_data(config["production_base"], years, trend=0.08),
-            'Prix_Moyen': self._generate_trend_data(config["price_base"], years, trend=0.06),
-            'Demande_Mondiale': self._generate_trend_data(config["production_base"] * 0.9, years, trend=0.12),
-            'Valeur_Marche': self._generate_trend_data(config["production_base"] * config["price_base"] / 1000, years, trend=0.15),
-            'Efficacite_Therapeutique': self._generate_quality_data(75, years, improvement=0.012),
-            'Etudes_Scientifiques': self._generate_research_data(years),
-            'Qualite_Bio': self._generate_quality_data(60, years, improvement=0.025),
-            'Usage_Aromatherapie': self._generate_usage_data(70, years),
-            'Usage_Cosmetique': self._generate_usage_data(65, years, growth=0.020),
-            'Usage_Pharmaceutique': self._generate_usage_data(40, years, growth=0.025),
-            'Impact_Environnemental': self._generate_impact_data(45, years),
-            'Durabilite_Production': self._generate_quality_data(65, years, improvement=0.015),
-            'Exportations': self._generate_trend_data(config["production_base"] * 0.7, years, trend=0.10),
-            'Surface_Cultivee': self._generate_trend_data(config["production_base"] / config["rendement"] * 10, years, trend=0.09)
-        }
-        
-        return pd.DataFrame(data)
-    
-    def _generate_trend_data(self, base, years, trend=0.1, volatility=0.1):
-        """Génère des données avec tendance"""
-        data = []
-        for i, year in enumerate(years):
-            growth = 1 + trend * i
-            noise = np.random.normal(1, volatility)
-            # Ajout d'événements spécifiques
-            if year == 2008:  # Crise économique
-                noise *= 0.9
-            elif year == 2020:  # COVID
-                noise *= 1.2
-            data.append(base * growth * noise)
-        return data
-    
-    def _generate_quality_data(self, base, years, improvement=0.01):
-        """Génère des données de qualité avec amélioration"""
-        data = []
-        for year in years:
-            improvement_factor = 1 + improvement * (year - 2000)
-            noise = np.random.normal(1, 0.05)
-            value = min(100, base * improvement_factor * noise)
-            data.append(value)
-        return data
-    
-    def _generate_research_data(self, years):
-        """Génère des données de recherche scientifique"""
-        data = []
-        for year in years:
-            if year <= 2005:
-                base = 5 + (year - 2000) * 2
-            elif year <= 2015:
-                base = 15 + (year - 2005) * 5
-            else:
-                base = 65 + (year - 2015) * 8
-            noise = np.random.normal(1, 0.2)
-            data.append(base * noise)
-        return data
-    
-    def _generate_usage_data(self, base, years, growth=0.015):
-        """Génère des données d'utilisation"""
-        data = []
-        for year in years:
-            growth_factor = 1 + growth * (year - 2000)
-            noise = np.random.normal(1, 0.08)
-            value = min(100, base * growth_factor * noise)
-            data.append(value)
-        return data
-    
-    def _generate_impact_data(self, base, years):
-        """Génère des données d'impact environnemental"""
-        data = []
-        for year in years:
-            improvement = 1 - 0.01 * (year - 2000)  # Amélioration progressive
-            noise = np.random.normal(1, 0.08)
-            value = max(10, base * improvement * noise)
-            data.append(value)
-        return data
-
-def create_kpi_metrics(df, oil_config):
-    """Crée les métriques KPI pour le dashboard"""
+@timed()
+def create_kpi_metrics(df, oil_config, aggregates=None, forecast=None):
+    """Crée les métriques KPI pour le dashboard
+    
+    `aggregates` (agrégats courants d'une série incrémentale) évite de relire la série,
+    `forecast` (forecasting.ForecastCache) ajoute la valeur prévue en fin d'horizon.
+    """
+    if aggregates is None:
+        aggregates = RunningAggregates.from_frame(df)
+    
+    def forecast_caption(indicator, unit, relative=True):
+        if forecast is None:
+            return
+        latest = aggregates.value('latest', indicator)
+        predicted = forecast[indicator]['mean'][-1]
+        change = f"{(predicted / latest - 1) * 100:+.1f}%" if relative else f"{predicted - latest:+.1f}"
+        st.caption(f"🔮 {forecast['Annee'][-1]}: {predicted:,.1f} {unit} ({change})")
+    
+    kpis = kpi_summary(aggregates)
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        current_production = df['Production_Mondiale'].iloc[-1]
         st.metric(
             label="🌍 Production Mondiale Actuelle",
-            value=f"{current_production:,.0f} tonnes",
-            delta=f"{((df['Production_Mondiale'].iloc[-1] / df['Production_Mondiale'].iloc[0]) - 1) * 100:.1f}%"
+            value=f"{kpis['Production_Mondiale']['valeur']:,.0f} tonnes",
+            delta=f"{kpis['Production_Mondiale']['variation']:.1f}%"
         )
+        forecast_caption('Production_Mondiale', "t")
     
     with col2:
-        current_price = df['Prix_Moyen'].iloc[-1]
         st.metric(
             label="💰 Prix Moyen Actuel",
-            value=f"{current_price:.1f} €/kg",
-            delta=f"{((df['Prix_Moyen'].iloc[-1] / df['Prix_Moyen'].iloc[0]) - 1) * 100:.1f}%"
+            value=f"{kpis['Prix_Moyen']['valeur']:.1f} €/kg",
+            delta=f"{kpis['Prix_Moyen']['variation']:.1f}%"
         )
+        forecast_caption('Prix_Moyen', "€/kg")
     
     with col3:
-        market_value = df['Valeur_Marche'].iloc[-1]
         st.metric(
             label="📈 Valeur du Marché",
-            value=f"{market_value:.1f} M€",
-            delta=f"{((df['Valeur_Marche'].iloc[-1] / df['Valeur_Marche'].iloc[0]) - 1) * 100:.1f}%"
+            value=f"{kpis['Valeur_Marche']['valeur']:.1f} M€",
+            delta=f"{kpis['Valeur_Marche']['variation']:.1f}%"
         )
+        forecast_caption('Valeur_Marche', "M€")
     
     with col4:
-        efficacy = df['Efficacite_Therapeutique'].iloc[-1]
         st.metric(
             label="💊 Efficacité Thérapeutique",
-            value=f"{efficacy:.1f}/100",
-            delta=f"{efficacy - df['Efficacite_Therapeutique'].iloc[0]:.1f}"
+            value=f"{kpis['Efficacite_Therapeutique']['valeur']:.1f}/100",
+            delta=f"{kpis['Efficacite_Therapeutique']['variation']:.1f}"
         )
+        forecast_caption('Efficacite_Therapeutique', "/100", relative=False)
+
+def active_forecast(dashboard, df, oil_name):
+    """Prévisions de l'huile si l'option est active (séries annuelles uniquement)"""
+    if dashboard is None or not st.session_state.get("show_forecast"):
+        return None
+    if df.attrs.get('granularite', 'Y') != 'Y':
+        return None
+    with section("prevision"):
+        return dashboard.forecasts.get(oil_name)
+
+def cached_figures(dashboard, view, oils, builder):
+    """Figures d'une vue: construites une seule fois par jeu de données, puis servies depuis le cache"""
+    if dashboard is None:
+        return builder()
+    theme = st.get_option("theme.base") or "light"
+    return dashboard.figures.get_or_build(view, oils, dashboard.cache.version, theme, builder)
 
-def create_production_analysis(df, oil_name, oil_config):
-    """Analyse de la production et du marché"""
+def granularity_view(view, df):
+    """Clé de vue propre à la granularité des données affichées"""
+    return f"{view}/{df.attrs.get('granularite', 'Y')}"
+
+@timed()
+def create_production_analysis(df, oil_name, oil_config, dashboard=None, show_bands=False,
+                               aggregates=None, version=None, forecast=None):
+    """Analyse de la production et du marché
+    
+    `version` identifie l'état d'une série incrémentale dans le cache des figures,
+    `forecast` superpose les prévisions (voir active_forecast).
+    """
     st.subheader("📊 Analyse Production & Marché")
-    
-    fig = make_subplots(
-        rows=2, cols=2,
-        subplot_titles=('Production vs Demande', 'Évolution des Prix', 
-                       'Valeur du Marché', 'Croissance Comparative'),
-        specs=[[{"secondary_y": True}, {"secondary_y": False}],
-               [{"secondary_y": False}, {"secondary_y": False}]]
-    )
-    
-    # Production vs Demande
-    fig.add_trace(
-        go.Scatter(x=df['Annee'], y=df['Production_Mondiale'], 
-                  name="Production", line=dict(color=oil_config["couleur"])),
-        row=1, col=1
-    )
-    fig.add_trace(
-        go.Scatter(x=df['Annee'], y=df['Demande_Mondiale'], 
-                  name="Demande", line=dict(color='#228B22')),
-        row=1, col=1, secondary_y=True
-    )
-    
-    # Évolution des Prix
-    fig.add_trace(
-        go.Scatter(x=df['Annee'], y=df['Prix_Moyen'], 
-                  name="Prix Moyen", line=dict(color='#FFD700')),
-        row=1, col=2
-    )
-    
-    # Valeur du Marché
-    fig.add_trace(
-        go.Scatter(x=df['Annee'], y=df['Valeur_Marche'], 
-                  name="Valeur Marché", line=dict(color='#8A2BE2')),
-        row=2, col=1
-    )
-    
-    # Croissance Comparative (normalisée)
-    fig.add_trace(
-        go.Scatter(x=df['Annee'], 
-                  y=df['Production_Mondiale']/df['Production_Mondiale'].max(), 
-                  name="Production (norm)", line=dict(color=oil_config["couleur"])),
-        row=2, col=2
-    )
-    fig.add_trace(
-        go.Scatter(x=df['Annee'], y=df['Prix_Moyen']/df['Prix_Moyen'].max(), 
-                  name="Prix (norm)", line=dict(color='#FFD700')),
-        row=2, col=2
-    )
-    
-    fig.update_layout(height=600, title_text=f"Analyse Marché - {oil_name}")
-    st.plotly_chart(fig, use_container_width=True)
+    from figures import build_production_figure  # Plotly n'est chargé qu'au premier graphique
+    
+    def build():
+        bands = None
+        if show_bands and dashboard is not None:
+            from scenarios import oil_bands
+            bands = oil_bands(dashboard.generator, oil_name, seed=dashboard.generator.seed,
+                              start_year=int(df['Annee'].iloc[0]), end_year=int(df['Annee'].iloc[-1]))
+        return {'production': build_production_figure(df, oil_name, oil_config, bands,
+                                                      aggregates=aggregates, forecast=forecast)}
+    
+    view = granularity_view('production_mc' if show_bands else 'production', df)
+    if forecast is not None:
+        view = f"{view}+prevision"
+    if version is not None:
+        view = f"{view}@live{version}"
+    figures = cached_figures(dashboard, view, [oil_name], build)
+    st.plotly_chart(figures['production'], use_container_width=True, key=view)
 
-def create_therapeutic_analysis(df, oil_config):
+@timed()
+def create_therapeutic_analysis(df, oil_config, oil_name=None, dashboard=None):
     """Analyse des applications thérapeutiques"""
     st.subheader("💊 Analyse Thérapeutique")
+    from figures import build_therapeutic_figures
+    figures = cached_figures(dashboard, granularity_view('therapeutique', df), [oil_name],
+                             lambda: build_therapeutic_figures(df, oil_config))
     
     col1, col2 = st.columns(2)
     
     with col1:
-        # Efficacité thérapeutique
-        fig = px.line(df, x='Annee', y='Efficacite_Therapeutique',
-                     title='Évolution de l\'Efficacité Thérapeutique',
-                     labels={'Efficacite_Therapeutique': 'Score d\'Efficacité'})
-        fig.update_traces(line=dict(color=oil_config["couleur"], width=3))
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(figures['efficacite'], use_container_width=True)
     
     with col2:
-        # Recherche scientifique
-        fig = px.bar(df, x='Annee', y='Etudes_Scientifiques',
-                    title='Études Scientifiques Publiées',
-                    labels={'Etudes_Scientifiques': 'Nombre d\'Études'})
-        fig.update_traces(marker_color=oil_config["couleur"])
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(figures['etudes'], use_container_width=True)
     
     # Applications par secteur
-    usage_data = pd.DataFrame({
-        'Année': df['Annee'],
-        'Aromathérapie': df['Usage_Aromatherapie'],
-        'Cosmétique': df['Usage_Cosmetique'],
-        'Pharmaceutique': df['Usage_Pharmaceutique']
-    })
-    
-    fig = px.area(usage_data, x='Année', 
-                  y=['Aromathérapie', 'Cosmétique', 'Pharmaceutique'],
-                  title='Évolution des Applications par Secteur',
-                  labels={'value': 'Score d\'Utilisation', 'variable': 'Secteur'})
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(figures['usages'], use_container_width=True)
 
-def create_sustainability_analysis(df, oil_config):
+@timed()
+def create_sustainability_analysis(df, oil_config, oil_name=None, dashboard=None):
     """Analyse de durabilité environnementale"""
     st.subheader("🌱 Analyse Durabilité")
+    from figures import build_sustainability_figures
+    figures = cached_figures(dashboard, granularity_view('durabilite', df), [oil_name],
+                             lambda: build_sustainability_figures(df, oil_config))
     
     col1, col2 = st.columns(2)
     
     with col1:
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=df['Annee'], y=df['Durabilite_Production'], 
-                               name='Durabilité Production', line=dict(color=oil_config["couleur"])))
-        fig.add_trace(go.Scatter(x=df['Annee'], y=df['Impact_Environnemental'], 
-                               name='Impact Environnemental', line=dict(color='#FF6B6B')))
-        fig.update_layout(title='Durabilité vs Impact Environnemental',
-                         xaxis_title='Année', yaxis_title='Score')
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(figures['durabilite'], use_container_width=True)
     
     with col2:
         # Radar chart des indicateurs de durabilité
-        categories = ['Production', 'Qualité Bio', 'Durabilité', 'Impact Environ.']
-        values = [
-            df['Production_Mondiale'].iloc[-1] / df['Production_Mondiale'].max() * 100,
-            df['Qualite_Bio'].iloc[-1],
-            df['Durabilite_Production'].iloc[-1],
-            100 - df['Impact_Environnemental'].iloc[-1]  # Inversé car plus bas = mieux
-        ]
-        
-        fig = go.Figure(data=go.Scatterpolar(
-            r=values,
-            theta=categories,
-            fill='toself',
-            line=dict(color=oil_config["couleur"])
-        ))
-        fig.update_layout(
-            polar=dict(
-                radialaxis=dict(visible=True, range=[0, 100])
-            ),
-            showlegend=False,
-            title='Indicateurs de Durabilité (Actuels)'
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(figures['radar'], use_container_width=True)
 
+@timed()
 def create_comparative_analysis(dashboard, selected_oils):
     """Analyse comparative entre plusieurs huiles"""
     st.subheader("📈 Analyse Comparative")
+    from figures import build_comparative_figures
     
-    comparison_data = []
-    for oil in selected_oils:
-        df = dashboard.generate_comprehensive_data(oil)
-        latest = df.iloc[-1]
-        config = dashboard.oils_config[oil]
-        comparison_data.append({
-            'Huile': oil,
-            'Production': latest['Production_Mondiale'],
-            'Prix': latest['Prix_Moyen'],
-            'Efficacité': latest['Efficacite_Therapeutique'],
-            'Études': latest['Etudes_Scientifiques'],
-            'Durabilité': latest['Durabilite_Production'],
-            'Rendement': config['rendement'] * 100,
-            'Type': config['type'],
-            'Couleur': config['couleur']
-        })
-    
-    comp_df = pd.DataFrame(comparison_data)
+    figures = cached_figures(dashboard, 'comparatif', selected_oils,
+                             lambda: build_comparative_figures(comparison_frame(dashboard, selected_oils)))
     
     col1, col2 = st.columns(2)
     
     with col1:
-        fig = px.bar(comp_df, x='Huile', y='Production', color='Huile',
-                    title='Production Mondiale Comparée',
-                    labels={'Production': 'Tonnes'},
-                    color_discrete_map={oil: dashboard.oils_config[oil]['couleur'] for oil in selected_oils})
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(figures['production'], use_container_width=True)
     
     with col2:
-        fig = px.bar(comp_df, x='Huile', y='Prix', color='Huile',
-                    title='Prix Moyen Comparé',
-                    labels={'Prix': '€/kg'},
-                    color_discrete_map={oil: dashboard.oils_config[oil]['couleur'] for oil in selected_oils})
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(figures['prix'], use_container_width=True)
     
     # Radar chart comparatif
-    fig = go.Figure()
-    for oil in selected_oils:
-        row = comp_df[comp_df['Huile'] == oil].iloc[0]
-        fig.add_trace(go.Scatterpolar(
-            r=[row['Production']/comp_df['Production'].max()*100,
-               row['Prix']/comp_df['Prix'].max()*100,
-               row['Efficacité'],
-               row['Études']/comp_df['Études'].max()*100,
-               row['Durabilité']],
-            theta=['Production', 'Prix', 'Efficacité', 'Recherche', 'Durabilité'],
-            name=oil,
-            fill='toself',
-            line=dict(color=dashboard.oils_config[oil]['couleur'])
-        ))
-    
-    fig.update_layout(
-        polar=dict(radialaxis=dict(visible=True, range=[0, 100])),
-        title='Analyse Comparative Multi-Critères'
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(figures['radar'], use_container_width=True)
 
+@timed()
 def create_market_overview(dashboard):
     """Vue d'ensemble du marché"""
     st.subheader("🏢 Vue d'Ensemble du Marché")
+    from figures import build_market_figures
     
-    # Statistiques globales
-    market_data = []
-    for oil_name, config in dashboard.oils_config.items():
-        df = dashboard.generate_comprehensive_data(oil_name)
-        latest = df.iloc[-1]
-        market_data.append({
-            'Huile': oil_name,
-            'Production (t)': latest['Production_Mondiale'],
-            'Prix (€/kg)': latest['Prix_Moyen'],
-            'Valeur Marché (M€)': latest['Valeur_Marche'],
-            'Type': config['type'],
-            'Rendement (%)': config['rendement'] * 100,
-            'Couleur': config['couleur']
-        })
-    
-    market_df = pd.DataFrame(market_data)
+    # Statistiques globales (table matérialisée, tenue à jour à chaque changement)
+    from market import SCATTER_OILS
+    market_key, market = live_session(dashboard).market()
+    figures = cached_figures(dashboard, 'marche', [market_key],
+                             lambda: build_market_figures(market.top(10), market.type_counts(),
+                                                          market.top(SCATTER_OILS), len(market)))
     
     # Top 10 par valeur de marché
     st.write("**Top 10 des Huiles par Valeur de Marché**")
-    top_10 = market_df.nlargest(10, 'Valeur Marché (M€)')
-    fig = px.bar(top_10, x='Huile', y='Valeur Marché (M€)', color='Huile',
-                color_discrete_map={row['Huile']: row['Couleur'] for _, row in top_10.iterrows()})
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(figures['top_10'], use_container_width=True)
     
     # Répartition par type
     col1, col2 = st.columns(2)
     
     with col1:
-        type_counts = market_df['Type'].value_counts()
-        fig = px.pie(values=type_counts.values, names=type_counts.index,
-                    title='Répartition par Type Thérapeutique')
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(figures['types'], use_container_width=True)
     
     with col2:
-        fig = px.scatter(market_df, x='Prix (€/kg)', y='Production (t)', 
-                        size='Valeur Marché (M€)', color='Type',
-                        hover_name='Huile', title='Prix vs Production')
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(figures['prix_production'], use_container_width=True)
+
+def create_export_panel(dashboard, available_oils, selected_oil, granularity):
+    """Export d'une sélection d'huiles, d'indicateurs et d'années (fichier écrit au clic, bloc par bloc)"""
+    with st.sidebar.expander("📦 Export des données"):
+        all_oils = st.checkbox("Toutes les huiles", value=False)
+        oils = available_oils if all_oils else st.multiselect(
+            "Huiles:", available_oils, default=[selected_oil])
+        indicators = st.multiselect("Indicateurs:", INDICATOR_COLUMNS, default=INDICATOR_COLUMNS)
+        start_year, end_year = st.slider("Années:", 2000, 2025, (2000, 2025))
+        fmt = st.selectbox("Format:", list(EXPORT_FORMATS), format_func=str.capitalize)
+        extension, mime = EXPORT_FORMATS[fmt]
+        st.download_button(
+            "⬇️ Télécharger",
+            partial(export_download, dashboard.source, fmt, oils, indicators, start_year, end_year, granularity),
+            file_name=f"huiles_{GRANULARITIES[granularity].lower()}_{start_year}_{end_year}{extension}",
+            mime=mime, disabled=not oils or not indicators, on_click="ignore"
+        )
+        st.caption(f"{len(oils)} huile(s) · granularité {GRANULARITIES[granularity].lower()} · "
+                   "gros extraits: `python export.py`")
+
+def create_search_filter(dashboard, available_oils):
+    """Recherche avancée dans le catalogue (index inversé)"""
+    index = dashboard.index
+    with st.sidebar.expander("🔎 Recherche avancée"):
+        name_prefix = st.text_input("Nom commençant par:")
+        property_prefix = st.text_input("Propriété (début du mot):", placeholder="antivir")
+        molecules = st.multiselect("Molécules présentes:", index.terms('molecules_principales'))
+        excluded_ci = st.multiselect("Contre-indications à exclure:", index.terms('contre_indications'))
+        excluded_regions = st.multiselect("Régions à exclure:", index.terms('regions'))
+    
+    query = index.search(
+        require={'molecules_principales': molecules},
+        prefixes={'proprietes': property_prefix},
+        exclude={'contre_indications': excluded_ci, 'regions': excluded_regions}
+    )
+    if name_prefix:
+        query = query & index.name_prefix(name_prefix)
+    
+    matches = set(index.names(query))
+    filtered = [oil for oil in available_oils if oil in matches]
+    if not filtered:
+        st.sidebar.warning("Aucune huile ne correspond aux critères")
+        return available_oils
+    if len(filtered) < len(available_oils):
+        st.sidebar.caption(f"{len(filtered)} huile(s) sur {len(available_oils)}")
+    return filtered
 
 def create_oil_info_card(oil_config):
     """Carte d'information sur l'huile sélectionnée"""
@@ -591,121 +276,408 @@ def create_oil_info_card(oil_config):
     st.sidebar.write("**Évolution prix:**", oil_config['prix_evolution'])
     st.sidebar.write("**Évolution demande:**", oil_config['demande_evolution'])
 
+def render_production_view(dashboard, df, selected_oil, oil_config):
+    """Onglet Marché & Production"""
+    annual = df.attrs.get('granularite', 'Y') == 'Y'
+    show_bands = st.toggle("🎲 Bandes de confiance Monte Carlo (P5/P50/P95, 10 000 trajectoires)",
+                           disabled=not annual, help=None if annual else "Disponible en granularité annuelle")
+    show_bands = show_bands and annual
+    create_production_analysis(df, selected_oil, oil_config, dashboard, show_bands,
+                               forecast=active_forecast(dashboard, df, selected_oil))
+
+    # Données brutes (formatées côté navigateur, sans Styler pandas)
+    if st.toggle("📋 Voir les données détaillées"):
+        st.dataframe(df, column_config={
+            'Annee': st.column_config.NumberColumn(format="%d"),
+            'Production_Mondiale': st.column_config.NumberColumn(format="localized"),
+            'Prix_Moyen': st.column_config.NumberColumn(format="%.1f"),
+            'Valeur_Marche': st.column_config.NumberColumn(format="%.1f"),
+            'Efficacite_Therapeutique': st.column_config.NumberColumn(format="%.1f")
+        })
+
+def render_therapeutic_view(dashboard, df, selected_oil, oil_config):
+    """Onglet Applications"""
+    create_therapeutic_analysis(df, oil_config, selected_oil, dashboard)
+
+    # Insights thérapeutiques
+    st.subheader("💡 Insights Thérapeutiques")
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.info(f"""
+        **Applications recommandées:**
+        - {oil_config['proprietes'][0].capitalize()}
+        - {oil_config['proprietes'][1].capitalize()}
+        - {oil_config['proprietes'][2].capitalize()}
+        """)
+
+    with col2:
+        st.success(f"""
+        **Potentiel de développement:**
+        - Efficacité actuelle: {df['Efficacite_Therapeutique'].iloc[-1]:.1f}/100
+        - Recherche scientifique: {df['Etudes_Scientifiques'].iloc[-1]:.0f} études
+        - Croissance: {((df['Usage_Pharmaceutique'].iloc[-1] / df['Usage_Pharmaceutique'].iloc[0]) - 1) * 100:.1f}%
+        """)
+
+def render_sustainability_view(dashboard, df, selected_oil, oil_config):
+    """Onglet Durabilité"""
+    create_sustainability_analysis(df, oil_config, selected_oil, dashboard)
+
+    # Recommandations durabilité
+    st.subheader("♻️ Recommandations Durabilité")
+
+    impact_score = df['Impact_Environnemental'].iloc[-1]
+    durability_score = df['Durabilite_Production'].iloc[-1]
+
+    if impact_score > 40:
+        st.warning("""
+        **Attention:** Impact environnemental élevé. Recommandations:
+        - Optimiser les techniques de distillation
+        - Développer l'agriculture régénérative
+        - Réduire la consommation d'eau
+        """)
+    else:
+        st.success("""
+        **Excellent:** Impact environnemental maîtrisé. Maintenir les bonnes pratiques.
+        """)
+
+    if durability_score < 70:
+        st.warning("""
+        **Amélioration possible:** Durabilité de production modérée.
+        - Investir dans des pratiques durables
+        - Certifications environnementales
+        - Optimisation de la chaîne d'approvisionnement
+        """)
+
+def create_similarity_panel(dashboard, selected_oil):
+    """Huiles les plus proches de l'huile sélectionnée (composition, propriétés et dynamique des séries)"""
+    st.subheader("🔁 Huiles Similaires / Substituts")
+    k = st.slider("Nombre de voisins:", 1, 10, 5)
+    neighbours = similar_oils_frame(dashboard, selected_oil, k)
+    st.dataframe(neighbours, hide_index=True, column_config={
+        'Similarité': st.column_config.ProgressColumn(format="%.2f", min_value=0, max_value=1),
+        'Jaccard': st.column_config.NumberColumn(format="%.2f",
+                                                 help="Molécules et propriétés partagées"),
+        'Corrélation': st.column_config.NumberColumn(format="%.2f",
+                                                     help="Corrélation moyenne des séries d'indicateurs"),
+    })
+
+def render_comparative_view(dashboard, df, selected_oil, oil_config):
+    """Onglet Comparatif"""
+    create_similarity_panel(dashboard, selected_oil)
+
+    # Sélection multiple pour comparaison
+    comparative_oils = st.multiselect(
+        "Sélectionnez les huiles à comparer:",
+        dashboard.available_oils(),
+        default=comparative_defaults(dashboard, selected_oil)
+    )
+
+    if len(comparative_oils) >= 2:
+        create_comparative_analysis(dashboard, comparative_oils)
+    else:
+        st.warning("Sélectionnez au moins 2 huiles pour la comparaison")
+
+def render_market_view(dashboard, df, selected_oil, oil_config):
+    """Onglet Vue Marché"""
+    create_market_overview(dashboard)
+
+@timed()
+def render_geography_view(dashboard, df, selected_oil, oil_config):
+    """Onglet Géographie: offre par pays, concentration et exposition à une région"""
+    st.subheader("🌍 Répartition Géographique de l'Offre")
+    from figures import build_region_figures
+    
+    supply = dashboard.regional_supply()
+    years = supply.years.tolist()
+    year = st.select_slider("Année:", options=years, value=years[-1])
+    regions = supply.region_frame(year)
+    t = supply.year_position(year)
+    # Ordre alphabétique: la liste ne change pas avec l'année (le choix est conservé)
+    region_names = sorted(regions['Région'])
+    region = st.selectbox("Exposition à la région:", region_names,
+                          index=region_names.index("Madagascar") if "Madagascar" in region_names else 0)
+    exposure = supply.exposure(region)
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("HHI de l'offre mondiale", f"{supply.market_hhi()[t]:,.0f}",
+                  help="Herfindahl-Hirschman des parts par pays (10 000 = un seul pays)")
+    with col2:
+        st.metric("Premier producteur", regions['Région'].iloc[0],
+                  f"{regions['Part mondiale (%)'].iloc[0]:.1f}% de l'offre", delta_color="off")
+    with col3:
+        st.metric(f"Part de l'offre mondiale: {region}", f"{exposure[t] * 100:.1f}%")
+    with col4:
+        st.metric(f"HHI de {selected_oil}", f"{supply.oil_hhi()[supply.position(selected_oil), t]:,.0f}")
+    
+    figures = cached_figures(dashboard, f"geographie/{year}/{region}", [selected_oil],
+                             lambda: build_region_figures(regions, year, supply.years, supply.market_hhi(),
+                                                          region, exposure,
+                                                          supply.oil_breakdown(selected_oil, year), selected_oil))
+    st.plotly_chart(figures['carte'], use_container_width=True)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.plotly_chart(figures['concentration'], use_container_width=True)
+    with col2:
+        st.plotly_chart(figures['huile'], use_container_width=True)
+    
+    st.write(f"**Huiles les plus dépendantes de {region} ({year}):**")
+    st.dataframe(supply.oil_exposure(region, year).head(10), hide_index=True)
+
+@timed()
+def render_sensitivity_view(dashboard, df, selected_oil, oil_config):
+    """Onglet Sensibilité: grille d'hypothèses du générateur évaluée en un seul calcul"""
+    st.subheader("🎛️ Sensibilité aux Hypothèses de Croissance")
+    import numpy as np
+    from figures import build_sensitivity_figures
+    from sensitivity import OUTCOMES, PARAMETER_NAMES, PARAMETERS, full_grid, one_at_a_time, sweep, tornado_frame
+    
+    def label(name):
+        return PARAMETERS[name][1]
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        oils = st.multiselect("Huiles (volumes cumulés, prix et efficacité moyennés):",
+                              dashboard.available_oils(), default=[selected_oil])
+        outcome = st.selectbox("Résultat:", OUTCOMES, index=OUTCOMES.index('Valeur cumulée (M€)'))
+        spread = st.slider("Variation des paramètres (±%):", 10, 90, 50, step=10) / 100
+    with col2:
+        x_name = st.selectbox("Heatmap, axe horizontal:", PARAMETER_NAMES,
+                              index=PARAMETER_NAMES.index('trend_valeur'), format_func=label)
+        y_name = st.selectbox("Heatmap, axe vertical:", PARAMETER_NAMES,
+                              index=PARAMETER_NAMES.index('choc_2020'), format_func=label)
+        steps = st.slider("Valeurs par axe:", 5, 40, 20)
+        workers = None if st.toggle("Répartir sur plusieurs processus", value=False) else 1
+    if not oils:
+        st.warning("Sélectionnez au moins une huile")
+        return
+    if x_name == y_name:
+        st.warning("Choisissez deux paramètres différents pour la heatmap")
+        return
+    
+    def build():
+        def axis(name):
+            return PARAMETERS[name][0] * np.linspace(1 - spread, 1 + spread, steps)
+        
+        grid = full_grid({y_name: axis(y_name), x_name: axis(x_name)})
+        results = sweep(dashboard.generator, oils, np.vstack([one_at_a_time(spread), grid]), workers=workers)
+        tornado, reference = tornado_frame(results.iloc[:1 + 2 * len(PARAMETER_NAMES)], outcome, spread)
+        heatmap = results.iloc[1 + 2 * len(PARAMETER_NAMES):].pivot(index=y_name, columns=x_name, values=outcome)
+        return build_sensitivity_figures(tornado, reference, outcome, heatmap, label(x_name), label(y_name))
+    
+    view = f"sensibilite/{outcome}/{spread}/{x_name}/{y_name}/{steps}"
+    figures = cached_figures(dashboard, view, oils, build)
+    st.caption(f"{steps * steps + 1 + 2 * len(PARAMETER_NAMES)} combinaisons × {len(oils)} huile(s) · "
+               "les chocs 2008/2020 ne touchent que les années concernées: ils se lisent sur la valeur cumulée")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.plotly_chart(figures['tornado'], use_container_width=True)
+    with col2:
+        st.plotly_chart(figures['heatmap'], use_container_width=True)
+
+def live_session(dashboard):
+    """Ajouts simulés de la session courante (les autres sessions gardent l'historique)"""
+    session = st.session_state.get("live_session")
+    if session is None or session.dashboard is not dashboard:
+        session = st.session_state["live_session"] = LiveSession(dashboard)
+    return session
+
+def live_updates(dashboard, selected_oil, oil_config, granularity):
+    """Rerun partiel: seuls les KPI et le graphique de la série mise à jour sont redessinés"""
+    session = live_session(dashboard)
+    live = session.store
+    if st.button("➕ Simuler une nouvelle période"):
+        series = live.series(selected_oil, granularity)
+        periods, values = simulated_periods(dashboard.generator, series, selected_oil)
+        live.append(selected_oil, periods, values, granularity)
+    
+    df, aggregates, version = live.snapshot(selected_oil, granularity)
+    last_period = df['Date' if 'Date' in df.columns else 'Annee'].iloc[-1]
+    st.caption(f"{aggregates.count} périodes · dernière: {last_period} · version {version}")
+    create_kpi_metrics(df, oil_config, aggregates)
+    create_production_analysis(df, selected_oil, oil_config, dashboard,
+                               aggregates=aggregates, version=f"{session.key}/{version}")
+
+def render_live_view(dashboard, df, selected_oil, oil_config):
+    """Onglet Temps Réel: série incrémentale rafraîchie sans relancer le reste de la page"""
+    granularity = df.attrs.get('granularite', 'Y')
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        refresh = st.select_slider(
+            "Rafraîchissement automatique:", options=[0, 2, 5, 10, 30], value=5,
+            format_func=lambda seconds: "désactivé" if seconds == 0 else f"{seconds} s"
+        )
+    with col2:
+        if st.button("↺ Revenir à l'historique"):
+            live_session(dashboard).store.reset(selected_oil)
+    
+    st.fragment(run_every=refresh or None)(live_updates)(dashboard, selected_oil, oil_config, granularity)
+
+def comparative_defaults(dashboard, selected_oil):
+    """Huiles comparées par défaut: l'huile sélectionnée et ses trois plus proches voisines"""
+    return [selected_oil] + dashboard.similarity().neighbours(selected_oil, 3)['Huile'].tolist()
+
+def prefetch_view(dashboard, view, selected_oil):
+    """Prépare en arrière-plan les données (et les imports) de la vue la plus probable"""
+    if view in ("💊 Applications", "📈 Comparatif", "🏢 Vue Marché", "🌍 Géographie"):
+        import plotly.express  # noqa: F401
+    if view == "📈 Comparatif":
+        dashboard.cache.get_batch(comparative_defaults(dashboard, selected_oil))
+    elif view == "🏢 Vue Marché":
+        dashboard.market_aggregates()
+    elif view == "🌍 Géographie":
+        dashboard.regional_supply()
+
+# Vues du dashboard, dans l'ordre de navigation
+VIEWS = {
+    "📊 Marché & Production": render_production_view,
+    "💊 Applications": render_therapeutic_view,
+    "🌱 Durabilité": render_sustainability_view,
+    "📈 Comparatif": render_comparative_view,
+    "🏢 Vue Marché": render_market_view,
+    "🌍 Géographie": render_geography_view,
+    "🎛️ Sensibilité": render_sensitivity_view,
+    "🔄 Temps Réel": render_live_view
+}
+
+@st.cache_resource
+def get_dashboard():
+    """Instance unique du dashboard et de son cache pour tout le processus
+    
+    La variable DASHBOARD_DATA_SOURCE désigne un fichier Parquet/Arrow IPC (générateur par défaut),
+    DASHBOARD_MEMORY_BUDGET_MB la mémoire allouée aux caches partagés (512 Mo par défaut) et
+    DASHBOARD_SNAPSHOT l'instantané binaire mappé au démarrage (reconstruit s'il est périmé).
+    """
+    data_source = os.environ.get("DASHBOARD_DATA_SOURCE")
+    snapshot = None
+    if os.environ.get("DASHBOARD_SNAPSHOT"):
+        from snapshot import open_or_build
+        snapshot = open_or_build(os.environ["DASHBOARD_SNAPSHOT"], data_source)
+    return CompleteEssentialOilDashboard(data_source=data_source, memory_budget=budget_from_env(),
+                                         snapshot=snapshot)
+
+@st.cache_resource
+def get_prefetch_executor():
+    """Un seul thread de préchargement pour tout le processus"""
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
+
+def profiling_mode():
+    """Mode d'instrumentation: ?profile=1 (ou cprofile) dans l'URL, sinon la variable DASHBOARD_PROFILE"""
+    mode = (st.query_params.get("profile") or os.environ.get("DASHBOARD_PROFILE", "")).lower()
+    if mode in ("", "0", "false", "off"):
+        return None
+    return "cprofile" if mode == "cprofile" else "timings"
+
+def create_timing_panel(timings):
+    """Panneau développeur: temps des sections du rerun et exports des agrégats"""
+    with st.sidebar.expander("⏱️ Instrumentation", expanded=True):
+        st.write(f"**Rerun:** {timings.total * 1000:.1f} ms")
+        summary = timings.summary()
+        st.dataframe([
+            {'Section': path, 'ms': entry['seconds'] * 1000,
+             'ms propres': entry['self_seconds'] * 1000, 'Appels': entry['calls']}
+            for path, entry in sorted(summary.items(), key=lambda item: -item[1]['seconds'])
+        ], hide_index=True)
+        st.caption(f"{REGISTRY.reruns} rerun(s) instrumenté(s) dans ce processus")
+        st.download_button("Exporter JSON", REGISTRY.to_json(),
+                           file_name="dashboard_timings.json", mime="application/json")
+        st.download_button("Exporter Prometheus", REGISTRY.to_prometheus(),
+                           file_name="dashboard_timings.prom", mime="text/plain")
+        if timings.profile_path:
+            with open(timings.profile_path, 'rb') as handle:
+                st.download_button("Profil cProfile (.prof)", handle.read(),
+                                   file_name=os.path.basename(timings.profile_path))
+            st.caption(f"Profil écrit dans {timings.profile_path} (snakeviz / flameprof)")
+
+def create_memory_panel(dashboard):
+    """Panneau développeur: empreinte du panel complet (schéma compact) et des caches partagés"""
+    with st.sidebar.expander("🧮 Mémoire", expanded=False):
+        report = memory_report(dashboard)
+        st.write(f"**Panel complet:** {report['huiles']} huiles, {report['lignes']} lignes")
+        st.metric("Schéma compact", f"{report['octets'] / 1024:.1f} Ko",
+                  f"{(report['ratio'] - 1) * 100:.0f}% vs float64/objet", delta_color="inverse")
+        st.dataframe(report['colonnes'], hide_index=True)
+        caches = report['caches']
+        st.caption(f"Cache séries: {caches['dataset_cache']['bytes'] / 1024:.1f} Ko "
+                   f"({caches['dataset_cache']['entries']} entrées) · "
+                   f"cache figures: {caches['figure_cache']['bytes'] / 1024:.1f} Ko")
+        if caches['memory_budget']:
+            budget = caches['memory_budget']
+            st.caption(f"Budget: {budget['used_bytes'] / 1e6:.1f} / {budget['max_bytes'] / 1e6:.0f} Mo")
+
 def main():
+    """Un rerun du script, instrumenté si le mode développeur est actif"""
+    mode = profiling_mode()
+    with instrumented_rerun(enabled=mode is not None, profile=mode == "cprofile") as timings:
+        render_app()
+    if timings is not None:
+        create_timing_panel(timings)
+        create_memory_panel(get_dashboard())
+
+def render_app():
     st.title("🌿 Dashboard Pharmacopée Complète - Huiles Essentielles")
     st.markdown("""
     **Analyse complète des données de production, marché, recherche et durabilité pour 20 huiles essentielles**
     """)
     
-    # Initialisation du dashboard
-    dashboard = CompleteEssentialOilDashboard()
+    # Initialisation du dashboard (partagé entre les sessions)
+    dashboard = get_dashboard()
     
     # Sidebar pour la sélection
     st.sidebar.header("🔧 Configuration")
-    available_oils = list(dashboard.oils_config.keys())
+    available_oils = dashboard.available_oils()
     selected_oil = st.sidebar.selectbox(
         "Sélectionnez une huile essentielle:",
-        available_oils
+        create_search_filter(dashboard, available_oils)
+    )
+    
+    granularity = st.sidebar.selectbox(
+        "Granularité des séries:", dashboard.source.granularities,
+        format_func=GRANULARITIES.get
     )
+    st.sidebar.toggle("🔮 Prévisions jusqu'en 2035", value=True, key="show_forecast",
+                      disabled=granularity != 'Y',
+                      help="Lissage exponentiel à tendance amortie, intervalle de prévision à 95 %"
+                      if granularity == 'Y' else "Disponible en granularité annuelle")
+    
+    # Génération des données (déterministe et mise en cache)
+    with section("donnees_huile"):
+        df = dashboard.cache.get(selected_oil, granularity=granularity)
+    oil_config = dashboard.catalog.record(selected_oil)
     
-    # Génération des données
-    df = dashboard.generate_comprehensive_data(selected_oil)
-    oil_config = dashboard.oils_config[selected_oil]
+    create_export_panel(dashboard, available_oils, selected_oil, granularity)
     
     # Affichage des informations de l'huile
     create_oil_info_card(oil_config)
     
     # Métriques KPI
-    create_kpi_metrics(df, oil_config)
-    
-    # Onglets pour différentes analyses
-    tab1, tab2, tab3, tab4, tab5 = st.tabs([
-        "📊 Marché & Production", 
-        "💊 Applications", 
-        "🌱 Durabilité", 
-        "📈 Comparatif",
-        "🏢 Vue Marché"
-    ])
-    
-    with tab1:
-        create_production_analysis(df, selected_oil, oil_config)
-        
-        # Données brutes
-        with st.expander("📋 Voir les données détaillées"):
-            st.dataframe(df.style.format({
-                'Production_Mondiale': '{:,.0f}',
-                'Prix_Moyen': '{:.1f}',
-                'Valeur_Marche': '{:.1f}',
-                'Efficacite_Therapeutique': '{:.1f}'
-            }))
-    
-    with tab2:
-        create_therapeutic_analysis(df, oil_config)
-        
-        # Insights thérapeutiques
-        st.subheader("💡 Insights Thérapeutiques")
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.info(f"""
-            **Applications recommandées:**
-            - {oil_config['proprietes'][0].capitalize()}
-            - {oil_config['proprietes'][1].capitalize()}
-            - {oil_config['proprietes'][2].capitalize()}
-            """)
+    create_kpi_metrics(df, oil_config, forecast=active_forecast(dashboard, df, selected_oil))
+    
+    # Navigation entre les analyses
+    lazy_mode = st.sidebar.toggle("⚡ Chargement à la demande", value=True,
+                                  help="Ne calcule que la vue affichée")
+    view_names = list(VIEWS.keys())
+    
+    if lazy_mode:
+        prefetch = st.sidebar.toggle("Précharger la vue suivante",
+                                     value=os.environ.get("DASHBOARD_PREFETCH", "1") != "0")
+        active_view = st.radio("Vue", view_names, horizontal=True,
+                               label_visibility="collapsed", key="active_view")
         
-        with col2:
-            st.success(f"""
-            **Potentiel de développement:**
-            - Efficacité actuelle: {df['Efficacite_Therapeutique'].iloc[-1]:.1f}/100
-            - Recherche scientifique: {df['Etudes_Scientifiques'].iloc[-1]:.0f} études
-            - Croissance: {((df['Usage_Pharmaceutique'].iloc[-1] / df['Usage_Pharmaceutique'].iloc[0]) - 1) * 100:.1f}%
-            """)
-    
-    with tab3:
-        create_sustainability_analysis(df, oil_config)
+        if prefetch:
+            next_view = view_names[(view_names.index(active_view) + 1) % len(view_names)]
+            get_prefetch_executor().submit(prefetch_view, dashboard, next_view, selected_oil)
         
-        # Recommandations durabilité
-        st.subheader("♻️ Recommandations Durabilité")
-        
-        impact_score = df['Impact_Environnemental'].iloc[-1]
-        durability_score = df['Durabilite_Production'].iloc[-1]
-        
-        if impact_score > 40:
-            st.warning("""
-            **Attention:** Impact environnemental élevé. Recommandations:
-            - Optimiser les techniques de distillation
-            - Développer l'agriculture régénérative
-            - Réduire la consommation d'eau
-            """)
-        else:
-            st.success("""
-            **Excellent:** Impact environnemental maîtrisé. Maintenir les bonnes pratiques.
-            """)
-        
-        if durability_score < 70:
-            st.warning("""
-            **Amélioration possible:** Durabilité de production modérée.
-            - Investir dans des pratiques durables
-            - Certifications environnementales
-            - Optimisation de la chaîne d'approvisionnement
-            """)
-    
-    with tab4:
-        # Sélection multiple pour comparaison
-        comparative_oils = st.multiselect(
-            "Sélectionnez les huiles à comparer:",
-            available_oils,
-            default=[selected_oil, "Lavande", "Menthe Poivrée", "Arbre à Thé"]
-        )
-        
-        if len(comparative_oils) >= 2:
-            create_comparative_analysis(dashboard, comparative_oils)
-        else:
-            st.warning("Sélectionnez au moins 2 huiles pour la comparaison")
-    
-    with tab5:
-        create_market_overview(dashboard)
+        with section(f"vue {active_view}"):
+            VIEWS[active_view](dashboard, df, selected_oil, oil_config)
+    else:
+        # Mode historique: tous les onglets sont calculés à chaque interaction
+        for tab, (view, render) in zip(st.tabs(view_names), VIEWS.items()):
+            with tab, section(f"vue {view}"):
+                render(dashboard, df, selected_oil, oil_config)
     
     # Footer
     st.markdown("---")
@@ -0,0 +1,399 @@
+"""API JSON des séries, KPI, comparaisons et vue marché (serveur HTTP de la bibliothèque standard)
+
+    python api.py --port 8000
+    curl localhost:8000/api/oils/Lavande/kpis?forecast=1
+
+Routes (GET et HEAD):
+
+    /api/health                               version des données
+    /api/oils                                 huiles disponibles et leur type
+    /api/oils/<huile>/series                  ?granularity=Y&start_year=2000&end_year=2025&indicators=A,B
+    /api/oils/<huile>/kpis                    ?granularity=Y&forecast=1
+    /api/compare                              ?oils=Lavande,Tea Tree
+    /api/market                               ?top=10
+
+Les réponses viennent du même cœur de calcul que le dashboard (dashboard_core) et
+sont gardées dans un cache LRU borné en octets, clé: requête et version des données.
+Chaque réponse porte un ETag fort (empreinte du corps): un client qui le renvoie dans
+If-None-Match reçoit 304 sans corps.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from data_sources import GRANULARITIES, INDICATOR_COLUMNS, MEASURE_DTYPE
+from dashboard_core import CompleteEssentialOilDashboard, comparison_frame, kpi_summary
+from incremental import RunningAggregates
+from memory_budget import budget_from_env
+
+DEFAULT_PORT = 8000
+RESPONSE_CACHE_BYTES = 32 * 1024 * 1024
+MAX_COMPARED_OILS = 50
+MAX_TOP = 100
+
+class ApiError(Exception):
+    """Erreur renvoyée au client avec son code HTTP"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+    def body(self):
+        return json.dumps({'erreur': str(self)}, ensure_ascii=False).encode('utf-8')
+
+def json_floats(values):
+    """Liste JSON d'un tableau de mesures: représentation float32 la plus courte, NaN -> null"""
+    values = np.asarray(values)
+    # str() d'un float32 donne sa plus courte écriture (123.456 et non 123.45600128173828)
+    shortest = values.astype(str).astype(np.float64)
+    return np.where(np.isnan(shortest), None, shortest.astype(object)).tolist()
+
+def frame_records(df):
+    """Lignes d'un DataFrame en dictionnaires JSON (catégories en chaînes, mesures via json_floats)"""
+    columns = {}
+    for column, values in df.items():
+        if pd.api.types.is_float_dtype(values):
+            columns[column] = json_floats(values.to_numpy())
+        elif pd.api.types.is_integer_dtype(values):
+            columns[column] = values.astype(int).tolist()
+        else:
+            columns[column] = values.astype(str).tolist()
+    return [dict(zip(columns, row)) for row in zip(*columns.values())]
+
+def etag_matches(header, etag):
+    """Vrai si l'en-tête If-None-Match désigne l'ETag courant (comparaison faible, RFC 9110)"""
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    return any(tag.strip().removeprefix('W/') == etag for tag in header.split(','))
+
+class ResponseCache:
+    """Cache LRU des corps de réponse et de leur ETag, borné en octets
+
+    Avec un `budget`, son volume compte dans la limite mémoire commune du processus.
+    """
+
+    def __init__(self, max_bytes=RESPONSE_CACHE_BYTES, budget=None):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.budget = budget
+        if budget is not None:
+            budget.register(self)
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    def get(self, key):
+        """(ETag, corps) d'une requête déjà servie, ou None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            entry['touched'] = time.monotonic()
+            self.hits += 1
+            return entry['etag'], entry['body']
+
+    def put(self, key, etag, body):
+        with self._lock:
+            if len(body) > self.max_bytes:
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous['body'])
+            self._entries[key] = {'etag': etag, 'body': body, 'touched': time.monotonic()}
+            self._bytes += len(body)
+            while self._bytes > self.max_bytes:
+                self._pop_oldest()
+        if self.budget is not None:
+            self.budget.enforce()
+
+    def _pop_oldest(self):
+        _, evicted = self._entries.popitem(last=False)
+        self._bytes -= len(evicted['body'])
+        self.evictions += 1
+        return len(evicted['body'])
+
+    def oldest_access(self):
+        """Instant d'accès de l'entrée la moins récemment utilisée (None si vide)"""
+        with self._lock:
+            return next(iter(self._entries.values()))['touched'] if self._entries else None
+
+    def evict_oldest(self):
+        """Évince l'entrée la moins récemment utilisée; retourne les octets libérés"""
+        with self._lock:
+            return self._pop_oldest() if self._entries else 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Compteurs du cache"""
+        with self._lock:
+            return {
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'entries': len(self._entries), 'bytes': self._bytes, 'max_bytes': self.max_bytes
+            }
+
+def _param(query, name, default=None):
+    values = query.get(name)
+    return values[-1] if values else default
+
+def _int_param(query, name, default, low=None, high=None):
+    value = _param(query, name)
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"Paramètre {name}: entier attendu") from None
+    if (low is not None and value < low) or (high is not None and value > high):
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"Paramètre {name}: valeur hors de [{low}, {high}]")
+    return value
+
+def _list_param(query, name):
+    """Valeurs d'un paramètre répété (?oils=A&oils=B) ou séparées par des virgules (?oils=A,B)"""
+    return [item.strip() for value in query.get(name, []) for item in value.split(',') if item.strip()]
+
+class DashboardApi:
+    """Routage et calcul des réponses JSON, indépendamment du serveur HTTP"""
+
+    def __init__(self, dashboard, responses=None):
+        self.dashboard = dashboard
+        self.responses = responses if responses is not None else ResponseCache(budget=dashboard.memory_budget)
+        self._available_oils = (None, frozenset())
+        # (motif du chemin, méthode, dépend de la table du marché)
+        self.routes = [
+            (re.compile(r'/api/health'), self.health, False),
+            (re.compile(r'/api/oils'), self.oils, False),
+            (re.compile(r'/api/oils/(?P<oil_name>[^/]+)/series'), self.series, False),
+            (re.compile(r'/api/oils/(?P<oil_name>[^/]+)/kpis'), self.kpis, False),
+            (re.compile(r'/api/compare'), self.compare, False),
+            (re.compile(r'/api/market'), self.market, True),
+        ]
+
+    def resolve(self, path):
+        for pattern, handler, uses_market in self.routes:
+            match = pattern.fullmatch(path.rstrip('/') or '/')
+            if match:
+                return handler, {name: unquote(value) for name, value in match.groupdict().items()}, uses_market
+        raise ApiError(HTTPStatus.NOT_FOUND, f"Route inconnue: {path}")
+
+    def get(self, path, query):
+        """(ETag, corps JSON) d'une requête GET, servis depuis le cache tant que les données n'ont pas changé"""
+        handler, args, uses_market = self.resolve(path)
+        version = self.dashboard.cache.version
+        if uses_market:
+            version += (self.dashboard.market_aggregates().version,)
+        key = (handler.__name__, tuple(sorted(args.items())),
+               tuple(sorted((name, tuple(values)) for name, values in query.items())), version)
+        cached = self.responses.get(key)
+        if cached is not None:
+            return cached
+        payload = handler(query, **args)
+        body = json.dumps(payload, ensure_ascii=False, separators=(',', ':'), allow_nan=False).encode('utf-8')
+        etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        self.responses.put(key, etag, body)
+        return etag, body
+
+    def _oil(self, oil_name):
+        if oil_name not in self._available():
+            raise ApiError(HTTPStatus.NOT_FOUND, f"Huile inconnue: {oil_name}")
+        return oil_name
+
+    def _available(self):
+        # Huiles disponibles, relues seulement quand la version des données change
+        version = self.dashboard.cache.version
+        if self._available_oils[0] != version:
+            self._available_oils = (version, frozenset(self.dashboard.available_oils()))
+        return self._available_oils[1]
+
+    def _granularity(self, query):
+        granularity = _param(query, 'granularity', 'Y')
+        if granularity not in GRANULARITIES:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"Granularité inconnue: {granularity} "
+                                                   f"(valeurs: {', '.join(GRANULARITIES)})")
+        return granularity
+
+    def health(self, query):
+        return {'statut': 'ok', 'version': [str(part) for part in self.dashboard.cache.version]}
+
+    def oils(self, query):
+        names = self.dashboard.available_oils()
+        types = self.dashboard.catalog.categorical('type', names).astype(str)
+        return {'huiles': [{'huile': name, 'type': oil_type} for name, oil_type in zip(names, types)]}
+
+    def series(self, query, oil_name):
+        """Séries d'une huile, en colonnes (périodes, puis une liste par indicateur)"""
+        oil_name = self._oil(oil_name)
+        granularity = self._granularity(query)
+        start_year = _int_param(query, 'start_year', 2000, 1900, 2100)
+        end_year = _int_param(query, 'end_year', 2025, 1900, 2100)
+        # Vérifié aussi quand end_year prend sa valeur par défaut (?start_year=2030 seul)
+        if end_year < start_year:
+            raise ApiError(HTTPStatus.BAD_REQUEST,
+                           f"Paramètres start_year/end_year: {start_year} postérieur à {end_year}")
+        indicators = _list_param(query, 'indicators') or INDICATOR_COLUMNS
+        unknown = [name for name in indicators if name not in INDICATOR_COLUMNS]
+        if unknown:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"Indicateurs inconnus: {', '.join(unknown)}")
+        try:
+            df = self.dashboard.cache.get(oil_name, start_year, end_year, granularity=granularity)
+        except ValueError as error:
+            raise ApiError(HTTPStatus.BAD_REQUEST, str(error)) from None
+        periods = df['Date'].astype(str).tolist() if 'Date' in df else df['Annee'].astype(int).tolist()
+        return {
+            'huile': oil_name,
+            'granularite': granularity,
+            'periodes': periods,
+            'series': {name: json_floats(df[name].to_numpy()) for name in indicators},
+        }
+
+    def kpis(self, query, oil_name):
+        """KPI de l'en-tête du dashboard; prévision en fin d'horizon avec ?forecast=1 (séries annuelles)"""
+        oil_name = self._oil(oil_name)
+        granularity = self._granularity(query)
+        try:
+            df = self.dashboard.cache.get(oil_name, granularity=granularity)
+        except ValueError as error:
+            raise ApiError(HTTPStatus.BAD_REQUEST, str(error)) from None
+        kpis = kpi_summary(RunningAggregates.from_frame(df))
+        payload = {'huile': oil_name, 'granularite': granularity, 'kpis': {
+            indicator: {**entry, **dict(zip(('valeur', 'variation'), json_floats(
+                np.array([entry['valeur'], entry['variation']], dtype=MEASURE_DTYPE))))}
+            for indicator, entry in kpis.items()
+        }}
+        if _param(query, 'forecast', '0') not in ('0', 'false', '') and granularity == 'Y':
+            forecast = self.dashboard.forecasts.get(oil_name)
+            payload['prevision'] = {
+                indicator: {
+                    'annee': int(forecast['Annee'][-1]),
+                    'valeur': json_floats(forecast[indicator]['mean'][-1:])[0],
+                    **{f'intervalle_{level}': json_floats([forecast[indicator][level][0][-1],
+                                                           forecast[indicator][level][1][-1]])
+                       for level in self.dashboard.forecasts.levels},
+                }
+                for indicator in payload['kpis']
+            }
+        return payload
+
+    def compare(self, query):
+        """Dernière année des huiles comparées (tableau de l'analyse comparative)"""
+        oil_names = list(dict.fromkeys(_list_param(query, 'oils')))
+        if not oil_names:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Paramètre oils requis (ex. ?oils=Lavande,Tea Tree)")
+        if len(oil_names) > MAX_COMPARED_OILS:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"Au plus {MAX_COMPARED_OILS} huiles par comparaison")
+        for oil_name in oil_names:
+            self._oil(oil_name)
+        return {'huiles': frame_records(comparison_frame(self.dashboard, oil_names))}
+
+    def market(self, query):
+        """Vue d'ensemble du marché: classement par valeur et répartition par type"""
+        top = _int_param(query, 'top', 10, 1, MAX_TOP)
+        market = self.dashboard.market_aggregates()
+        return {
+            'huiles': len(market),
+            'top': frame_records(market.top(top)),
+            'types': {name: int(count) for name, count in market.type_counts().items()},
+            'valeur_par_type': dict(zip(market.type_totals().index.astype(str),
+                                        json_floats(market.type_totals().to_numpy()))),
+        }
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    """Requêtes GET/HEAD servies par un DashboardApi (attribut `api` du serveur)"""
+
+    protocol_version = 'HTTP/1.1'
+    # En-têtes et corps partent en un seul envoi (sans attente de Nagle sur les connexions persistantes)
+    wbufsize = 64 * 1024
+    disable_nagle_algorithm = True
+    server_version = 'HuilesEssentiellesAPI/1.0'
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def _respond(self, send_body):
+        url = urlsplit(self.path)
+        etag = None
+        try:
+            etag, body = self.server.api.get(url.path, parse_qs(url.query))
+            status = HTTPStatus.OK
+        except ApiError as error:
+            status, body = error.status, error.body()
+        except Exception as error:  # la connexion reste utilisable
+            self.log_error("Erreur interne sur %s: %r", self.path, error)
+            status, body = HTTPStatus.INTERNAL_SERVER_ERROR, ApiError(HTTPStatus.INTERNAL_SERVER_ERROR, "Erreur interne").body()
+
+        if etag is not None and etag_matches(self.headers.get('If-None-Match'), etag):
+            status, body = HTTPStatus.NOT_MODIFIED, b''
+        self.send_response(status)
+        if etag is not None:
+            self.send_header('ETag', etag)
+            # Réponse réutilisable par les clients, à condition de la revalider
+            self.send_header('Cache-Control', 'no-cache')
+        if status != HTTPStatus.NOT_MODIFIED:
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if send_body and body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+class ApiServer(ThreadingHTTPServer):
+    # File d'attente assez longue pour des clients qui ouvrent leurs connexions d'un coup
+    request_queue_size = 128
+    daemon_threads = True
+
+def make_server(host='127.0.0.1', port=DEFAULT_PORT, dashboard=None, verbose=False):
+    """Serveur multi-thread prêt à servir (serve_forever); le dashboard est partagé par toutes les requêtes"""
+    if dashboard is None:
+        dashboard = CompleteEssentialOilDashboard(data_source=os.environ.get('DASHBOARD_DATA_SOURCE'),
+                                                  memory_budget=budget_from_env())
+    server = ApiServer((host, port), ApiRequestHandler)
+    server.api = DashboardApi(dashboard)
+    server.verbose = verbose
+    return server
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="API JSON des KPI et séries des huiles essentielles")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--verbose', action='store_true', help="Journalise chaque requête")
+    args = parser.parse_args(argv)
+
+    server = make_server(args.host, args.port, verbose=args.verbose)
+    print(f"API à l'écoute sur http://{args.host}:{server.server_port}/api")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
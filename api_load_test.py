@@ -0,0 +1,186 @@
+"""Test de charge de l'API JSON: débit (requêtes/s) et latences p50/p95/p99
+
+    python api_load_test.py                                  # démarre api.py sur un port libre
+    python api_load_test.py --clients 32 --duration 20 --revalidate 0.5 --json api_charge.json
+    python api_load_test.py --url http://127.0.0.1:8000      # serveur déjà lancé
+
+Chaque client garde une connexion persistante et enchaîne des requêtes tirées d'un
+mélange (séries, KPI, comparaisons, vue marché). Avec --revalidate, une part des
+requêtes renvoie l'ETag déjà reçu (If-None-Match) et doit obtenir 304. Le serveur
+tourne dans un autre processus que les clients, pour ne pas partager leur GIL.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from urllib.parse import quote, urlsplit
+
+from load_test import percentile
+
+API_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'api.py')
+# Statuts attendus du mélange de requêtes (304: revalidation par ETag)
+EXPECTED_STATUSES = {200, 304}
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def start_server(port, timeout=120):
+    """Lance api.py dans un sous-processus et attend qu'il réponde"""
+    process = subprocess.Popen([sys.executable, API_PATH, '--port', str(port)], stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"api.py s'est arrêté (code {process.returncode})")
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            connection.request('GET', '/api/health')
+            if connection.getresponse().status == 200:
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("api.py ne répond pas")
+
+def request_mix(oil_names, rng, compared=3):
+    """Une requête tirée du mélange: chemins par huile surtout, comparaisons et marché plus rarement"""
+    oil = quote(rng.choice(oil_names))
+    roll = rng.random()
+    if roll < 0.35:
+        return f'/api/oils/{oil}/kpis'
+    if roll < 0.65:
+        return f'/api/oils/{oil}/series?indicators=Production_Mondiale,Prix_Moyen,Valeur_Marche'
+    if roll < 0.75:
+        return f'/api/oils/{oil}/series?granularity=M&start_year=2020'
+    if roll < 0.9:
+        oils = ','.join(quote(name) for name in rng.sample(oil_names, min(compared, len(oil_names))))
+        return f'/api/compare?oils={oils}'
+    return '/api/market?top=10'
+
+class Client(threading.Thread):
+    """Connexion persistante qui envoie des requêtes jusqu'à l'échéance"""
+
+    def __init__(self, host, port, oil_names, deadline, revalidate, seed):
+        super().__init__(daemon=True)
+        self.host, self.port = host, port
+        self.oil_names = oil_names
+        self.deadline = deadline
+        self.revalidate = revalidate
+        self.rng = random.Random(seed)
+        self.etags = {}
+        self.latencies = []
+        self.statuses = Counter()
+        self.bytes = 0
+        self.errors = Counter()
+
+    def run(self):
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        while time.monotonic() < self.deadline:
+            path = request_mix(self.oil_names, self.rng)
+            headers = {}
+            if path in self.etags and self.rng.random() < self.revalidate:
+                headers['If-None-Match'] = self.etags[path]
+            started = time.perf_counter()
+            try:
+                connection.request('GET', path, headers=headers)
+                response = connection.getresponse()
+                body = response.read()
+            except (OSError, http.client.HTTPException) as error:
+                self.errors[type(error).__name__] += 1
+                connection.close()
+                connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+                continue
+            self.latencies.append(time.perf_counter() - started)
+            self.statuses[response.status] += 1
+            self.bytes += len(body)
+            if response.getheader('ETag'):
+                self.etags[path] = response.getheader('ETag')
+        connection.close()
+
+def run_load(url, clients=16, duration=10.0, revalidate=0.0, seed=0):
+    """Charge de `clients` connexions pendant `duration` secondes; retourne le rapport"""
+    parts = urlsplit(url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+    connection.request('GET', '/api/oils')
+    oil_names = [entry['huile'] for entry in json.loads(connection.getresponse().read())['huiles']]
+    connection.close()
+
+    deadline = time.monotonic() + duration
+    workers = [Client(parts.hostname, parts.port, oil_names, deadline, revalidate, seed + i)
+               for i in range(clients)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency for worker in workers for latency in worker.latencies]
+    statuses = sum((worker.statuses for worker in workers), Counter())
+    errors = sum((worker.errors for worker in workers), Counter())
+    return {
+        'clients': clients,
+        'duration_s': elapsed,
+        'requests': len(latencies),
+        'requests_per_s': len(latencies) / elapsed,
+        'latency_p50_ms': percentile(latencies, 50) * 1000 if latencies else None,
+        'latency_p95_ms': percentile(latencies, 95) * 1000 if latencies else None,
+        'latency_p99_ms': percentile(latencies, 99) * 1000 if latencies else None,
+        'latency_max_ms': max(latencies) * 1000 if latencies else None,
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'not_modified_ratio': statuses[304] / max(len(latencies), 1),
+        'megabytes': sum(worker.bytes for worker in workers) / 1e6,
+        'errors': dict(errors),
+        'unexpected_statuses': {str(status): count for status, count in sorted(statuses.items())
+                                if status not in EXPECTED_STATUSES},
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Test de charge de l'API JSON des huiles essentielles")
+    parser.add_argument('--url', help="API déjà lancée (par défaut, api.py est démarré sur un port libre)")
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 8, 32],
+                        help="Connexions simultanées (un palier par valeur)")
+    parser.add_argument('--duration', type=float, default=10.0, help="Durée de chaque palier (s)")
+    parser.add_argument('--revalidate', type=float, default=0.0,
+                        help="Part des requêtes renvoyant l'ETag reçu (If-None-Match)")
+    parser.add_argument('--json', help="Fichier de sortie JSON")
+    args = parser.parse_args(argv)
+
+    server = None
+    url = args.url
+    if url is None:
+        port = free_port()
+        server = start_server(port)
+        url = f'http://127.0.0.1:{port}'
+    try:
+        reports = []
+        for clients in args.clients:
+            report = run_load(url, clients, args.duration, args.revalidate)
+            reports.append(report)
+            print(f"{clients:>4} clients: {report['requests_per_s']:8.0f} req/s  "
+                  f"p50 {report['latency_p50_ms']:.2f} ms  p95 {report['latency_p95_ms']:.2f} ms  "
+                  f"p99 {report['latency_p99_ms']:.2f} ms  statuts {report['statuses']}"
+                  + (f"  erreurs {report['errors']}" if report['errors'] else "")
+                  + (f"  statuts inattendus {report['unexpected_statuses']}"
+                     if report['unexpected_statuses'] else ""))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    if args.json:
+        with open(args.json, 'w') as handle:
+            json.dump(reports, handle, indent=2, ensure_ascii=False)
+    failed = any(report['errors'] or report['unexpected_statuses'] for report in reports)
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""Bancs d'essai reproductibles: génération, agrégation et construction des figures à grande échelle
+
+    python benchmarks.py --output bench.json                  # balayage complet
+    python benchmarks.py --quick --compare bench.json        # petits cas, comparés à un run précédent
+
+Chaque étape mesure le temps écoulé, le pic mémoire (tracemalloc, qui suit aussi
+les allocations NumPy) et, pour les figures, la taille du JSON envoyé au navigateur.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from catalog import synthetic_catalog
+from dashboard_core import CompleteEssentialOilDashboard, comparison_frame
+from data_sources import DEFAULT_SEED, INDICATOR_COLUMNS, period_axis
+from market import SCATTER_OILS, MarketAggregates
+
+# Balayage par défaut: (nom, huiles, années se terminant en 2025, granularité)
+CASES = [
+    ('20_huiles_26_ans', 20, 26, 'Y'),
+    ('1k_huiles_26_ans', 1000, 26, 'Y'),
+    ('20_huiles_26_ans_quotidien', 20, 26, 'D'),
+    ('10k_huiles_100_ans', 10000, 100, 'Y'),
+    ('50k_huiles_100_ans_mensuel', 50000, 100, 'M'),
+]
+QUICK_CASES = CASES[:3]
+
+GENERATION_BLOCK = 1000
+
+def measure(step):
+    """Exécute `step()` et retourne (résultat, secondes, pic mémoire en Mo)"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        result = step()
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, elapsed, peak / 1e6
+
+def payload_bytes(figures):
+    """Taille totale des spécifications JSON des figures"""
+    return sum(len(fig.to_json()) for fig in figures.values())
+
+def run_case(name, n_oils, n_years, granularity='Y', seed=DEFAULT_SEED):
+    """Toutes les étapes d'un cas; retourne une liste de résultats"""
+    from figures import build_comparative_figures, build_market_figures, build_oil_figures
+
+    end_year = 2025
+    start_year = end_year - n_years + 1
+    n_periods = len(period_axis(start_year, end_year, granularity))
+    catalog = synthetic_catalog(n_oils, seed=seed) if n_oils != 20 else None
+    dashboard = CompleteEssentialOilDashboard(seed=seed, catalog=catalog, cache_size=max(256, n_oils))
+    oils = dashboard.catalog.names
+    results = []
+
+    def record(step, elapsed=None, peak=None, payload=None, skipped=None):
+        results.append({
+            'case': name, 'oils': n_oils, 'periods': n_periods, 'granularity': granularity, 'step': step,
+            'seconds': elapsed, 'peak_mb': peak, 'payload_bytes': payload, 'skipped': skipped
+        })
+
+    # Génération par blocs d'huiles (mémoire bornée), en ne gardant que la dernière période
+    def generate_blocked():
+        latest = []
+        for i in range(0, n_oils, GENERATION_BLOCK):
+            data, _ = dashboard.generator.load_batch(oils[i:i + GENERATION_BLOCK], start_year, end_year,
+                                                     granularity)
+            latest.append(data[:, -1, :])
+        return np.concatenate(latest)
+    _, elapsed, peak = measure(generate_blocked)
+    record('generation_par_blocs', elapsed, peak)
+
+    # generate_comprehensive_data sur une huile (chemin de la vue principale)
+    df, elapsed, peak = measure(lambda: dashboard.generate_comprehensive_data(
+        oils[0], start_year, end_year, granularity=granularity))
+    record('generate_comprehensive_data', elapsed, peak)
+
+    # Figures d'une huile
+    config = dashboard.catalog.record(oils[0])
+    figures, elapsed, peak = measure(lambda: build_oil_figures(df, oils[0], config))
+    record('figures_huile', elapsed, peak, payload_bytes(figures))
+
+    # Comparatif sur 4 huiles, sur la plage et la granularité du cas
+    selected = oils[:4]
+    figures, elapsed, peak = measure(lambda: build_comparative_figures(
+        comparison_frame(dashboard, selected, start_year, end_year, granularity)))
+    record('comparatif', elapsed, peak, payload_bytes(figures))
+
+    # La vue marché ne porte que sur la dernière année: pas de variante infra-annuelle
+    if granularity != 'Y':
+        reason = "vue marché annuelle uniquement"
+        for step in ('vue_marche_agregats', 'vue_marche_figures', 'vue_marche_mise_a_jour'):
+            record(step, skipped=reason)
+        return results
+
+    # Vue marché: table matérialisée de toutes les huiles (dernière année), puis figures en O(k)
+    market, elapsed, peak = measure(lambda: MarketAggregates.build(
+        dashboard.source, dashboard.catalog, oils, start_year, end_year))
+    record('vue_marche_agregats', elapsed, peak)
+    figures, elapsed, peak = measure(lambda: build_market_figures(
+        market.top(10), market.type_counts(), market.top(SCATTER_OILS), len(market)))
+    record('vue_marche_figures', elapsed, peak, payload_bytes(figures))
+
+    # Mise à jour d'une huile dans la table (réinsertion dans le classement)
+    _, elapsed, peak = measure(lambda: market.update(
+        [oils[-1]], np.full((1, len(INDICATOR_COLUMNS)), 1e6)))
+    record('vue_marche_mise_a_jour', elapsed, peak)
+
+    return results
+
+def environment():
+    """Métadonnées permettant de comparer des runs entre versions"""
+    import pandas as pd
+    import plotly
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'plotly': plotly.__version__,
+    }
+
+def compare(results, previous):
+    """Affiche le ratio temps actuel / temps précédent pour chaque étape commune"""
+    before = {(r['case'], r['step']): r for r in previous['results'] if r['seconds'] is not None}
+    print(f"\nComparaison avec {previous['environment'].get('commit') or 'run précédent'}:")
+    for result in results:
+        old = before.get((result['case'], result['step']))
+        if old is None or result['seconds'] is None:
+            continue
+        ratio = result['seconds'] / old['seconds'] if old['seconds'] else float('inf')
+        flag = '🔴' if ratio > 1.1 else '🟢' if ratio < 0.9 else '⚪'
+        print(f"{flag} {result['case']:<28} {result['step']:<28} ×{ratio:.2f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bancs d'essai du dashboard")
+    parser.add_argument('--quick', action='store_true', help="Seulement les petits cas")
+    parser.add_argument('--case', action='append', help="Nom de cas à exécuter (répétable)")
+    parser.add_argument('--output', help="Fichier JSON de résultats")
+    parser.add_argument('--compare', help="Fichier JSON d'un run précédent")
+    args = parser.parse_args(argv)
+
+    cases = QUICK_CASES if args.quick else CASES
+    if args.case:
+        cases = [case for case in CASES if case[0] in args.case]
+
+    results = []
+    for name, n_oils, n_years, granularity in cases:
+        for result in run_case(name, n_oils, n_years, granularity):
+            results.append(result)
+            if result['skipped']:
+                print(f"{name:<28} {result['step']:<28} sauté ({result['skipped']})")
+            else:
+                payload = f" {result['payload_bytes'] / 1e3:9.1f} Ko" if result['payload_bytes'] else ''
+                print(f"{name:<28} {result['step']:<28} {result['seconds']:8.3f} s "
+                      f"{result['peak_mb']:9.1f} Mo{payload}")
+
+    report = {'environment': environment(), 'results': results}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as handle:
+            compare(results, json.load(handle))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
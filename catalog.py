@@ -0,0 +1,330 @@
+"""Catalogue des huiles essentielles: structure en colonnes construite une seule fois par processus"""
+import sys
+from collections.abc import Mapping
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Configuration complète pour toutes les huiles essentielles
+OILS_CONFIG = {
+    "Lavande": {
+        "production_base": 150, "price_base": 45, "type": "relaxante",
+        "proprietes": ["calmante", "cicatrisante", "antiseptique", "analgésique"],
+        "regions": ["France", "Bulgarie", "Chine"], "rendement": 0.015,
+        "molecules_principales": ["Linalol", "Acétate de linalyle", "Cinéole"],
+        "contre_indications": ["Femmes enceintes", "Enfants < 6 ans"],
+        "prix_evolution": "++", "demande_evolution": "+++",
+        "couleur": "#6A0572"
+    },
+    "Menthe Poivrée": {
+        "production_base": 80, "price_base": 60, "type": "tonique",
+        "proprietes": ["digestive", "rafraichissante", "antalgique", "decongestionnante"],
+        "regions": ["USA", "France", "Inde"], "rendement": 0.012,
+        "molecules_principales": ["Menthol", "Menthone", "Acétate de menthyle"],
+        "contre_indications": ["Épilepsie", "Problèmes biliaires"],
+        "prix_evolution": "++", "demande_evolution": "++",
+        "couleur": "#228B22"
+    },
+    "Arbre à Thé": {
+        "production_base": 120, "price_base": 35, "type": "antiseptique",
+        "proprietes": ["antibacterienne", "antifongique", "antivirale", "immunostimulante"],
+        "regions": ["Australie", "Chine", "Afrique du Sud"], "rendement": 0.020,
+        "molecules_principales": ["Terpinène-4-ol", "γ-Terpinène", "α-Terpinène"],
+        "contre_indications": ["Peau sensible"],
+        "prix_evolution": "+", "demande_evolution": "+++",
+        "couleur": "#2A9D8F"
+    },
+    "Eucalyptus": {
+        "production_base": 200, "price_base": 25, "type": "respiratoire",
+        "proprietes": ["expectorante", "decongestionnante", "antiseptique", "febrifuge"],
+        "regions": ["Australie", "Chine", "Portugal"], "rendement": 0.018,
+        "molecules_principales": ["Eucalyptol", "α-Pinène", "Limonène"],
+        "contre_indications": ["Asthme sévère"],
+        "prix_evolution": "+", "demande_evolution": "++",
+        "couleur": "#45B7D1"
+    },
+    "Ravintsara": {
+        "production_base": 40, "price_base": 55, "type": "immunitaire",
+        "proprietes": ["antivirale", "immunostimulante", "expectorante", "neurotonique"],
+        "regions": ["Madagascar", "Comores"], "rendement": 0.008,
+        "molecules_principales": ["Cinéole", "Sabinène", "α-Terpinéol"],
+        "contre_indications": ["Aucune connue"],
+        "prix_evolution": "+++", "demande_evolution": "+++",
+        "couleur": "#4ECDC4"
+    },
+    "Palmarosa": {
+        "production_base": 25, "price_base": 70, "type": "cosmetique",
+        "proprietes": ["regenerante", "hydratante", "antibacterienne", "equilibrante"],
+        "regions": ["Inde", "Nepal", "Indonesie"], "rendement": 0.006,
+        "molecules_principales": ["Géraniol", "Linalol", "Acétate de géranyle"],
+        "contre_indications": ["Aucune connue"],
+        "prix_evolution": "++", "demande_evolution": "++",
+        "couleur": "#FFD700"
+    },
+    "Ylang-Ylang": {
+        "production_base": 30, "price_base": 85, "type": "aphrodisiaque",
+        "proprietes": ["aphrodisiaque", "sedative", "hypotensive", "regulatrice"],
+        "regions": ["Madagascar", "Comores", "Mayotte"], "rendement": 0.005,
+        "molecules_principales": ["Linalol", "Géraniol", "Para-crésyl méthyl éther"],
+        "contre_indications": ["Hypotension"],
+        "prix_evolution": "+++", "demande_evolution": "++",
+        "couleur": "#8A2BE2"
+    },
+    "Girofle": {
+        "production_base": 60, "price_base": 40, "type": "antiseptique",
+        "proprietes": ["antiseptique", "antalgique", "antiparasitaire", "stimulante"],
+        "regions": ["Madagascar", "Indonesie", "Sri Lanka"], "rendement": 0.015,
+        "molecules_principales": ["Eugénol", "Acétate d'eugényle", "Caryophyllène"],
+        "contre_indications": ["Ulcères gastriques"],
+        "prix_evolution": "+", "demande_evolution": "++",
+        "couleur": "#8B4513"
+    },
+    "Citron": {
+        "production_base": 180, "price_base": 20, "type": "detoxifiante",
+        "proprietes": ["antibacterienne", "detoxifiante", "tonique", "digestive"],
+        "regions": ["Italie", "Espagne", "USA", "Argentine"], "rendement": 0.003,
+        "molecules_principales": ["Limonène", "β-Pinène", "γ-Terpinène"],
+        "contre_indications": ["Photosensibilisante"],
+        "prix_evolution": "+", "demande_evolution": "+++",
+        "couleur": "#FFD700"
+    },
+    "Romarin": {
+        "production_base": 90, "price_base": 38, "type": "tonique",
+        "proprietes": ["tonique", "hepatique", "neurotonique", "antioxydante"],
+        "regions": ["France", "Espagne", "Maroc", "Tunisie"], "rendement": 0.010,
+        "molecules_principales": ["Cinéole", "Camphre", "α-Pinène"],
+        "contre_indications": ["Hypertension", "Épilepsie"],
+        "prix_evolution": "++", "demande_evolution": "++",
+        "couleur": "#228B22"
+    },
+    "Tea Tree": {
+        "production_base": 110, "price_base": 32, "type": "antiseptique",
+        "proprietes": ["antibacterienne", "antifongique", "antivirale", "immunostimulante"],
+        "regions": ["Australie", "Chine"], "rendement": 0.019,
+        "molecules_principales": ["Terpinène-4-ol", "γ-Terpinène", "α-Terpinène"],
+        "contre_indications": ["Peau sensible"],
+        "prix_evolution": "+", "demande_evolution": "+++",
+        "couleur": "#2A9D8F"
+    },
+    "Géranium": {
+        "production_base": 45, "price_base": 75, "type": "equilibrante",
+        "proprietes": ["equilibrante", "hemostatique", "cicatrisante", "antiseptique"],
+        "regions": ["Egypte", "Maroc", "Réunion"], "rendement": 0.007,
+        "molecules_principales": ["Citronellol", "Géraniol", "Linalol"],
+        "contre_indications": ["Aucune connue"],
+        "prix_evolution": "++", "demande_evolution": "++",
+        "couleur": "#FF6B6B"
+    },
+    "Camomille": {
+        "production_base": 35, "price_base": 95, "type": "calmante",
+        "proprietes": ["calmante", "anti-inflammatoire", "antispasmodique", "analgésique"],
+        "regions": ["France", "Egypte", "Allemagne"], "rendement": 0.004,
+        "molecules_principales": ["Chamazulène", "Bisabolol", "Farnésène"],
+        "contre_indications": ["Allergie aux Astéracées"],
+        "prix_evolution": "+++", "demande_evolution": "++",
+        "couleur": "#FFD700"
+    },
+    "Sauge": {
+        "production_base": 28, "price_base": 88, "type": "hormonale",
+        "proprietes": ["equilibrante hormonale", "antiseptique", "digestive", "neurotonique"],
+        "regions": ["France", "Espagne", "Croatie"], "rendement": 0.005,
+        "molecules_principales": ["Thuyone", "Cinéole", "Camphre"],
+        "contre_indications": ["Femmes enceintes", "Épilepsie"],
+        "prix_evolution": "+++", "demande_evolution": "+",
+        "couleur": "#6A0572"
+    },
+    "Niaouli": {
+        "production_base": 55, "price_base": 42, "type": "immunitaire",
+        "proprietes": ["immunostimulante", "antivirale", "expectorante", "decongestionnante"],
+        "regions": ["Madagascar", "Nouvelle-Calédonie"], "rendement": 0.014,
+        "molecules_principales": ["Cinéole", "α-Pinène", "Limonène"],
+        "contre_indications": ["Aucune connue"],
+        "prix_evolution": "++", "demande_evolution": "++",
+        "couleur": "#45B7D1"
+    },
+    "Basilic": {
+        "production_base": 65, "price_base": 48, "type": "digestive",
+        "proprietes": ["digestive", "antispasmodique", "neurotonique", "antibacterienne"],
+        "regions": ["France", "Egypte", "Comores"], "rendement": 0.009,
+        "molecules_principales": ["Estragole", "Linalol", "Eugénol"],
+        "contre_indications": ["Femmes enceintes"],
+        "prix_evolution": "++", "demande_evolution": "++",
+        "couleur": "#228B22"
+    },
+    "Cèdre": {
+        "production_base": 40, "price_base": 65, "type": "grounding",
+        "proprietes": ["grounding", "lymphotonique", "antiseptique", "repulsif"],
+        "regions": ["Maroc", "USA", "Himalaya"], "rendement": 0.008,
+        "molecules_principales": ["Cédrol", "α-Cédrène", "Thujopsène"],
+        "contre_indications": ["Femmes enceintes"],
+        "prix_evolution": "++", "demande_evolution": "+",
+        "couleur": "#8B4513"
+    },
+    "Encens": {
+        "production_base": 22, "price_base": 120, "type": "spirituelle",
+        "proprietes": ["meditative", "anti-inflammatoire", "cicatrisante", "immunostimulante"],
+        "regions": ["Oman", "Somalie", "Ethiopie"], "rendement": 0.003,
+        "molecules_principales": ["α-Pinène", "Limonène", "Incensole"],
+        "contre_indications": ["Aucune connue"],
+        "prix_evolution": "+++", "demande_evolution": "++",
+        "couleur": "#F9A602"
+    },
+    "Myrrhe": {
+        "production_base": 18, "price_base": 110, "type": "spirituelle",
+        "proprietes": ["anti-inflammatoire", "cicatrisante", "antiseptique", "expectorante"],
+        "regions": ["Somalie", "Ethiopie", "Yémen"], "rendement": 0.002,
+        "molecules_principales": ["Furanoeudesma-1,3-diène", "Curzerène", "Lindestrene"],
+        "contre_indications": ["Femmes enceintes"],
+        "prix_evolution": "+++", "demande_evolution": "+",
+        "couleur": "#8B4513"
+    },
+    "Vetiver": {
+        "production_base": 32, "price_base": 78, "type": "grounding",
+        "proprietes": ["grounding", "tonique nerveux", "repulsif", "cicatrisante"],
+        "regions": ["Haïti", "Réunion", "Indonésie"], "rendement": 0.006,
+        "molecules_principales": ["Vetivone", "β-Vetivène", "Khusimol"],
+        "contre_indications": ["Aucune connue"],
+        "prix_evolution": "++", "demande_evolution": "++",
+        "couleur": "#8B4513"
+    }
+}
+
+# Champs du catalogue selon leur représentation en colonnes
+NUMERIC_FIELDS = ('production_base', 'price_base', 'rendement')
+CATEGORICAL_FIELDS = ('type', 'couleur', 'prix_evolution', 'demande_evolution')
+LIST_FIELDS = ('proprietes', 'regions', 'molecules_principales', 'contre_indications')
+
+class OilCatalog(Mapping):
+    """Catalogue en struct-of-arrays
+
+    - champs numériques: un vecteur float64 par champ
+    - champs catégoriels: codes int32 + liste de modalités internées
+    - champs listes: format CSR (offsets + codes) sur un vocabulaire interné
+
+    Se comporte comme un dictionnaire {huile: fiche} pour l'affichage, mais les
+    vues agrégées utilisent les accès vectorisés (`numeric`, `labels`).
+    """
+
+    def __init__(self, names, numeric, categories, lists):
+        self.names = list(names)
+        self._index = {name: i for i, name in enumerate(self.names)}
+        self._numeric = numeric
+        self._categories = categories
+        self._lists = lists
+
+    @classmethod
+    def from_records(cls, records):
+        """Construit le catalogue à partir d'un dictionnaire {huile: fiche}"""
+        names = [sys.intern(name) for name in records]
+        fiches = list(records.values())
+        numeric = {
+            field: np.fromiter((fiche[field] for fiche in fiches), dtype=np.float64, count=len(fiches))
+            for field in NUMERIC_FIELDS
+        }
+        categories = {}
+        for field in CATEGORICAL_FIELDS:
+            codes, levels = pd.factorize(pd.Series([fiche.get(field, '') for fiche in fiches], dtype=object))
+            categories[field] = (codes.astype(np.int32), [sys.intern(str(level)) for level in levels])
+        lists = {}
+        for field in LIST_FIELDS:
+            vocabulary = {}
+            offsets = np.zeros(len(fiches) + 1, dtype=np.int64)
+            codes = []
+            for i, fiche in enumerate(fiches):
+                for term in fiche.get(field, []):
+                    codes.append(vocabulary.setdefault(sys.intern(term), len(vocabulary)))
+                offsets[i + 1] = len(codes)
+            lists[field] = (offsets, np.asarray(codes, dtype=np.int32), list(vocabulary))
+        return cls(names, numeric, categories, lists)
+
+    # Interface Mapping: fiche reconstruite à la demande
+    def __getitem__(self, name):
+        return self.record(name)
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def position(self, name):
+        """Indice de l'huile (O(1))"""
+        return self._index[name]
+
+    def positions(self, names=None):
+        """Indices d'une liste d'huiles (toutes par défaut)"""
+        if names is None:
+            return np.arange(len(self.names))
+        return np.fromiter((self._index[name] for name in names), dtype=np.int64)
+
+    def numeric(self, field, names=None):
+        """Vecteur d'un champ numérique (production_base, price_base, rendement)"""
+        values = self._numeric[field]
+        return values if names is None else values[self.positions(names)]
+
+    def codes(self, field, names=None):
+        """Codes entiers d'un champ catégoriel"""
+        codes, _ = self._categories[field]
+        return codes if names is None else codes[self.positions(names)]
+
+    def levels(self, field):
+        """Modalités d'un champ catégoriel"""
+        return self._categories[field][1]
+
+    def labels(self, field, names=None):
+        """Valeurs textuelles d'un champ catégoriel"""
+        levels = np.asarray(self.levels(field), dtype=object)
+        return levels[self.codes(field, names)]
+
+    def categorical(self, field, names=None):
+        """Champ catégoriel sous forme de pd.Categorical (sans recopier les chaînes)"""
+        return pd.Categorical.from_codes(self.codes(field, names), categories=self.levels(field))
+
+    def terms(self, field, name):
+        """Liste d'une huile (propriétés, régions, molécules, contre-indications)"""
+        offsets, codes, vocabulary = self._lists[field]
+        i = self._index[name]
+        return [vocabulary[code] for code in codes[offsets[i]:offsets[i + 1]]]
+
+    def list_field(self, field):
+        """Représentation CSR brute d'un champ liste: (offsets, codes, vocabulaire)"""
+        return self._lists[field]
+
+    def color_map(self, names=None):
+        """Couleur de chaque huile, pour les color_discrete_map de Plotly"""
+        names = self.names if names is None else list(names)
+        return dict(zip(names, self.labels('couleur', names)))
+
+    def record(self, name):
+        """Fiche d'une huile au format du dictionnaire de configuration"""
+        i = self._index[name]
+        fiche = {field: float(self._numeric[field][i]) for field in NUMERIC_FIELDS}
+        for field in CATEGORICAL_FIELDS:
+            codes, levels = self._categories[field]
+            fiche[field] = levels[codes[i]]
+        for field in LIST_FIELDS:
+            fiche[field] = self.terms(field, name)
+        return fiche
+
+@lru_cache(maxsize=None)
+def get_catalog():
+    """Catalogue par défaut, construit une seule fois par processus"""
+    return OilCatalog.from_records(OILS_CONFIG)
+
+def synthetic_catalog(n_oils, seed=0):
+    """Catalogue fictif de `n_oils` chémotypes dérivés des huiles de référence (bancs d'essai, tests de charge)"""
+    rng = np.random.default_rng(seed)
+    references = list(OILS_CONFIG.items())
+    jitter = rng.uniform(0.5, 1.5, size=(n_oils, len(NUMERIC_FIELDS)))
+    records = {}
+    for i in range(n_oils):
+        name, fiche = references[i % len(references)]
+        record = dict(fiche)
+        for k, field in enumerate(NUMERIC_FIELDS):
+            record[field] = fiche[field] * jitter[i, k]
+        records[f"{name} #{i}"] = record
+    return OilCatalog.from_records(records)
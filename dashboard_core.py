@@ -0,0 +1,239 @@
+"""Cœur du dashboard: catalogue, index, sources de données et tableaux dérivés, sans dépendance à Streamlit"""
+import threading
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from catalog import get_catalog
+from figure_cache import FigureCache
+from forecasting import ForecastCache
+from incremental import IncrementalStore
+from market import MarketAggregates
+from memory_budget import MemoryBudget
+from data_sources import (
+    DEFAULT_SEED, INDICATOR_INDEX, MEASURE_DTYPE, DatasetCache, SyntheticSource,
+    cube_to_frame, cube_to_panel, oil_categorical, open_data_source
+)
+from instrumentation import timed
+from oil_index import OilIndex
+from regions import RegionalSupply
+from similarity import SimilarityEngine
+
+class CompleteEssentialOilDashboard:
+    def __init__(self, seed=DEFAULT_SEED, cache_size=256, data_source=None, catalog=None,
+                 memory_budget=None, snapshot=None):
+        # Catalogue partagé par tout le processus (struct-of-arrays, se lit comme un dict);
+        # avec un instantané (snapshot.Snapshot), il est lu dans le fichier mappé
+        if snapshot is not None:
+            catalog = snapshot.catalog
+        self.catalog = catalog if catalog is not None else get_catalog()
+        self.oils_config = self.catalog
+        self.index = OilIndex(self.catalog)
+        self.colors = ['#8B4513', '#228B22', '#FFD700', '#8A2BE2', '#FF6B6B', 
+                      '#4ECDC4', '#45B7D1', '#F9A602', '#6A0572', '#2A9D8F']
+        # Le générateur reste disponible même quand les données viennent de fichiers
+        self.generator = SyntheticSource(self.catalog, seed=seed)
+        self.source = open_data_source(data_source, self.catalog, seed=seed)
+        if snapshot is not None:
+            from snapshot import SnapshotSource
+            self.source = SnapshotSource(snapshot, fallback=self.source)
+        # Limite mémoire commune aux séries et aux figures (octets, None = pas de limite globale)
+        self.memory_budget = MemoryBudget(memory_budget) if memory_budget else None
+        self.cache = DatasetCache(self.source, max_entries=cache_size, budget=self.memory_budget)
+        self.figures = FigureCache(budget=self.memory_budget)
+        # Prévisions annuelles jusqu'en 2035, par version du jeu de données
+        self.forecasts = ForecastCache(self.cache)
+        # Structures dérivées du jeu complet (marché, similarité, régions): nom -> (version, objet),
+        # reconstruites quand la version des données change
+        self._derived = {}
+        self._derived_locks = {name: threading.Lock() for name in ('market', 'similarity', 'regions')}
+        if snapshot is not None:
+            # Table du marché et prévisions précalculées: rien à calculer avant le premier affichage
+            self._derived['market'] = (self.cache.version,
+                                       MarketAggregates(self.catalog, snapshot.oil_names, snapshot.latest()))
+            self.forecasts.use_precomputed(snapshot.forecast_batch, self.cache.version)
+
+    def generate_batch_data(self, oil_names=None, start_year=2000, end_year=2025, rng=None, granularity='Y'):
+        """Génère en un seul bloc vectorisé le cube (huiles × périodes × indicateurs)"""
+        if oil_names is None:
+            oil_names = self.catalog.names
+        return self.generator.generate(oil_names, start_year, end_year, rng=rng, granularity=granularity)
+
+    def generate_panel_data(self, oil_names=None, start_year=2000, end_year=2025, rng=None, granularity='Y'):
+        """Génère un DataFrame long (une ligne par huile et par période)"""
+        if oil_names is None:
+            oil_names = self.catalog.names
+        data, years = self.generate_batch_data(oil_names, start_year, end_year, rng=rng, granularity=granularity)
+        return cube_to_panel(data, oil_names, years)
+
+    def generate_comprehensive_data(self, oil_name, start_year=2000, end_year=2025, rng=None, granularity='Y'):
+        """Génère des données complètes pour le dashboard (granularité 'Y', 'M', 'W' ou 'D')"""
+        data, years = self.generate_batch_data([oil_name], start_year, end_year, rng=rng, granularity=granularity)
+        return cube_to_frame(data[0], years, granularity)
+
+    def _versioned(self, name, build):
+        version = self.cache.version
+        with self._derived_locks[name]:
+            built_for, value = self._derived.get(name, (None, None))
+            if value is None or built_for != version:
+                value = build(self.source, self.catalog, self.available_oils())
+                self._derived[name] = (version, value)
+            return value
+
+    def market_aggregates(self):
+        """Table matérialisée du marché pour la version courante des données"""
+        return self._versioned('market', MarketAggregates.build)
+
+    def similarity(self):
+        """Moteur de similarité pour la version courante des données"""
+        return self._versioned('similarity', SimilarityEngine.build)
+
+    def regional_supply(self):
+        """Répartition huile × région × année pour la version courante des données"""
+        return self._versioned('regions', RegionalSupply.build)
+
+    def available_oils(self):
+        """Huiles configurées et présentes dans la source de données"""
+        if self.source is self.generator or isinstance(self.source, SyntheticSource):
+            return list(self.catalog.names)
+        provided = set(self.source.oils())
+        return [oil for oil in self.catalog.names if oil in provided]
+
+class LiveSession:
+    """Ajouts de périodes d'une session (mode incrémental)
+
+    Les séries incrémentales et la table du marché qui en tient compte sont propres à
+    la session: le dashboard partagé par le processus n'est jamais modifié.
+    """
+
+    def __init__(self, dashboard):
+        self.dashboard = dashboard
+        self.store = IncrementalStore(dashboard.cache)
+        self.key = uuid.uuid4().hex
+        self._market = (None, None)
+
+    def market(self):
+        """(clé de cache des figures, table du marché) avec la dernière année des séries annuelles de la session"""
+        shared = self.dashboard.market_aggregates()
+        appended = {oil: values for oil, values in self.store.appended('Y').items() if oil in shared}
+        if not appended:
+            return shared.version, shared
+        state = (id(shared), shared.version, tuple((oil, version) for oil, (version, _) in appended.items()))
+        built_for, market = self._market
+        if built_for != state:
+            market = shared.copy()
+            market.update(list(appended), np.stack([latest for _, latest in appended.values()]))
+            self._market = (state, market)
+        return f"{self.key}/{hash(state)}", market
+
+# Indicateurs des KPI: variation relative (%) depuis la première période, ou écart en points
+KPI_INDICATORS = {
+    'Production_Mondiale': 'relative',
+    'Prix_Moyen': 'relative',
+    'Valeur_Marche': 'relative',
+    'Efficacite_Therapeutique': 'points',
+}
+
+def kpi_summary(aggregates):
+    """Valeur actuelle et variation des indicateurs des KPI, lues dans les agrégats courants d'une série"""
+    summary = {}
+    for indicator, kind in KPI_INDICATORS.items():
+        latest = float(aggregates.value('latest', indicator))
+        if kind == 'relative':
+            change = float(aggregates.growth(indicator) * 100)
+        else:
+            change = latest - float(aggregates.value('first', indicator))
+        summary[indicator] = {'valeur': latest, 'variation': change,
+                              'unite_variation': '%' if kind == 'relative' else 'pts'}
+    return summary
+
+@timed()
+def comparison_frame(dashboard, selected_oils, start_year=2000, end_year=2025, granularity='Y'):
+    """Dernière période des huiles comparées, calculée en un seul bloc"""
+    data, _ = dashboard.cache.get_batch(selected_oils, start_year, end_year, granularity)
+    latest = data[:, -1, :]
+    return pd.DataFrame({
+        'Huile': oil_categorical(selected_oils),
+        'Production': latest[:, INDICATOR_INDEX['Production_Mondiale']],
+        'Prix': latest[:, INDICATOR_INDEX['Prix_Moyen']],
+        'Efficacité': latest[:, INDICATOR_INDEX['Efficacite_Therapeutique']],
+        'Études': latest[:, INDICATOR_INDEX['Etudes_Scientifiques']],
+        'Durabilité': latest[:, INDICATOR_INDEX['Durabilite_Production']],
+        'Rendement': (dashboard.catalog.numeric('rendement', selected_oils) * 100).astype(MEASURE_DTYPE),
+        'Type': dashboard.catalog.categorical('type', selected_oils).remove_unused_categories(),
+        'Couleur': dashboard.catalog.categorical('couleur', selected_oils).remove_unused_categories()
+    })
+
+@timed()
+def market_frame(dashboard, oil_names=None):
+    """Statistiques globales du marché (dernière année de chaque huile)"""
+    if oil_names is None:
+        oil_names = dashboard.available_oils()
+    data, _ = dashboard.cache.get_batch(oil_names)
+    latest = data[:, -1, :]
+    return pd.DataFrame({
+        'Huile': oil_categorical(oil_names),
+        'Production (t)': latest[:, INDICATOR_INDEX['Production_Mondiale']],
+        'Prix (€/kg)': latest[:, INDICATOR_INDEX['Prix_Moyen']],
+        'Valeur Marché (M€)': latest[:, INDICATOR_INDEX['Valeur_Marche']],
+        'Type': dashboard.catalog.categorical('type', oil_names).remove_unused_categories(),
+        'Rendement (%)': (dashboard.catalog.numeric('rendement', oil_names) * 100).astype(MEASURE_DTYPE),
+        'Couleur': dashboard.catalog.categorical('couleur', oil_names).remove_unused_categories()
+    })
+
+@timed()
+def similar_oils_frame(dashboard, oil_name, k=5):
+    """Plus proches voisins d'une huile, avec leur type et les molécules partagées"""
+    neighbours = dashboard.similarity().neighbours(oil_name, k)
+    molecules = set(dashboard.catalog.terms('molecules_principales', oil_name))
+    names = neighbours['Huile'].tolist()
+    neighbours['Type'] = dashboard.catalog.categorical('type', names).remove_unused_categories()
+    neighbours['Molécules communes'] = [
+        ', '.join(m for m in dashboard.catalog.terms('molecules_principales', name) if m in molecules)
+        for name in names
+    ]
+    return neighbours
+
+def legacy_schema(df):
+    """Même tableau au schéma historique (float64, int64, chaînes objet), pour comparaison"""
+    legacy = {}
+    for column, values in df.items():
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            legacy[column] = values.astype(object)
+        elif pd.api.types.is_float_dtype(values):
+            legacy[column] = values.astype(np.float64)
+        elif pd.api.types.is_integer_dtype(values):
+            legacy[column] = values.astype(np.int64)
+        else:
+            legacy[column] = values
+    return pd.DataFrame(legacy)
+
+@timed()
+def memory_report(dashboard, oil_names=None, granularity='Y'):
+    """Empreinte du panel long (schéma compact contre historique) et occupation des caches partagés"""
+    if oil_names is None:
+        oil_names = dashboard.available_oils()
+    data, years = dashboard.cache.get_batch(oil_names, granularity=granularity)
+    panel = cube_to_panel(data, oil_names, years)
+    compact = panel.memory_usage(index=False, deep=True)
+    legacy = legacy_schema(panel).memory_usage(index=False, deep=True)
+    columns = pd.DataFrame({
+        'Colonne': compact.index,
+        'Type': [str(dtype) for dtype in panel.dtypes],
+        'Octets': compact.to_numpy(),
+        'Octets (historique)': legacy.to_numpy(),
+    })
+    return {
+        'lignes': len(panel),
+        'huiles': len(oil_names),
+        'octets': int(compact.sum()),
+        'octets_historique': int(legacy.sum()),
+        'ratio': float(compact.sum() / legacy.sum()),
+        'colonnes': columns,
+        'caches': {
+            'dataset_cache': dashboard.cache.stats(),
+            'figure_cache': dashboard.figures.stats(),
+            'memory_budget': dashboard.memory_budget.stats() if dashboard.memory_budget else None,
+        },
+    }
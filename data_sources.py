@@ -0,0 +1,574 @@
+"""Sources de données du dashboard: générateur synthétique et fichiers colonnaires (Parquet, Arrow IPC)"""
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import timed
+
+# Indicateurs générés: type de générateur, base (fonction des paramètres de l'huile) et tendance
+INDICATOR_SPECS = [
+    {'name': 'Production_Mondiale', 'kind': 'trend', 'trend': 0.08,
+     'base': lambda p: p['production_base']},
+    {'name': 'Prix_Moyen', 'kind': 'trend', 'trend': 0.06,
+     'base': lambda p: p['price_base']},
+    {'name': 'Demande_Mondiale', 'kind': 'trend', 'trend': 0.12,
+     'base': lambda p: p['production_base'] * 0.9},
+    {'name': 'Valeur_Marche', 'kind': 'trend', 'trend': 0.15,
+     'base': lambda p: p['production_base'] * p['price_base'] / 1000},
+    {'name': 'Efficacite_Therapeutique', 'kind': 'quality', 'improvement': 0.012,
+     'base': lambda p: 75},
+    {'name': 'Etudes_Scientifiques', 'kind': 'research',
+     'base': lambda p: 1},
+    {'name': 'Qualite_Bio', 'kind': 'quality', 'improvement': 0.025,
+     'base': lambda p: 60},
+    {'name': 'Usage_Aromatherapie', 'kind': 'usage',
+     'base': lambda p: 70},
+    {'name': 'Usage_Cosmetique', 'kind': 'usage', 'growth': 0.020,
+     'base': lambda p: 65},
+    {'name': 'Usage_Pharmaceutique', 'kind': 'usage', 'growth': 0.025,
+     'base': lambda p: 40},
+    {'name': 'Impact_Environnemental', 'kind': 'impact',
+     'base': lambda p: 45},
+    {'name': 'Durabilite_Production', 'kind': 'quality', 'improvement': 0.015,
+     'base': lambda p: 65},
+    {'name': 'Exportations', 'kind': 'trend', 'trend': 0.10,
+     'base': lambda p: p['production_base'] * 0.7},
+    {'name': 'Surface_Cultivee', 'kind': 'trend', 'trend': 0.09,
+     'base': lambda p: p['production_base'] / p['rendement'] * 10},
+]
+INDICATOR_COLUMNS = [spec['name'] for spec in INDICATOR_SPECS]
+INDICATOR_INDEX = {name: k for k, name in enumerate(INDICATOR_COLUMNS)}
+
+# Événements de marché appliqués aux séries de tendance
+EVENT_MULTIPLIERS = {
+    2008: 0.9,  # Crise économique
+    2020: 1.2,  # COVID
+}
+
+# Version du générateur: à incrémenter dès que les règles de génération changent
+GENERATOR_VERSION = 1
+DEFAULT_SEED = 2025
+
+# Schéma compact: mesures en float32 (7 chiffres significatifs suffisent à des
+# indicateurs simulés ou arrondis à la tonne), années en int16, noms et types en
+# catégories. Les calculs internes restent en float64; seul le stockage est compact.
+MEASURE_DTYPE = np.float32
+YEAR_DTYPE = np.int16
+
+# Granularités temporelles: code (unité numpy, sauf la semaine) et libellé
+GRANULARITIES = {
+    'Y': 'Annuelle',
+    'M': 'Mensuelle',
+    'W': 'Hebdomadaire',
+    'D': 'Quotidienne',
+}
+
+def period_axis(start_year, end_year, granularity='Y'):
+    """Dates de début des périodes (datetime64[D]) couvrant les années start_year à end_year"""
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Granularité inconnue: {granularity}")
+    start = np.datetime64(f'{start_year}', 'Y')
+    stop = np.datetime64(f'{end_year + 1}', 'Y')
+    if granularity == 'W':
+        return np.arange(start.astype('datetime64[D]'), stop.astype('datetime64[D]'), 7)
+    return np.arange(start.astype(f'datetime64[{granularity}]'),
+                     stop.astype(f'datetime64[{granularity}]')).astype('datetime64[D]')
+
+def fractional_years(dates):
+    """Temps en années décimales (2020.5 = mi-2020) pour des dates datetime64"""
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    year_start = dates.astype('datetime64[Y]')
+    first_day = year_start.astype('datetime64[D]')
+    length = ((year_start + 1).astype('datetime64[D]') - first_day).astype(float)
+    return year_start.astype(int) + 1970 + (dates - first_day).astype(float) / length
+
+@timed('dataframe')
+def cube_to_frame(values, years, granularity='Y'):
+    """DataFrame d'une huile (périodes × indicateurs) au format de generate_comprehensive_data
+
+    Au-delà de la granularité annuelle, `years` contient les dates des périodes: elles
+    forment la colonne 'Date' et 'Annee' garde l'année de chaque période.
+    """
+    df = pd.DataFrame(np.asarray(values, dtype=MEASURE_DTYPE), columns=INDICATOR_COLUMNS)
+    if np.issubdtype(np.asarray(years).dtype, np.datetime64):
+        df.insert(0, 'Date', years)
+        df.insert(0, 'Annee', (np.asarray(years).astype('datetime64[Y]').astype(int) + 1970).astype(YEAR_DTYPE))
+    else:
+        df.insert(0, 'Annee', np.asarray(years).astype(YEAR_DTYPE))
+    df.attrs['granularite'] = granularity
+    return df
+
+def oil_categorical(oil_names, repeats=1):
+    """Colonne 'Huile' catégorielle (ordre d'apparition conservé), sans chaîne répétée"""
+    names = pd.Index(list(oil_names))
+    categories = names.unique()
+    return pd.Categorical.from_codes(np.repeat(categories.get_indexer(names), repeats), categories=categories)
+
+def cube_to_panel(data, oil_names, years):
+    """DataFrame long (une ligne par huile et par année) à partir du cube"""
+    n_oils, n_years, _ = data.shape
+    panel = pd.DataFrame(np.asarray(data, dtype=MEASURE_DTYPE).reshape(n_oils * n_years, -1),
+                         columns=INDICATOR_COLUMNS)
+    if np.issubdtype(np.asarray(years).dtype, np.datetime64):
+        panel.insert(0, 'Date', np.tile(years, n_oils))
+    else:
+        panel.insert(0, 'Annee', np.tile(np.asarray(years).astype(YEAR_DTYPE), n_oils))
+    panel.insert(0, 'Huile', oil_categorical(oil_names, n_years))
+    return panel
+
+class DataSource:
+    """Interface commune des sources de données du dashboard"""
+
+    # Granularités que la source sait servir
+    granularities = ('Y',)
+
+    def oils(self):
+        """Huiles disponibles dans la source"""
+        raise NotImplementedError
+
+    def year_axis(self, start_year, end_year):
+        """Années effectivement servies pour une plage demandée"""
+        return np.arange(start_year, end_year + 1)
+
+    def time_axis(self, start_year, end_year, granularity='Y'):
+        """Axe temporel servi: années entières en annuel, dates des périodes sinon"""
+        if granularity not in self.granularities:
+            raise ValueError(f"Granularité {GRANULARITIES.get(granularity, granularity)} "
+                             f"non disponible pour {type(self).__name__}")
+        if granularity == 'Y':
+            return self.year_axis(start_year, end_year)
+        return period_axis(start_year, end_year, granularity)
+
+    def load_batch(self, oil_names, start_year=2000, end_year=2025, granularity='Y'):
+        """Cube (huiles × périodes × indicateurs) et axe temporel"""
+        raise NotImplementedError
+
+    def cache_token(self):
+        """Identifiant de version des données, utilisé dans les clés de cache"""
+        raise NotImplementedError
+
+    def load_oil(self, oil_name, start_year=2000, end_year=2025, granularity='Y'):
+        data, years = self.load_batch([oil_name], start_year, end_year, granularity)
+        return cube_to_frame(data[0], years, granularity)
+
+    def load_panel(self, oil_names=None, start_year=2000, end_year=2025, granularity='Y'):
+        if oil_names is None:
+            oil_names = self.oils()
+        data, years = self.load_batch(oil_names, start_year, end_year, granularity)
+        return cube_to_panel(data, oil_names, years)
+
+class SyntheticSource(DataSource):
+    """Générateur vectorisé de données simulées"""
+
+    granularities = tuple(GRANULARITIES)
+
+    def __init__(self, catalog, seed=DEFAULT_SEED):
+        self.catalog = catalog
+        self.seed = seed
+
+    def oils(self):
+        return list(self.catalog.names)
+
+    def cache_token(self):
+        return ('synthetic', self.seed, GENERATOR_VERSION)
+
+    def config_arrays(self, oil_names):
+        """Paramètres numériques des huiles sous forme de vecteurs"""
+        positions = self.catalog.positions(oil_names)
+        return {
+            key: self.catalog.numeric(key)[positions]
+            for key in ('production_base', 'price_base', 'rendement')
+        }
+
+    def indicator_bases(self, oil_names):
+        """Niveau de base de chaque indicateur pour chaque huile (huiles × indicateurs)"""
+        params = self.config_arrays(oil_names)
+        return np.stack([
+            np.broadcast_to(np.asarray(spec['base'](params), dtype=float), (len(oil_names),))
+            for spec in INDICATOR_SPECS
+        ], axis=-1)
+
+    def oil_rng(self, oil_name, granularity='Y'):
+        """Générateur propre à chaque huile, indépendant de l'ordre des appels"""
+        oil_seed = zlib.crc32(oil_name.encode('utf-8'))
+        entropy = [self.seed, oil_seed, GENERATOR_VERSION]
+        if granularity != 'Y':
+            # Flux distinct par granularité; l'annuel garde ses valeurs historiques
+            entropy.append(ord(granularity))
+        return np.random.default_rng(np.random.SeedSequence(entropy))
+
+    def load_batch(self, oil_names, start_year=2000, end_year=2025, granularity='Y'):
+        rng = [self.oil_rng(oil, granularity) for oil in oil_names]
+        return self.generate(oil_names, start_year, end_year, rng=rng, granularity=granularity)
+
+    @timed('generation')
+    def generate(self, oil_names, start_year=2000, end_year=2025, rng=None, granularity='Y'):
+        """Génère en un seul bloc vectorisé le cube (huiles × périodes × indicateurs)
+
+        `rng` peut être un générateur unique ou une liste de générateurs (un par huile).
+        Hors granularité annuelle, les tendances sont évaluées en années décimales et
+        l'axe retourné contient les dates des périodes.
+        """
+        rng = np.random if rng is None else rng
+        years = self.time_axis(start_year, end_year, granularity)
+        timeline = years if granularity == 'Y' else fractional_years(years)
+
+        bases = self.indicator_bases(oil_names)
+        factors, volatility, events, lower, upper = indicator_factors(timeline)
+
+        # Un seul tirage gaussien pour toutes les valeurs (ou un par huile si chaque huile a son générateur)
+        shape = (len(years), len(INDICATOR_SPECS))
+        if isinstance(rng, (list, tuple)):
+            noise = np.stack([oil_rng.standard_normal(shape) for oil_rng in rng]) if rng else np.empty((0,) + shape)
+        else:
+            noise = rng.standard_normal((len(oil_names),) + shape)
+        noise = 1 + volatility * noise
+        data = bases[:, None, :] * factors[None, :, :] * noise * events[None, :, :]
+        np.clip(data, lower, upper, out=data)
+        return data.astype(MEASURE_DTYPE), years
+
+def indicator_factors(years):
+    """Facteurs de tendance, volatilités, événements et bornes (périodes × indicateurs)
+
+    `years` peut être en années décimales (granularité infra-annuelle).
+    """
+    n_years, n_indicators = len(years), len(INDICATOR_SPECS)
+    elapsed = years - 2000
+    index = years - years[0] if n_years else years
+
+    factors = np.ones((n_years, n_indicators))
+    events = np.ones((n_years, n_indicators))
+    volatility = np.empty(n_indicators)
+    lower = np.full(n_indicators, -np.inf)
+    upper = np.full(n_indicators, np.inf)
+
+    # Paliers de la production scientifique
+    research_base = np.where(
+        years <= 2005, 5 + elapsed * 2,
+        np.where(years <= 2015, 15 + (years - 2005) * 5, 65 + (years - 2015) * 8)
+    )
+    event_factors = np.ones(n_years)
+    for year, factor in EVENT_MULTIPLIERS.items():
+        event_factors[np.floor(years) == year] = factor
+
+    for k, spec in enumerate(INDICATOR_SPECS):
+        kind = spec['kind']
+        if kind == 'trend':
+            factors[:, k] = 1 + spec['trend'] * index
+            events[:, k] = event_factors
+            volatility[k] = spec.get('volatility', 0.1)
+        elif kind == 'quality':
+            factors[:, k] = 1 + spec['improvement'] * elapsed
+            volatility[k] = 0.05
+            upper[k] = 100
+        elif kind == 'research':
+            factors[:, k] = research_base
+            volatility[k] = 0.2
+        elif kind == 'usage':
+            factors[:, k] = 1 + spec.get('growth', 0.015) * elapsed
+            volatility[k] = 0.08
+            upper[k] = 100
+        elif kind == 'impact':
+            factors[:, k] = 1 - 0.01 * elapsed  # Amélioration progressive
+            volatility[k] = 0.08
+            lower[k] = 10
+
+    return factors, volatility, events, lower, upper
+
+class ColumnarFileSource(DataSource):
+    """Base des sources fichier: une ligne par (Huile, Annee) avec les colonnes indicateurs"""
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        stat = os.stat(self.path)
+        self._token = (type(self).__name__, self.path, stat.st_mtime_ns, stat.st_size)
+        self._check_schema(self.schema().names)
+        self._oils = None
+        self._year_bounds = None
+
+    def _check_schema(self, names):
+        missing = [col for col in ['Huile', 'Annee'] + INDICATOR_COLUMNS if col not in names]
+        if missing:
+            raise ValueError(f"Colonnes manquantes dans {self.path}: {', '.join(missing)}")
+
+    def cache_token(self):
+        return self._token
+
+    def oils(self):
+        if self._oils is None:
+            self._oils = self._scan_oils()
+        return list(self._oils)
+
+    def year_axis(self, start_year, end_year):
+        if self._year_bounds is None:
+            self._year_bounds = self._scan_year_bounds()
+        first, last = self._year_bounds
+        return np.arange(max(start_year, first), min(end_year, last) + 1)
+
+    @timed('lecture_fichier')
+    def load_batch(self, oil_names, start_year=2000, end_year=2025, granularity='Y'):
+        oil_names = list(oil_names)
+        years = self.time_axis(start_year, end_year, granularity)
+        data = np.full((len(oil_names), len(years), len(INDICATOR_COLUMNS)), np.nan, dtype=MEASURE_DTYPE)
+        if not oil_names or not len(years):
+            return data, years
+
+        table = self.read_table(oil_names, int(years[0]), int(years[-1]))
+        # Placement vectorisé des lignes lues dans le cube (années absentes = NaN)
+        codes = pd.Categorical(table.column('Huile').to_pandas(), categories=oil_names).codes
+        year_index = table.column('Annee').to_numpy() - years[0]
+        data[codes, year_index] = np.column_stack([
+            table.column(col).to_numpy(zero_copy_only=False) for col in INDICATOR_COLUMNS
+        ])
+        return data, years
+
+    def schema(self):
+        raise NotImplementedError
+
+    def read_table(self, oil_names, start_year, end_year):
+        """Table Arrow filtrée sur les huiles et la plage d'années"""
+        raise NotImplementedError
+
+    def _scan_oils(self):
+        raise NotImplementedError
+
+    def _scan_year_bounds(self):
+        raise NotImplementedError
+
+class ParquetSource(ColumnarFileSource):
+    """Fichier Parquet mappé en mémoire; les filtres sont poussés au lecteur (statistiques des row groups)"""
+
+    def schema(self):
+        import pyarrow.parquet as pq
+        return pq.read_schema(self.path, memory_map=True)
+
+    def read_table(self, oil_names, start_year, end_year):
+        import pyarrow.parquet as pq
+        return pq.read_table(
+            self.path, columns=['Huile', 'Annee'] + INDICATOR_COLUMNS, memory_map=True,
+            filters=[('Huile', 'in', list(oil_names)),
+                     ('Annee', '>=', start_year), ('Annee', '<=', end_year)]
+        )
+
+    def _scan_oils(self):
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+        column = pq.read_table(self.path, columns=['Huile'], memory_map=True,
+                               read_dictionary=['Huile']).column('Huile')
+        return pc.unique(column).cast('string').to_pylist()
+
+    def _scan_year_bounds(self):
+        import pyarrow.parquet as pq
+        metadata = pq.ParquetFile(self.path, memory_map=True).metadata
+        position = metadata.schema.to_arrow_schema().get_field_index('Annee')
+        bounds = [
+            (stats.min, stats.max)
+            for stats in (metadata.row_group(i).column(position).statistics
+                          for i in range(metadata.num_row_groups))
+            if stats is not None and stats.has_min_max
+        ]
+        if not bounds:
+            return (0, -1)
+        return (min(lo for lo, _ in bounds), max(hi for _, hi in bounds))
+
+class ArrowIPCSource(ColumnarFileSource):
+    """Fichier Arrow IPC (Feather v2) mappé en mémoire, lu batch par batch sans copie"""
+
+    def _reader(self):
+        import pyarrow as pa
+        return pa.ipc.open_file(pa.memory_map(self.path, 'r'))
+
+    def schema(self):
+        return self._reader().schema
+
+    def _batches(self):
+        reader = self._reader()
+        for i in range(reader.num_record_batches):
+            yield reader.get_batch(i)
+
+    def read_table(self, oil_names, start_year, end_year):
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        wanted = pa.array(list(oil_names), type=pa.string())
+        selected = []
+        for batch in self._batches():
+            mask = pc.and_(
+                pc.is_in(batch.column('Huile').cast(pa.string()), value_set=wanted),
+                pc.and_(pc.greater_equal(batch.column('Annee'), start_year),
+                        pc.less_equal(batch.column('Annee'), end_year))
+            )
+            if pc.any(mask).as_py():
+                selected.append(batch.filter(mask))
+        if not selected:
+            return pa.Table.from_batches([], schema=self.schema())
+        return pa.Table.from_batches(selected)
+
+    def _scan_oils(self):
+        import pyarrow.compute as pc
+        oils = {}
+        for batch in self._batches():
+            for oil in pc.unique(batch.column('Huile')).cast('string').to_pylist():
+                oils.setdefault(oil)
+        return list(oils)
+
+    def _scan_year_bounds(self):
+        import pyarrow.compute as pc
+        bounds = [pc.min_max(batch.column('Annee')) for batch in self._batches() if batch.num_rows]
+        if not bounds:
+            return (0, -1)
+        return (min(b['min'].as_py() for b in bounds), max(b['max'].as_py() for b in bounds))
+
+# Extensions reconnues pour chaque backend fichier
+FILE_SOURCES = {
+    '.parquet': ParquetSource,
+    '.pq': ParquetSource,
+    '.arrow': ArrowIPCSource,
+    '.feather': ArrowIPCSource,
+    '.ipc': ArrowIPCSource,
+}
+
+def open_data_source(uri, catalog, seed=DEFAULT_SEED):
+    """Ouvre une source à partir d'un chemin de fichier, ou du générateur si `uri` vaut None/'synthetic'"""
+    if not uri or uri == 'synthetic':
+        return SyntheticSource(catalog, seed=seed)
+    extension = os.path.splitext(uri)[1].lower()
+    if extension not in FILE_SOURCES:
+        raise ValueError(f"Format de source non reconnu: {uri}")
+    return FILE_SOURCES[extension](uri)
+
+def write_columnar(panel, path, rows_per_batch=65536):
+    """Écrit un DataFrame long (Huile, Annee, indicateurs) au format Parquet ou Arrow IPC
+
+    Les lignes sont triées par huile puis année pour que les filtres du lecteur
+    puissent écarter des row groups / batches entiers.
+    """
+    import pyarrow as pa
+    # Tri lexicographique (et non dans l'ordre des catégories) pour les statistiques min/max
+    panel = panel.sort_values(['Huile', 'Annee'], kind='stable',
+                              key=lambda column: column.astype(str) if column.name == 'Huile' else column)
+    table = pa.Table.from_pandas(panel[['Huile', 'Annee'] + INDICATOR_COLUMNS], preserve_index=False)
+    if not pa.types.is_dictionary(table.column('Huile').type):
+        table = table.set_column(0, 'Huile', table.column('Huile').dictionary_encode())
+
+    if FILE_SOURCES.get(os.path.splitext(path)[1].lower()) is ParquetSource:
+        import pyarrow.parquet as pq
+        pq.write_table(table, path, row_group_size=rows_per_batch)
+    else:
+        with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=rows_per_batch)
+
+class DatasetCache:
+    """Cache LRU déterministe des séries d'une source, partagé entre les sessions
+
+    Avec un `budget` (memory_budget.MemoryBudget), le volume des séries compte
+    dans la limite mémoire commune aux caches du processus.
+    """
+
+    def __init__(self, source, max_entries=256, budget=None):
+        self.source = source
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.nbytes = 0
+        self._generation = 0
+        # clé -> (série en lecture seule, instant du dernier accès)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.budget = budget
+        if budget is not None:
+            budget.register(self)
+
+    @property
+    def version(self):
+        """Version des données servies: change avec la source ou après clear()"""
+        return tuple(self.source.cache_token()) + (self._generation,)
+
+    def _key(self, oil_name, start_year, end_year, granularity='Y'):
+        # Pour le générateur, le jeton de la source contient la graine et GENERATOR_VERSION
+        return (oil_name, start_year, end_year, granularity) + tuple(self.source.cache_token())
+
+    @timed('cache_donnees')
+    def get_batch(self, oil_names, start_year=2000, end_year=2025, granularity='Y'):
+        """Retourne le cube (huiles × périodes × indicateurs), en ne chargeant que les huiles absentes"""
+        oil_names = list(oil_names)
+        years = self.source.time_axis(start_year, end_year, granularity)
+        found = {}
+
+        with self._lock:
+            for oil in oil_names:
+                key = self._key(oil, start_year, end_year, granularity)
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    values, _ = self._entries[key]
+                    self._entries[key] = (values, time.monotonic())
+                    found[oil] = values
+                    self.hits += 1
+            missing = [oil for oil in dict.fromkeys(oil_names) if oil not in found]
+            self.misses += len(missing)
+
+        if missing:
+            data, _ = self.source.load_batch(missing, start_year, end_year, granularity)
+            now = time.monotonic()
+            with self._lock:
+                for oil, values in zip(missing, data):
+                    # Copie compacte: une entrée évincée doit libérer sa mémoire, pas garder le bloc entier
+                    values = values.astype(MEASURE_DTYPE)
+                    values.setflags(write=False)
+                    found[oil] = values
+                    previous = self._entries.pop(self._key(oil, start_year, end_year, granularity), None)
+                    if previous is not None:
+                        self.nbytes -= previous[0].nbytes
+                    self._entries[self._key(oil, start_year, end_year, granularity)] = (values, now)
+                    self.nbytes += values.nbytes
+                while len(self._entries) > self.max_entries:
+                    self._pop_oldest()
+            if self.budget is not None:
+                self.budget.enforce()
+
+        if not oil_names:
+            return np.empty((0, len(years), len(INDICATOR_COLUMNS)), dtype=MEASURE_DTYPE), years
+        return np.stack([found[oil] for oil in oil_names]), years
+
+    def get(self, oil_name, start_year=2000, end_year=2025, granularity='Y'):
+        """Retourne le DataFrame d'une huile au format de generate_comprehensive_data"""
+        data, years = self.get_batch([oil_name], start_year, end_year, granularity)
+        return cube_to_frame(data[0], years, granularity)
+
+    def _pop_oldest(self):
+        _, (values, _) = self._entries.popitem(last=False)
+        self.nbytes -= values.nbytes
+        self.evictions += 1
+        return values.nbytes
+
+    def oldest_access(self):
+        """Instant d'accès de l'entrée la moins récemment utilisée (None si vide)"""
+        with self._lock:
+            return next(iter(self._entries.values()))[1] if self._entries else None
+
+    def evict_oldest(self):
+        """Évince l'entrée la moins récemment utilisée; retourne les octets libérés"""
+        with self._lock:
+            return self._pop_oldest() if self._entries else 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+            self._generation += 1
+
+    def stats(self):
+        """Compteurs du cache"""
+        with self._lock:
+            return {
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'entries': len(self._entries), 'max_entries': self.max_entries, 'bytes': self.nbytes
+            }
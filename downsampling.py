@@ -0,0 +1,109 @@
+"""Réduction des séries avant tracé: LTTB ou min/max par seau, bornée par la largeur en pixels du graphique
+
+Le navigateur ne reçoit jamais plus de points qu'il ne peut en dessiner: au-delà de
+`points_per_pixel × largeur`, la série est réduite en préservant sa forme (pics et
+creux compris), et les séries de plus de WEBGL_THRESHOLD points (avant réduction)
+passent en Scattergl.
+"""
+import numpy as np
+import pandas as pd
+
+# Largeur de référence d'un graphique pleine largeur (layout « wide »)
+DEFAULT_CHART_WIDTH = 1200
+POINTS_PER_PIXEL = 2
+# Nombre de points de la série brute à partir duquel une trace est rendue en WebGL
+WEBGL_THRESHOLD = 2000
+
+def point_budget(width_px=DEFAULT_CHART_WIDTH, points_per_pixel=POINTS_PER_PIXEL):
+    """Nombre maximal de points utiles pour une largeur de tracé"""
+    return max(int(width_px * points_per_pixel), 3)
+
+def _numeric_axis(x):
+    """Axe des abscisses en flottants (les dates deviennent des jours)"""
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[D]').astype(np.float64)
+    return x.astype(np.float64)
+
+def lttb_indices(x, y, n_out):
+    """Indices retenus par Largest-Triangle-Three-Buckets (premier et dernier points inclus)"""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = _numeric_axis(x)
+    y = np.asarray(y, dtype=np.float64)
+
+    # Bornes des n_out - 2 seaux intérieurs
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for b in range(n_out - 2):
+        start, stop = edges[b], edges[b + 1]
+        # Point moyen du seau suivant (ou dernier point)
+        next_start, next_stop = stop, edges[b + 2] if b + 2 < len(edges) else n
+        mean_x = x[next_start:next_stop].mean()
+        mean_y = y[next_start:next_stop].mean()
+        # Aire du triangle (précédent retenu, candidat, moyenne suivante)
+        area = np.abs((x[previous] - mean_x) * (y[start:stop] - y[previous])
+                      - (x[previous] - x[start:stop]) * (mean_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        selected[b + 1] = previous
+    return selected
+
+def minmax_indices(y, n_out):
+    """Indices des minimum et maximum de chaque seau, dans l'ordre de la série"""
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n <= n_out:
+        return np.arange(n)
+    # Deux points par seau, plus le premier et le dernier de la série
+    size = -(-n // max((n_out - 2) // 2, 1))
+    n_buckets = -(-n // size)
+    offsets = np.arange(n_buckets) * size
+
+    # Seaux de taille égale; le remplissage (et les NaN) ne sont jamais retenus
+    missing = np.isnan(y)
+    padded = np.full(n_buckets * size, np.inf)
+    padded[:n] = np.where(missing, np.inf, y)
+    lows = offsets + np.argmin(padded.reshape(n_buckets, size), axis=1)
+    padded[:n] = np.where(missing, -np.inf, y)
+    padded[n:] = -np.inf
+    highs = offsets + np.argmax(padded.reshape(n_buckets, size), axis=1)
+    return np.unique(np.concatenate([lows, highs, [0, n - 1]]))
+
+def downsample(x, y, n_out, method='lttb'):
+    """Série (x, y) réduite à au plus `n_out` points"""
+    x, y = np.asarray(x), np.asarray(y)
+    if len(y) <= n_out:
+        return x, y
+    indices = minmax_indices(y, n_out) if method == 'minmax' else lttb_indices(x, y, n_out)
+    return x[indices], y[indices]
+
+def downsample_frame(df, x, n_out):
+    """Tableau réduit à au plus `n_out` lignes (barres et aires)
+
+    Les mesures (flottants) sont moyennées par seau; les entiers et libellés (Annee, Huile...)
+    gardent la valeur du premier point du seau.
+    """
+    if len(df) <= n_out:
+        return df
+    buckets = np.arange(len(df)) * n_out // len(df)
+    others = df.drop(columns=[x])
+    measures = others.select_dtypes('floating').columns
+    labels = others.columns.difference(measures, sort=False)
+    grouped = others.groupby(buckets)
+    reduced = pd.concat([grouped[measures].mean(), grouped[labels].first()], axis=1)[others.columns]
+    reduced.insert(0, x, df[x].groupby(buckets).first().to_numpy())
+    reduced.attrs = dict(df.attrs)
+    return reduced
+
+def line_trace(x, y, width_px=DEFAULT_CHART_WIDTH, method='lttb', **kwargs):
+    """Trace de courbe réduite à la largeur du graphique, en WebGL si la série brute dépasse le seuil"""
+    import plotly.graph_objects as go
+
+    y = pd.Series(y).to_numpy()
+    # Décidé sur la série brute: après réduction, une trace ne dépasse jamais point_budget(width_px)
+    trace = go.Scattergl if len(y) > WEBGL_THRESHOLD else go.Scatter
+    x, y = downsample(pd.Series(x).to_numpy(), y, point_budget(width_px), method)
+    return trace(x=x, y=y, **kwargs)
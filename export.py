@@ -0,0 +1,169 @@
+"""Export en flux d'une sélection (huiles × indicateurs × années) en Parquet, Arrow IPC ou CSV
+
+    python export.py --output extrait.parquet --oils Lavande "Tea Tree" --start-year 2010
+    python export.py --output extrait.csv --indicators Prix_Moyen Valeur_Marche --granularity M
+
+Les huiles sont lues par blocs depuis la source et chaque bloc est écrit aussitôt
+(record batch Arrow, row group Parquet ou morceau de CSV): le panel complet n'est
+jamais matérialisé, la mémoire reste bornée par la taille d'un bloc.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from catalog import get_catalog
+from data_sources import (
+    DEFAULT_SEED, GRANULARITIES, INDICATOR_COLUMNS, INDICATOR_INDEX, MEASURE_DTYPE, YEAR_DTYPE,
+    open_data_source
+)
+
+# Format -> (extension, type MIME)
+EXPORT_FORMATS = {
+    'parquet': ('.parquet', 'application/vnd.apache.parquet'),
+    'arrow': ('.arrow', 'application/vnd.apache.arrow.file'),
+    'csv': ('.csv', 'text/csv'),
+}
+# Extensions acceptées en ligne de commande pour deviner le format
+FORMAT_EXTENSIONS = {
+    '.parquet': 'parquet', '.pq': 'parquet',
+    '.arrow': 'arrow', '.feather': 'arrow', '.ipc': 'arrow',
+    '.csv': 'csv',
+}
+OILS_PER_BATCH = 256
+# Au-delà, le fichier d'un téléchargement passe du tampon mémoire au disque
+SPOOL_BYTES = 64 * 1024 * 1024
+
+def format_from_path(path):
+    """Format d'export déduit de l'extension du fichier"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMAT_EXTENSIONS:
+        raise ValueError(f"Format d'export non reconnu: {path}")
+    return FORMAT_EXTENSIONS[extension]
+
+def iter_panel_blocks(source, oil_names, indicators=None, start_year=2000, end_year=2025,
+                      granularity='Y', oils_per_batch=OILS_PER_BATCH):
+    """DataFrames longs successifs (Huile, Annee, Date hors annuel, indicateurs), un bloc d'huiles à la fois
+
+    La colonne 'Huile' garde les mêmes catégories (toute la sélection) dans chaque
+    bloc, pour que le dictionnaire Arrow soit identique d'un batch à l'autre.
+    """
+    oil_names = list(oil_names)
+    indicators = list(indicators or INDICATOR_COLUMNS)
+    unknown = [name for name in indicators if name not in INDICATOR_INDEX]
+    if unknown:
+        raise ValueError(f"Indicateurs inconnus: {', '.join(unknown)}")
+    columns = [INDICATOR_INDEX[name] for name in indicators]
+    categories = pd.Index(oil_names)
+
+    for first in range(0, len(oil_names), oils_per_batch):
+        block = oil_names[first:first + oils_per_batch]
+        data, periods = source.load_batch(block, start_year, end_year, granularity)
+        n_periods = len(periods)
+        codes = np.repeat(np.arange(first, first + len(block)), n_periods)
+        frame = {'Huile': pd.Categorical.from_codes(codes, categories=categories)}
+        periods = np.asarray(periods)
+        if np.issubdtype(periods.dtype, np.datetime64):
+            years = periods.astype('datetime64[Y]').astype(int) + 1970
+            frame['Annee'] = np.tile(years.astype(YEAR_DTYPE), len(block))
+            frame['Date'] = np.tile(periods, len(block))
+        else:
+            frame['Annee'] = np.tile(periods.astype(YEAR_DTYPE), len(block))
+        values = np.asarray(data[:, :, columns], dtype=MEASURE_DTYPE).reshape(len(block) * n_periods, -1)
+        for k, name in enumerate(indicators):
+            frame[name] = values[:, k]
+        yield pd.DataFrame(frame)
+
+def _batch_schema(block):
+    import pyarrow as pa
+
+    schema = pa.Schema.from_pandas(block, preserve_index=False)
+    if 'Date' in schema.names:
+        # Dates de début de période: jour calendaire, sans heure
+        schema = schema.set(schema.get_field_index('Date'), pa.field('Date', pa.date32()))
+    return schema
+
+def _open_writer(sink, fmt, schema):
+    import pyarrow as pa
+
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        return pq.ParquetWriter(sink, schema)
+    if fmt == 'arrow':
+        return pa.ipc.new_file(sink, schema)
+    import pyarrow.csv as pc
+    return pc.CSVWriter(sink, schema)
+
+def _write_blocks(blocks, sink, fmt):
+    import pyarrow as pa
+
+    writer = None
+    try:
+        for block in blocks:
+            if writer is None:
+                schema = _batch_schema(block)
+                writer = _open_writer(sink, fmt, schema)
+            # Un record batch = un row group Parquet = un morceau de CSV
+            writer.write_batch(pa.RecordBatch.from_pandas(block, schema=schema, preserve_index=False))
+            yield len(block)
+    finally:
+        if writer is not None:
+            writer.close()
+
+def export_panel(source, sink, fmt, oil_names, indicators=None, start_year=2000, end_year=2025,
+                 granularity='Y', oils_per_batch=OILS_PER_BATCH):
+    """Écrit la sélection dans `sink` (chemin ou fichier binaire) bloc par bloc; retourne le nombre de lignes"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Format d'export inconnu: {fmt}")
+    blocks = iter_panel_blocks(source, oil_names, indicators, start_year, end_year, granularity, oils_per_batch)
+
+    if isinstance(sink, (str, os.PathLike)):
+        with open(sink, 'wb') as handle:
+            return sum(_write_blocks(blocks, handle, fmt))
+    return sum(_write_blocks(blocks, sink, fmt))
+
+def export_download(source, fmt, oil_names, indicators=None, start_year=2000, end_year=2025, granularity='Y'):
+    """Fichier temporaire relu depuis le début, pour un bouton de téléchargement"""
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+    export_panel(source, spool, fmt, oil_names, indicators, start_year, end_year, granularity)
+    spool.seek(0)
+    return spool
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export en flux des séries des huiles essentielles")
+    parser.add_argument('--output', required=True, help="Fichier de sortie (.parquet, .arrow ou .csv)")
+    parser.add_argument('--format', choices=EXPORT_FORMATS, help="Format (déduit de l'extension par défaut)")
+    parser.add_argument('--oils', nargs='*', help="Huiles à exporter (toutes par défaut)")
+    parser.add_argument('--indicators', nargs='*', help="Indicateurs à exporter (tous par défaut)")
+    parser.add_argument('--start-year', type=int, default=2000)
+    parser.add_argument('--end-year', type=int, default=2025)
+    parser.add_argument('--granularity', choices=GRANULARITIES, default='Y')
+    parser.add_argument('--batch-oils', type=int, default=OILS_PER_BATCH, help="Huiles par bloc écrit")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--data-source', default=os.environ.get('DASHBOARD_DATA_SOURCE'),
+                        help="Fichier Parquet/Arrow IPC (générateur par défaut)")
+    args = parser.parse_args(argv)
+
+    catalog = get_catalog()
+    source = open_data_source(args.data_source, catalog, seed=args.seed)
+    provided = set(source.oils())
+    available = [oil for oil in catalog.names if oil in provided]
+    if args.oils:
+        unknown = sorted(set(args.oils).difference(available))
+        if unknown:
+            parser.error(f"huiles inconnues ou absentes de la source: {', '.join(unknown)}")
+    oil_names = args.oils or available
+    fmt = args.format or format_from_path(args.output)
+
+    started = time.perf_counter()
+    rows = export_panel(source, args.output, fmt, oil_names, args.indicators, args.start_year,
+                        args.end_year, args.granularity, args.batch_oils)
+    size = os.path.getsize(args.output)
+    print(f"{rows} lignes ({len(oil_names)} huiles) écrites dans {args.output} "
+          f"({size / 1e6:.1f} Mo) en {time.perf_counter() - started:.1f} s")
+
+if __name__ == '__main__':
+    main()
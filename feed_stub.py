@@ -0,0 +1,113 @@
+"""Serveur local qui imite les flux régionaux, pour tester l'ingestion sans réseau
+
+    python feed_stub.py --port 8100 --latency 0.05 --failure-rate 0.1
+
+Chaque flux (voir ingestion.FEEDS) renvoie la série du générateur pour l'huile
+demandée: une ingestion réussie reproduit exactement les valeurs synthétiques.
+Latence, part de réponses 503, huiles absentes (404) et huiles dont le corps
+est mal formé (200 sans la forme attendue) sont réglables.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from catalog import get_catalog
+from data_sources import DEFAULT_SEED, INDICATOR_INDEX, SyntheticSource
+from ingestion import FEEDS
+
+class FeedStubHandler(BaseHTTPRequestHandler):
+    """GET <chemin du flux>?huile=...&start_year=...&end_year=... -> {"annees": [...], "valeurs": [...]}"""
+
+    protocol_version = 'HTTP/1.1'
+    wbufsize = 64 * 1024
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        server = self.server
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        indicator = server.routes.get(url.path)
+        oil_name = query.get('huile', [None])[-1]
+        if server.latency:
+            time.sleep(server.latency)
+        with server.lock:
+            server.requests += 1
+            failed = server.rng.random() < server.failure_rate
+
+        if failed:
+            self._send(HTTPStatus.SERVICE_UNAVAILABLE, {'erreur': "Flux momentanément indisponible"})
+        elif indicator is None or oil_name not in server.oils or oil_name in server.missing:
+            self._send(HTTPStatus.NOT_FOUND, {'erreur': "Série inconnue"})
+        elif oil_name in server.malformed:
+            # Réponse 200 inexploitable: valeurs sans années correspondantes
+            self._send(HTTPStatus.OK, {'annees': [2000], 'valeurs': [1.0, 2.0]})
+        else:
+            start_year = int(query.get('start_year', [2000])[-1])
+            end_year = int(query.get('end_year', [2025])[-1])
+            data, years = server.source.load_batch([oil_name], start_year, end_year)
+            self._send(HTTPStatus.OK, {'annees': years.tolist(),
+                                       'valeurs': data[0, :, INDICATOR_INDEX[indicator]].tolist()})
+
+    def _send(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class FeedStubServer(ThreadingHTTPServer):
+    # File d'attente assez longue pour un client qui ouvre toutes ses connexions d'un coup
+    request_queue_size = 128
+    daemon_threads = True
+
+def make_stub_server(host='127.0.0.1', port=0, catalog=None, seed=DEFAULT_SEED, latency=0.0,
+                     failure_rate=0.0, missing=(), malformed=(), rng_seed=0):
+    """Serveur de flux simulé (serve_forever)
+
+    `missing`: huiles absentes de tous les flux, `malformed`: huiles dont les réponses sont mal formées.
+    """
+    catalog = catalog if catalog is not None else get_catalog()
+    server = FeedStubServer((host, port), FeedStubHandler)
+    server.source = SyntheticSource(catalog, seed=seed)
+    server.oils = set(catalog.names)
+    server.routes = {path: indicator for indicator, path in FEEDS.values()}
+    server.latency = latency
+    server.failure_rate = failure_rate
+    server.missing = set(missing)
+    server.malformed = set(malformed)
+    server.rng = random.Random(rng_seed)
+    server.lock = threading.Lock()
+    server.requests = 0
+    return server
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serveur local des flux régionaux simulés")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8100)
+    parser.add_argument('--latency', type=float, default=0.0, help="Latence de chaque réponse (s)")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="Part de réponses 503")
+    parser.add_argument('--malformed', nargs='*', default=(), help="Huiles dont les réponses sont mal formées")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    args = parser.parse_args(argv)
+
+    server = make_stub_server(args.host, args.port, seed=args.seed, latency=args.latency,
+                              failure_rate=args.failure_rate, malformed=args.malformed)
+    print(f"Flux simulés sur http://{args.host}:{server.server_port} ({', '.join(FEEDS)})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
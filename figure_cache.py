@@ -0,0 +1,122 @@
+"""Cache des figures Plotly construites, par vue et version du jeu de données"""
+import threading
+import time
+from collections import OrderedDict
+
+from instrumentation import section
+
+# Estimation de la mémoire retenue par un objet Figure validé (arbre d'objets Plotly,
+# gabarit de mise en page compris), calibrée avec tracemalloc sur les figures du dashboard:
+# un socle par figure, un surcoût par trace et par valeur des tableaux de données
+FIGURE_BASE_BYTES = 96 * 1024
+TRACE_BYTES = 3 * 1024
+POINT_BYTES = 48
+DATA_PROPERTIES = ('x', 'y', 'z', 'r', 'theta', 'labels', 'values', 'parents', 'ids',
+                   'text', 'hovertext', 'customdata')
+
+def figure_nbytes(fig):
+    """Taille estimée d'une figure construite"""
+    points = 0
+    for trace in fig.data:
+        for name in DATA_PROPERTIES:
+            value = trace[name] if name in trace else None
+            if value is not None and not isinstance(value, str):
+                points += len(value)
+    return FIGURE_BASE_BYTES + TRACE_BYTES * len(fig.data) + POINT_BYTES * points
+
+class FigureCache:
+    """Cache LRU des figures, clé (vue, huiles, version du jeu de données, thème)
+
+    Chaque entrée garde les objets Figure, passés tels quels à st.plotly_chart (qui
+    évite alors de les revalider). La taille est bornée par le volume estimé des
+    figures; un changement de version du jeu de données invalide toutes les entrées
+    de l'ancienne version. Avec un `budget`, ce volume compte aussi dans la limite
+    mémoire commune du processus.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, budget=None):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._dataset_version = None
+        self._lock = threading.Lock()
+        self.budget = budget
+        if budget is not None:
+            budget.register(self)
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    def get_or_build(self, view, oils, dataset_version, theme, builder):
+        """Figures {nom: Figure} d'une vue; `builder()` n'est appelé qu'en cas d'absence"""
+        key = (view, tuple(oils), dataset_version, theme)
+        with self._lock:
+            if dataset_version != self._dataset_version:
+                self._drop_all()
+                self._dataset_version = dataset_version
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                entry['touched'] = time.monotonic()
+                self.hits += 1
+                return entry['figures']
+            self.misses += 1
+
+        with section('construction'):
+            figures = builder()
+        size = sum(figure_nbytes(fig) for fig in figures.values())
+
+        with self._lock:
+            if dataset_version == self._dataset_version and size <= self.max_bytes:
+                previous = self._entries.pop(key, None)
+                if previous is not None:
+                    self._bytes -= previous['bytes']
+                self._entries[key] = {'figures': figures, 'bytes': size,
+                                      'touched': time.monotonic()}
+                self._bytes += size
+                while self._bytes > self.max_bytes:
+                    self._pop_oldest()
+        if self.budget is not None:
+            self.budget.enforce()
+        return figures
+
+    def _pop_oldest(self):
+        _, evicted = self._entries.popitem(last=False)
+        self._bytes -= evicted['bytes']
+        self.evictions += 1
+        return evicted['bytes']
+
+    def oldest_access(self):
+        """Instant d'accès de l'entrée la moins récemment utilisée (None si vide)"""
+        with self._lock:
+            return next(iter(self._entries.values()))['touched'] if self._entries else None
+
+    def evict_oldest(self):
+        """Évince l'entrée la moins récemment utilisée; retourne les octets libérés"""
+        with self._lock:
+            return self._pop_oldest() if self._entries else 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _drop_all(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def invalidate(self):
+        """Vide le cache (par exemple après une mise à jour des données)"""
+        with self._lock:
+            self._drop_all()
+            self._dataset_version = None
+
+    def stats(self):
+        """Compteurs du cache"""
+        with self._lock:
+            return {
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'entries': len(self._entries), 'bytes': self._bytes, 'max_bytes': self.max_bytes
+            }
@@ -0,0 +1,336 @@
+"""Construction des figures Plotly du dashboard, indépendante de Streamlit
+
+plotly.express n'est importé que par les builders qui l'utilisent: la première vue
+(production) n'en a pas besoin et démarre sans payer son import. Les séries
+infra-annuelles sont réduites à la largeur des graphiques (voir downsampling).
+"""
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from downsampling import DEFAULT_CHART_WIDTH, downsample_frame, line_trace, point_budget
+
+def time_column(df):
+    """Colonne des abscisses: 'Date' pour les séries infra-annuelles, sinon 'Annee'"""
+    return 'Date' if 'Date' in df.columns else 'Annee'
+
+def _rgba(hex_color, alpha):
+    """Couleur hexadécimale vers rgba() avec transparence"""
+    hex_color = hex_color.lstrip('#')
+    red, green, blue = (int(hex_color[i:i + 2], 16) for i in (0, 2, 4))
+    return f'rgba({red}, {green}, {blue}, {alpha})'
+
+def add_fan_chart(fig, years, band, color, name, row, col, secondary_y=False):
+    """Bande P5-P95 remplie et médiane P50 en pointillés"""
+    low, median, high = (band[p] for p in sorted(band))
+    fig.add_trace(go.Scatter(x=years, y=high, line=dict(width=0), hoverinfo='skip',
+                             showlegend=False, legendgroup=name),
+                  row=row, col=col, secondary_y=secondary_y)
+    fig.add_trace(go.Scatter(x=years, y=low, line=dict(width=0), fill='tonexty',
+                             fillcolor=_rgba(color, 0.2), name=f"{name} P5-P95", legendgroup=name),
+                  row=row, col=col, secondary_y=secondary_y)
+    fig.add_trace(go.Scatter(x=years, y=median, line=dict(color=color, dash='dot'),
+                             name=f"{name} P50", legendgroup=name),
+                  row=row, col=col, secondary_y=secondary_y)
+
+def add_forecast(fig, x_last, y_last, years, forecast, level, color, name, row, col, secondary_y=False):
+    """Prévision en tirets et intervalle de prévision, raccordés au dernier point observé"""
+    years = np.concatenate([[x_last], years])
+    low, high = (np.concatenate([[y_last], values]) for values in forecast[level])
+    group = f"{name} prévision"
+    fig.add_trace(go.Scatter(x=years, y=high, line=dict(width=0), hoverinfo='skip',
+                             showlegend=False, legendgroup=group),
+                  row=row, col=col, secondary_y=secondary_y)
+    fig.add_trace(go.Scatter(x=years, y=low, line=dict(width=0), fill='tonexty',
+                             fillcolor=_rgba(color, 0.15), name=f"{name} IC {level} %", legendgroup=group),
+                  row=row, col=col, secondary_y=secondary_y)
+    fig.add_trace(go.Scatter(x=years, y=np.concatenate([[y_last], forecast['mean']]),
+                             line=dict(color=color, dash='dash'), name=f"{name} prévision",
+                             legendgroup=group),
+                  row=row, col=col, secondary_y=secondary_y)
+
+def build_production_figure(df, oil_name, oil_config, bands=None, width_px=DEFAULT_CHART_WIDTH,
+                            aggregates=None, forecast=None, level=95):
+    """Grille 2×2 production, prix, valeur du marché et croissance normalisée
+
+    `bands` (voir scenarios.oil_bands) ajoute les bandes Monte Carlo en éventail,
+    `forecast` (voir forecasting.ForecastCache) la prévision et son intervalle à `level` %.
+    `aggregates` (incremental.RunningAggregates) fournit les maxima de normalisation
+    sans reparcourir la série.
+    """
+    if aggregates is not None:
+        max_production = aggregates.value('maximum', 'Production_Mondiale')
+        max_price = aggregates.value('maximum', 'Prix_Moyen')
+    else:
+        max_production, max_price = df['Production_Mondiale'].max(), df['Prix_Moyen'].max()
+    x = df[time_column(df)]
+    cell_width = width_px / 2
+    fig = make_subplots(
+        rows=2, cols=2,
+        subplot_titles=('Production vs Demande', 'Évolution des Prix',
+                       'Valeur du Marché', 'Croissance Comparative'),
+        specs=[[{"secondary_y": True}, {"secondary_y": False}],
+               [{"secondary_y": False}, {"secondary_y": False}]]
+    )
+
+    # Production vs Demande
+    fig.add_trace(
+        line_trace(x, df['Production_Mondiale'], cell_width,
+                   name="Production", line=dict(color=oil_config["couleur"])),
+        row=1, col=1
+    )
+    fig.add_trace(
+        line_trace(x, df['Demande_Mondiale'], cell_width,
+                   name="Demande", line=dict(color='#228B22')),
+        row=1, col=1, secondary_y=True
+    )
+
+    # Évolution des Prix
+    fig.add_trace(
+        line_trace(x, df['Prix_Moyen'], cell_width,
+                   name="Prix Moyen", line=dict(color='#FFD700')),
+        row=1, col=2
+    )
+
+    # Valeur du Marché
+    fig.add_trace(
+        line_trace(x, df['Valeur_Marche'], cell_width,
+                   name="Valeur Marché", line=dict(color='#8A2BE2')),
+        row=2, col=1
+    )
+
+    # Croissance Comparative (normalisée)
+    fig.add_trace(
+        line_trace(x, df['Production_Mondiale']/max_production, cell_width,
+                   name="Production (norm)", line=dict(color=oil_config["couleur"])),
+        row=2, col=2
+    )
+    fig.add_trace(
+        line_trace(x, df['Prix_Moyen']/max_price, cell_width,
+                   name="Prix (norm)", line=dict(color='#FFD700')),
+        row=2, col=2
+    )
+
+    # Bandes de confiance Monte Carlo
+    if bands is not None:
+        fans = [
+            ('Production_Mondiale', "Production", oil_config["couleur"], 1, 1, False),
+            ('Demande_Mondiale', "Demande", '#228B22', 1, 1, True),
+            ('Prix_Moyen', "Prix Moyen", '#FFD700', 1, 2, False),
+            ('Valeur_Marche', "Valeur Marché", '#8A2BE2', 2, 1, False),
+        ]
+        for indicator, name, color, row, col, secondary_y in fans:
+            if indicator in bands:
+                add_fan_chart(fig, bands['Annee'], bands[indicator], color, name, row, col, secondary_y)
+
+    # Prévisions à tendance amortie
+    if forecast is not None:
+        overlays = [
+            ('Production_Mondiale', "Production", oil_config["couleur"], 1, 1, False),
+            ('Demande_Mondiale', "Demande", '#228B22', 1, 1, True),
+            ('Prix_Moyen', "Prix Moyen", '#FFD700', 1, 2, False),
+            ('Valeur_Marche', "Valeur Marché", '#8A2BE2', 2, 1, False),
+        ]
+        for indicator, name, color, row, col, secondary_y in overlays:
+            add_forecast(fig, x.iloc[-1], df[indicator].iloc[-1], forecast['Annee'], forecast[indicator],
+                         level, color, name, row, col, secondary_y)
+
+    fig.update_layout(height=600, title_text=f"Analyse Marché - {oil_name}")
+    return fig
+
+def build_therapeutic_figures(df, oil_config, width_px=DEFAULT_CHART_WIDTH):
+    """Efficacité, études scientifiques et applications par secteur
+
+    Barres et aires sont moyennées par seau au-delà du budget de points.
+    """
+    import plotly.express as px
+
+    x = time_column(df)
+    half = downsample_frame(df, x, point_budget(width_px / 2))
+    df = downsample_frame(df, x, point_budget(width_px))
+
+    # Efficacité thérapeutique
+    efficacy = px.line(half, x=x, y='Efficacite_Therapeutique',
+                       title='Évolution de l\'Efficacité Thérapeutique',
+                       labels={'Efficacite_Therapeutique': 'Score d\'Efficacité'})
+    efficacy.update_traces(line=dict(color=oil_config["couleur"], width=3))
+
+    # Recherche scientifique
+    research = px.bar(half, x=x, y='Etudes_Scientifiques',
+                      title='Études Scientifiques Publiées',
+                      labels={'Etudes_Scientifiques': 'Nombre d\'Études'})
+    research.update_traces(marker_color=oil_config["couleur"])
+
+    # Applications par secteur
+    usage_data = pd.DataFrame({
+        'Année': df[x],
+        'Aromathérapie': df['Usage_Aromatherapie'],
+        'Cosmétique': df['Usage_Cosmetique'],
+        'Pharmaceutique': df['Usage_Pharmaceutique']
+    })
+    usages = px.area(usage_data, x='Année',
+                     y=['Aromathérapie', 'Cosmétique', 'Pharmaceutique'],
+                     title='Évolution des Applications par Secteur',
+                     labels={'value': 'Score d\'Utilisation', 'variable': 'Secteur'})
+
+    return {'efficacite': efficacy, 'etudes': research, 'usages': usages}
+
+def build_sustainability_figures(df, oil_config, width_px=DEFAULT_CHART_WIDTH):
+    """Durabilité vs impact et radar des indicateurs actuels"""
+    x = df[time_column(df)]
+    trend = go.Figure()
+    trend.add_trace(line_trace(x, df['Durabilite_Production'], width_px / 2,
+                               name='Durabilité Production', line=dict(color=oil_config["couleur"])))
+    trend.add_trace(line_trace(x, df['Impact_Environnemental'], width_px / 2,
+                               name='Impact Environnemental', line=dict(color='#FF6B6B')))
+    trend.update_layout(title='Durabilité vs Impact Environnemental',
+                        xaxis_title='Année', yaxis_title='Score')
+
+    # Radar chart des indicateurs de durabilité
+    categories = ['Production', 'Qualité Bio', 'Durabilité', 'Impact Environ.']
+    values = [
+        df['Production_Mondiale'].iloc[-1] / df['Production_Mondiale'].max() * 100,
+        df['Qualite_Bio'].iloc[-1],
+        df['Durabilite_Production'].iloc[-1],
+        100 - df['Impact_Environnemental'].iloc[-1]  # Inversé car plus bas = mieux
+    ]
+
+    radar = go.Figure(data=go.Scatterpolar(
+        r=values,
+        theta=categories,
+        fill='toself',
+        line=dict(color=oil_config["couleur"])
+    ))
+    radar.update_layout(
+        polar=dict(
+            radialaxis=dict(visible=True, range=[0, 100])
+        ),
+        showlegend=False,
+        title='Indicateurs de Durabilité (Actuels)'
+    )
+
+    return {'durabilite': trend, 'radar': radar}
+
+def build_comparative_figures(comp_df):
+    """Barres de production et de prix, radar multi-critères"""
+    import plotly.express as px
+
+    color_map = dict(zip(comp_df['Huile'], comp_df['Couleur']))
+    production = px.bar(comp_df, x='Huile', y='Production', color='Huile',
+                        title='Production Mondiale Comparée',
+                        labels={'Production': 'Tonnes'},
+                        color_discrete_map=color_map)
+    price = px.bar(comp_df, x='Huile', y='Prix', color='Huile',
+                   title='Prix Moyen Comparé',
+                   labels={'Prix': '€/kg'},
+                   color_discrete_map=color_map)
+
+    # Radar chart comparatif: axes normalisés en une opération (maximum de la sélection, scores sur 100)
+    axes = comp_df[['Production', 'Prix', 'Efficacité', 'Études', 'Durabilité']].to_numpy(dtype=float)
+    scale = axes.max(axis=0)
+    scale[[2, 4]] = 100
+    radar = go.Figure()
+    for name, color, r in zip(comp_df['Huile'], comp_df['Couleur'], axes / scale * 100):
+        radar.add_trace(go.Scatterpolar(
+            r=r,
+            theta=['Production', 'Prix', 'Efficacité', 'Recherche', 'Durabilité'],
+            name=name,
+            fill='toself',
+            line=dict(color=color)
+        ))
+
+    radar.update_layout(
+        polar=dict(radialaxis=dict(visible=True, range=[0, 100])),
+        title='Analyse Comparative Multi-Critères'
+    )
+
+    return {'production': production, 'prix': price, 'radar': radar}
+
+def build_market_figures(top_10, type_counts, scatter_df, total_oils=None):
+    """Top 10 par valeur, répartition par type et prix vs production
+
+    Les entrées viennent de market.MarketAggregates (top-k et comptes par type):
+    la taille des figures ne dépend pas du nombre total d'huiles.
+    """
+    import plotly.express as px
+
+    # Top 10 par valeur de marché
+    top = px.bar(top_10, x='Huile', y='Valeur Marché (M€)', color='Huile',
+                 color_discrete_map=dict(zip(top_10['Huile'], top_10['Couleur'])))
+
+    # Répartition par type
+    types = px.pie(values=type_counts.values, names=type_counts.index,
+                   title='Répartition par Type Thérapeutique')
+
+    title = 'Prix vs Production'
+    if total_oils is not None and total_oils > len(scatter_df):
+        title += f" ({len(scatter_df)} premières huiles sur {total_oils:,})"
+    scatter = px.scatter(scatter_df, x='Prix (€/kg)', y='Production (t)',
+                         size='Valeur Marché (M€)', color='Type',
+                         hover_name='Huile', title=title)
+
+    return {'top_10': top, 'types': types, 'prix_production': scatter}
+
+def build_region_figures(region_df, year, years, market_hhi, region, exposure, breakdown, oil_name):
+    """Carte des parts de l'offre mondiale, concentration (HHI) et exposition à une région
+
+    Les entrées viennent de regions.RegionalSupply: des agrégats par pays et par année,
+    dont la taille ne dépend pas du nombre d'huiles.
+    """
+    import plotly.express as px
+
+    mapped = region_df[region_df['ISO3'].notna()]
+    choropleth = px.choropleth(mapped, locations='ISO3', color='Part mondiale (%)', hover_name='Région',
+                               hover_data={'ISO3': False, 'Production (t)': ':,.0f', 'Huiles': True},
+                               color_continuous_scale='YlGn',
+                               title=f"Part de l'Offre Mondiale par Pays ({year})")
+    choropleth.update_geos(showcountries=True, projection_type='natural earth')
+    choropleth.update_layout(height=500, margin=dict(l=0, r=0, t=50, b=0))
+
+    concentration = make_subplots(specs=[[{"secondary_y": True}]])
+    concentration.add_trace(go.Scatter(x=years, y=market_hhi, name="HHI mondial",
+                                       line=dict(color='#2A9D8F')))
+    concentration.add_trace(go.Scatter(x=years, y=exposure * 100, name=f"Part {region} (%)",
+                                       line=dict(color='#F9A602', dash='dot')), secondary_y=True)
+    concentration.update_yaxes(title_text="HHI (0-10 000)", secondary_y=False)
+    concentration.update_yaxes(title_text="Part de l'offre (%)", secondary_y=True)
+    concentration.update_layout(title=f"Concentration de l'Offre et Exposition à {region}")
+
+    oil = px.bar(breakdown, x='Région', y='Production (t)', text=breakdown['Part (%)'].round(1),
+                 title=f"Répartition de {oil_name} ({year}, % de la production)")
+
+    return {'carte': choropleth, 'concentration': concentration, 'huile': oil}
+
+def build_sensitivity_figures(tornado, reference, outcome, heatmap, x_label, y_label):
+    """Tornado (écarts au résultat de référence, un paramètre à la fois) et carte de chaleur sur deux paramètres
+
+    `tornado` vient de sensitivity.tornado_frame, `heatmap` est un tableau croisé
+    (valeurs de y en index, valeurs de x en colonnes) du résultat.
+    """
+    low_column, high_column = tornado.columns[1:3]
+    fig_tornado = go.Figure()
+    fig_tornado.add_trace(go.Bar(y=tornado['Paramètre'], x=tornado[low_column], orientation='h',
+                                 name=low_column, marker_color='#FF6B6B', base=reference))
+    fig_tornado.add_trace(go.Bar(y=tornado['Paramètre'], x=tornado[high_column], orientation='h',
+                                 name=high_column, marker_color='#2A9D8F', base=reference))
+    fig_tornado.add_vline(x=reference, line_dash='dot', line_color='grey')
+    fig_tornado.update_layout(barmode='overlay', title=f"Sensibilité: {outcome}",
+                              xaxis_title=outcome, height=450)
+
+    fig_heatmap = go.Figure(go.Heatmap(
+        z=heatmap.to_numpy(), x=heatmap.columns, y=heatmap.index, colorscale='Viridis',
+        colorbar=dict(title=outcome), hovertemplate=f"{x_label}: %{{x:.3g}}<br>{y_label}: %{{y:.3g}}"
+                                                    f"<br>{outcome}: %{{z:,.1f}}<extra></extra>"
+    ))
+    fig_heatmap.update_layout(title=f"{outcome} selon {x_label} et {y_label}",
+                              xaxis_title=x_label, yaxis_title=y_label, height=450)
+
+    return {'tornado': fig_tornado, 'heatmap': fig_heatmap}
+
+def build_oil_figures(df, oil_name, oil_config):
+    """Toutes les figures d'une huile, par nom"""
+    figures = {'production': build_production_figure(df, oil_name, oil_config)}
+    figures.update({f'therapeutique_{name}': fig for name, fig in build_therapeutic_figures(df, oil_config).items()})
+    figures.update({f'durabilite_{name}': fig for name, fig in build_sustainability_figures(df, oil_config).items()})
+    return figures
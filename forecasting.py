@@ -0,0 +1,152 @@
+"""Prévisions par lissage exponentiel à tendance amortie (ETS(A,Ad,N) sur le logarithme des séries)
+
+Toutes les séries (huiles × indicateurs) sont ajustées ensemble: la récurrence
+avance d'une période à la fois sur un tableau (paramètres candidats × séries),
+et chaque série retient le jeu (α, β, φ) de plus faible erreur quadratique.
+Les intervalles de prévision suivent la variance analytique du modèle.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from data_sources import INDICATOR_COLUMNS, MEASURE_DTYPE, indicator_factors
+
+HORIZON_YEAR = 2035
+DEFAULT_LEVELS = (80, 95)
+
+# Grille des paramètres candidats: lissage du niveau, de la tendance (fraction de α) et amortissement
+ALPHAS = (0.2, 0.4, 0.6, 0.8)
+BETA_RATIOS = (0.05, 0.2, 0.5)
+PHIS = (0.8, 0.9, 0.98)
+
+# Quantiles de la loi normale centrée réduite pour les niveaux usuels
+_Z = {50: 0.6745, 80: 1.2816, 90: 1.6449, 95: 1.9600, 99: 2.5758}
+
+def _parameter_grid():
+    alpha, ratio, phi = (grid.ravel() for grid in np.meshgrid(ALPHAS, BETA_RATIOS, PHIS, indexing='ij'))
+    return alpha, alpha * ratio, phi
+
+def fit_damped_trend(y):
+    """Ajuste chaque ligne de `y` (séries × temps, logarithmes); retourne niveau, tendance, paramètres et σ
+
+    Les valeurs manquantes n'actualisent pas l'état (erreur nulle) et ne comptent pas dans l'erreur.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    alpha, beta, phi = (p[:, None] for p in _parameter_grid())
+    observed = ~np.isnan(y)
+
+    # État initial: première valeur et première pente observées
+    level = np.broadcast_to(np.nan_to_num(y[:, 0]), (len(alpha), len(y))).copy()
+    slope = np.nan_to_num(y[:, 1] - y[:, 0]) if y.shape[1] > 1 else np.zeros(len(y))
+    trend = np.broadcast_to(slope, level.shape).copy()
+    sse = np.zeros(level.shape)
+    for t in range(1, y.shape[1]):
+        predicted = level + phi * trend
+        error = np.where(observed[:, t], y[:, t] - predicted, 0.0)
+        sse += error ** 2
+        level = predicted + alpha * error
+        trend = phi * trend + beta * error
+
+    best = np.argmin(sse, axis=0)
+    series = np.arange(len(y))
+    n_errors = np.maximum(observed[:, 1:].sum(axis=1), 1)
+    return {
+        'level': level[best, series],
+        'trend': trend[best, series],
+        'alpha': alpha[best, 0],
+        'beta': beta[best, 0],
+        'phi': phi[best, 0],
+        'sigma': np.sqrt(sse[best, series] / n_errors),
+    }
+
+def forecast_damped_trend(fit, horizon, levels=DEFAULT_LEVELS):
+    """Prévision moyenne (séries × horizon) et intervalles {niveau: (bas, haut)}, en logarithmes"""
+    steps = np.arange(1, horizon + 1)
+    phi = fit['phi'][:, None]
+    # Somme φ + φ² + ... + φ^h de la tendance amortie
+    damping = np.cumsum(phi ** steps, axis=1)
+    mean = fit['level'][:, None] + damping * fit['trend'][:, None]
+
+    # Variance à h pas: σ² (1 + Σ_{j<h} c_j²), c_j = α + β φ (1 - φ^j) / (1 - φ)
+    c = fit['alpha'][:, None] + fit['beta'][:, None] * phi * (1 - phi ** steps[:-1]) / (1 - phi)
+    spread = fit['sigma'][:, None] * np.sqrt(1 + np.concatenate(
+        [np.zeros((len(mean), 1)), np.cumsum(c ** 2, axis=1)], axis=1))
+    return mean, {level: (mean - _Z[level] * spread, mean + _Z[level] * spread) for level in levels}
+
+def forecast_cube(data, years, end_year=HORIZON_YEAR, levels=DEFAULT_LEVELS):
+    """Prévisions annuelles d'un cube (huiles × années × indicateurs) jusqu'à `end_year`
+
+    Retourne les années prévues, la moyenne (huiles × horizon × indicateurs) et les
+    intervalles {niveau: (bas, haut)}, bornés comme les séries du générateur.
+    """
+    data = np.asarray(data, dtype=np.float64)
+    n_oils, n_years, n_indicators = data.shape
+    future = np.arange(int(years[-1]) + 1, end_year + 1)
+    _, _, _, lower, upper = indicator_factors(np.asarray(future, dtype=float))
+    lower = np.maximum(lower, 0)
+
+    # Séries en ligne (huile, indicateur) et en logarithme: tendances multiplicatives, intervalles positifs
+    series = np.log(np.maximum(data, 1e-9)).transpose(0, 2, 1).reshape(n_oils * n_indicators, n_years)
+    mean, bands = forecast_damped_trend(fit_damped_trend(series), len(future), levels)
+
+    def to_cube(values):
+        values = np.exp(values).reshape(n_oils, n_indicators, len(future)).transpose(0, 2, 1)
+        return np.clip(values, lower, upper).astype(MEASURE_DTYPE)
+
+    return future, to_cube(mean), {level: (to_cube(low), to_cube(high)) for level, (low, high) in bands.items()}
+
+class ForecastCache:
+    """Prévisions par huile, calculées par lots pour les huiles manquantes et invalidées avec le jeu de données"""
+
+    def __init__(self, cache, end_year=HORIZON_YEAR, levels=DEFAULT_LEVELS, max_entries=1024):
+        self.cache = cache
+        self.end_year = end_year
+        self.levels = levels
+        self.max_entries = max_entries
+        self._version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._precomputed = (None, None)
+
+    def use_precomputed(self, provider, version):
+        """Sert les prévisions de `provider(huiles)` (format de forecast_cube) tant que les données sont à `version`"""
+        self._precomputed = (version, provider)
+
+    def get_batch(self, oil_names):
+        """{huile: prévision} pour une liste d'huiles (séries annuelles du cache de données)"""
+        oil_names = list(oil_names)
+        version = self.cache.version
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            found = {oil: self._entries[oil] for oil in oil_names if oil in self._entries}
+            for oil in found:
+                self._entries.move_to_end(oil)
+        missing = [oil for oil in oil_names if oil not in found]
+        if missing:
+            precomputed_version, provider = self._precomputed
+            if provider is not None and precomputed_version == version:
+                future, mean, bands = provider(missing)
+            else:
+                data, years = self.cache.get_batch(missing)
+                future, mean, bands = forecast_cube(data, years, self.end_year, self.levels)
+            with self._lock:
+                for i, oil in enumerate(missing):
+                    entry = {
+                        'Annee': future,
+                        **{name: {'mean': mean[i, :, k],
+                                  **{level: (low[i, :, k], high[i, :, k]) for level, (low, high) in bands.items()}}
+                           for k, name in enumerate(INDICATOR_COLUMNS)},
+                    }
+                    found[oil] = entry
+                    if self._version == version:
+                        self._entries[oil] = entry
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return {oil: found[oil] for oil in oil_names}
+
+    def get(self, oil_name):
+        """Prévision d'une huile: {'Annee': années, indicateur: {'mean': série, niveau: (bas, haut)}}"""
+        return self.get_batch([oil_name])[oil_name]
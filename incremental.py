@@ -0,0 +1,172 @@
+"""Mise à jour incrémentale: ajout de nouvelles périodes sans recalculer l'historique
+
+Chaque série vit dans un tampon extensible (capacité doublée à chaque débordement) et
+porte ses agrégats courants (première valeur, dernière valeur, maximum), mis à jour
+en O(nouvelles périodes). Les KPI et la normalisation des courbes les lisent
+directement au lieu de reparcourir la série.
+"""
+import threading
+
+import numpy as np
+
+from data_sources import INDICATOR_COLUMNS, INDICATOR_INDEX, MEASURE_DTYPE, cube_to_frame, period_axis
+
+class RunningAggregates:
+    """Agrégats courants d'une série par indicateur: première et dernière valeur, maximum, nombre de périodes"""
+
+    __slots__ = ('first', 'latest', 'maximum', 'count')
+
+    def __init__(self, values):
+        values = np.asarray(values, dtype=float)
+        self.first = values[0].copy()
+        self.latest = values[-1].copy()
+        self.maximum = np.nanmax(values, axis=0)
+        self.count = len(values)
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls(df[INDICATOR_COLUMNS].to_numpy())
+
+    def copy(self):
+        clone = RunningAggregates.__new__(RunningAggregates)
+        clone.first, clone.latest, clone.maximum = self.first.copy(), self.latest.copy(), self.maximum.copy()
+        clone.count = self.count
+        return clone
+
+    def update(self, values):
+        """Intègre de nouvelles périodes (déjà ordonnées)"""
+        self.latest = values[-1].copy()
+        self.maximum = np.fmax(self.maximum, np.nanmax(values, axis=0))
+        self.count += len(values)
+
+    def growth(self, indicator):
+        """Croissance relative depuis la première période"""
+        k = INDICATOR_INDEX[indicator]
+        return self.latest[k] / self.first[k] - 1
+
+    def value(self, which, indicator):
+        """Valeur d'un agrégat ('first', 'latest' ou 'maximum') pour un indicateur"""
+        return getattr(self, which)[INDICATOR_INDEX[indicator]]
+
+class AppendableSeries:
+    """Série d'une huile (périodes × indicateurs) qui accepte l'ajout de périodes en fin"""
+
+    def __init__(self, periods, values, granularity='Y'):
+        periods = np.asarray(periods)
+        values = np.asarray(values, dtype=MEASURE_DTYPE)
+        self.granularity = granularity
+        self.version = 0
+        self._periods = periods.copy()
+        self._values = values.copy()
+        self._length = len(periods)
+        self.aggregates = RunningAggregates(values)
+
+    def __len__(self):
+        return self._length
+
+    @property
+    def periods(self):
+        return self._periods[:self._length]
+
+    @property
+    def values(self):
+        return self._values[:self._length]
+
+    def _reserve(self, extra):
+        needed = self._length + extra
+        if needed <= len(self._values):
+            return
+        capacity = max(needed, 2 * len(self._values))
+        periods = np.empty(capacity, dtype=self._periods.dtype)
+        values = np.empty((capacity, self._values.shape[1]), dtype=MEASURE_DTYPE)
+        periods[:self._length] = self.periods
+        values[:self._length] = self.values
+        self._periods, self._values = periods, values
+
+    def append(self, periods, values):
+        """Ajoute des périodes postérieures à la dernière; retourne la nouvelle version"""
+        periods = np.asarray(periods, dtype=self._periods.dtype)
+        values = np.atleast_2d(np.asarray(values, dtype=MEASURE_DTYPE))
+        if len(periods) != len(values) or values.shape[1] != self._values.shape[1]:
+            raise ValueError("Périodes et valeurs de tailles incompatibles")
+        if not len(periods):
+            return self.version
+        if np.any(np.diff(periods) <= 0) or periods[0] <= self.periods[-1]:
+            raise ValueError("Les nouvelles périodes doivent suivre la dernière période connue")
+
+        self._reserve(len(periods))
+        self._periods[self._length:self._length + len(periods)] = periods
+        self._values[self._length:self._length + len(periods)] = values
+        self._length += len(periods)
+        self.aggregates.update(values)
+        self.version += 1
+        return self.version
+
+    def frame(self):
+        """DataFrame au format de generate_comprehensive_data"""
+        return cube_to_frame(self.values.copy(), self.periods.copy(), self.granularity)
+
+class IncrementalStore:
+    """Séries incrémentales par (huile, granularité), initialisées depuis le cache de données"""
+
+    def __init__(self, cache, start_year=2000, end_year=2025):
+        self.cache = cache
+        self.start_year = start_year
+        self.end_year = end_year
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def series(self, oil_name, granularity='Y'):
+        """Série incrémentale d'une huile (créée à partir de l'historique au premier accès)"""
+        key = (oil_name, granularity)
+        with self._lock:
+            series = self._series.get(key)
+        if series is None:
+            data, periods = self.cache.get_batch([oil_name], self.start_year, self.end_year, granularity)
+            series = AppendableSeries(periods, data[0], granularity)
+            with self._lock:
+                series = self._series.setdefault(key, series)
+        return series
+
+    def append(self, oil_name, periods, values, granularity='Y'):
+        """Ajoute des périodes à une huile; retourne la nouvelle version de sa série"""
+        series = self.series(oil_name, granularity)
+        with self._lock:
+            return series.append(periods, values)
+
+    def snapshot(self, oil_name, granularity='Y'):
+        """(DataFrame, agrégats, version) cohérents d'une huile"""
+        series = self.series(oil_name, granularity)
+        with self._lock:
+            return series.frame(), series.aggregates.copy(), series.version
+
+    def appended(self, granularity='Y'):
+        """{huile: (version, dernière période)} des séries qui ont reçu des ajouts"""
+        with self._lock:
+            return {oil: (series.version, series.values[-1].copy())
+                    for (oil, series_granularity), series in self._series.items()
+                    if series_granularity == granularity and series.version}
+
+    def reset(self, oil_name=None):
+        """Oublie les ajouts (d'une huile ou de toutes) et repart de l'historique"""
+        with self._lock:
+            for key in [key for key in self._series if oil_name in (None, key[0])]:
+                del self._series[key]
+
+def _period_year(period, granularity):
+    if granularity == 'Y':
+        return int(period)
+    return int(np.datetime64(period, 'Y').astype(int)) + 1970
+
+def simulated_periods(generator, series, oil_name):
+    """Année suivante d'une série, simulée par le générateur (flux de démonstration)
+
+    Le générateur évalue les tendances depuis le début de la plage: l'année est
+    générée avec l'historique puis seules ses périodes sont gardées.
+    """
+    first_year = _period_year(series.periods[0], series.granularity)
+    year = _period_year(series.periods[-1], series.granularity) + 1
+    rng = np.random.default_rng([generator.seed, year, len(series)])
+    data, periods = generator.generate([oil_name], first_year, year, rng=rng, granularity=series.granularity)
+    new = len(period_axis(year, year, series.granularity))
+    return periods[-new:], data[0, -new:]
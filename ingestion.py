@@ -0,0 +1,319 @@
+"""Ingestion asynchrone des flux régionaux (douanes, indices de prix, publications, surfaces)
+
+    python ingestion.py --base-url http://flux.example.org --output flux.parquet
+    python ingestion.py --stub --latency 0.05 --failure-rate 0.1 --output flux.parquet
+
+Chaque flux fournit un indicateur par huile (GET <url>?huile=...&start_year=...&end_year=...,
+réponse JSON {"annees": [...], "valeurs": [...]}). Toutes les requêtes (huiles × flux)
+partent ensemble sur une boucle asyncio: la concurrence est bornée par un sémaphore,
+les connexions HTTP/1.1 sont réutilisées (pool par hôte), et chaque requête a son
+délai maximal et ses nouvelles tentatives (backoff exponentiel). Les séries reçues
+sont fusionnées au schéma du dashboard (Huile, Annee, indicateurs); le fichier écrit
+s'ouvre avec DASHBOARD_DATA_SOURCE.
+"""
+import argparse
+import asyncio
+import json
+import random
+import ssl
+import time
+from urllib.parse import urlencode, urlsplit
+
+import numpy as np
+
+from catalog import get_catalog
+from data_sources import (
+    DEFAULT_SEED, INDICATOR_INDEX, MEASURE_DTYPE, cube_to_panel, open_data_source, write_columnar
+)
+
+# Flux: nom -> (indicateur alimenté, chemin sous l'URL de base)
+FEEDS = {
+    'douanes': ('Exportations', '/douanes/exportations'),
+    'prix': ('Prix_Moyen', '/indices/prix'),
+    'publications': ('Etudes_Scientifiques', '/publications'),
+    'surfaces': ('Surface_Cultivee', '/surfaces'),
+}
+
+MAX_CONCURRENCY = 32
+CONNECTIONS_PER_HOST = 16
+REQUEST_TIMEOUT = 10.0
+RETRIES = 3
+BACKOFF = 0.2
+# Réponses temporaires: la requête est retentée
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class FeedError(Exception):
+    """Échec définitif d'une requête de flux (après les nouvelles tentatives)"""
+
+class ConnectionPool:
+    """Connexions HTTP/1.1 persistantes par hôte, au plus `limit_per_host` ouvertes à la fois"""
+
+    def __init__(self, limit_per_host=CONNECTIONS_PER_HOST):
+        self.limit_per_host = limit_per_host
+        self.opened = 0
+        self.reused = 0
+        self._idle = {}
+        self._slots = {}
+
+    async def acquire(self, key):
+        """(reader, writer) vers (schéma, hôte, port): connexion inactive réutilisée, sinon ouverte"""
+        slots = self._slots.setdefault(key, asyncio.Semaphore(self.limit_per_host))
+        await slots.acquire()
+        idle = self._idle.setdefault(key, [])
+        while idle:
+            reader, writer = idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                self.reused += 1
+                return reader, writer
+            writer.close()
+        scheme, host, port = key
+        try:
+            connection = await asyncio.open_connection(
+                host, port, ssl=ssl.create_default_context() if scheme == 'https' else None)
+        except BaseException:
+            slots.release()
+            raise
+        self.opened += 1
+        return connection
+
+    def release(self, key, reader, writer, reuse):
+        """Rend une connexion au pool (ou la ferme si elle n'est plus réutilisable)"""
+        if reuse and not writer.is_closing():
+            self._idle[key].append((reader, writer))
+        else:
+            writer.close()
+        self._slots[key].release()
+
+    async def close(self):
+        for idle in self._idle.values():
+            for _, writer in idle:
+                writer.close()
+                try:
+                    await writer.wait_closed()
+                except OSError:
+                    pass
+            idle.clear()
+
+async def _read_response(reader):
+    """Statut, en-têtes, corps et réutilisabilité de la connexion (Content-Length, chunked ou fin de flux)"""
+    version, status, _ = (await reader.readuntil(b'\r\n')).decode('latin-1').split(' ', 2)
+    headers = {}
+    while True:
+        line = await reader.readuntil(b'\r\n')
+        if line == b'\r\n':
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    reuse = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        chunks = []
+        while True:
+            size = int((await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+            chunk = await reader.readexactly(size + 2)
+            if size == 0:
+                break
+            chunks.append(chunk[:-2])
+        body = b''.join(chunks)
+    elif 'content-length' in headers:
+        body = await reader.readexactly(int(headers['content-length']))
+    else:
+        body, reuse = await reader.read(), False
+    return int(status), headers, body, reuse
+
+async def http_get(pool, url):
+    """GET sur une connexion du pool; retourne (statut, corps)"""
+    parts = urlsplit(url)
+    port = parts.port or (443 if parts.scheme == 'https' else 80)
+    key = (parts.scheme, parts.hostname, port)
+    target = parts.path + (f'?{parts.query}' if parts.query else '')
+    reader, writer = await pool.acquire(key)
+    reuse = False
+    try:
+        writer.write(f'GET {target} HTTP/1.1\r\nHost: {parts.netloc}\r\nAccept: application/json\r\n'
+                     f'Connection: keep-alive\r\n\r\n'.encode('latin-1'))
+        await writer.drain()
+        status, _, body, reuse = await _read_response(reader)
+        return status, body
+    finally:
+        # Une requête interrompue (délai, annulation) laisse la connexion dans un état inconnu: fermée
+        pool.release(key, reader, writer, reuse)
+
+def parse_series(body, url):
+    """(années, valeurs) d'une réponse de flux; FeedError si le corps n'a pas la forme attendue"""
+    try:
+        payload = json.loads(body)
+        years = np.asarray(payload['annees'], dtype=np.int64)
+        values = np.asarray(payload['valeurs'], dtype=np.float64)
+    except (ValueError, TypeError, KeyError) as error:
+        raise FeedError(f"{url}: réponse invalide ({error!r})") from None
+    if years.ndim != 1 or years.shape != values.shape:
+        raise FeedError(f"{url}: réponse invalide ({len(years)} années pour {len(values)} valeurs)")
+    return years, values
+
+def feed_url(base_url, feed, oil_name, start_year, end_year):
+    _, path = FEEDS[feed]
+    query = urlencode({'huile': oil_name, 'start_year': start_year, 'end_year': end_year})
+    return f"{base_url.rstrip('/')}{path}?{query}"
+
+class FeedIngestor:
+    """Récupère les flux de plusieurs huiles en parallèle et les fusionne dans un cube d'indicateurs"""
+
+    def __init__(self, feed_urls, concurrency=MAX_CONCURRENCY, connections_per_host=CONNECTIONS_PER_HOST,
+                 timeout=REQUEST_TIMEOUT, retries=RETRIES, backoff=BACKOFF, seed=None):
+        # URL de base de chaque flux (les flux régionaux peuvent venir d'hôtes différents)
+        self.feed_urls = dict(feed_urls)
+        unknown = [feed for feed in self.feed_urls if feed not in FEEDS]
+        if unknown:
+            raise ValueError(f"Flux inconnus: {', '.join(unknown)}")
+        self.concurrency = concurrency
+        self.connections_per_host = connections_per_host
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._jitter = random.Random(seed)
+
+    async def _fetch(self, pool, semaphore, stats, url):
+        """(années, valeurs) d'un flux (None si la source ne couvre pas l'huile: 404)"""
+        error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                stats['retries'] += 1
+                await asyncio.sleep(self.backoff * 2 ** (attempt - 1) * (0.5 + self._jitter.random()))
+            try:
+                async with semaphore:
+                    stats['requests'] += 1
+                    status, body = await asyncio.wait_for(http_get(pool, url), self.timeout)
+            except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                    OSError, ValueError) as exc:
+                # ValueError et LimitOverrunError: ligne de statut ou d'en-tête illisible ou trop longue
+                error = exc
+                continue
+            if status == 200:
+                return parse_series(body, url)
+            if status == 404:
+                return None
+            error = FeedError(f"HTTP {status}")
+            if status not in RETRY_STATUSES:
+                break
+        raise FeedError(f"{url}: {error!r}") from error
+
+    async def fetch_all(self, oil_names, start_year=2000, end_year=2025):
+        """Cube (huiles × années × indicateurs alimentés, NaN si absent), années, indicateurs et rapport"""
+        oil_names = list(oil_names)
+        years = np.arange(start_year, end_year + 1)
+        feeds = list(self.feed_urls)
+        data = np.full((len(oil_names), len(years), len(feeds)), np.nan, dtype=MEASURE_DTYPE)
+        stats = {'requests': 0, 'retries': 0}
+        failures = []
+        pool = ConnectionPool(self.connections_per_host)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        jobs = [(i, k) for i in range(len(oil_names)) for k in range(len(feeds))]
+
+        started = time.perf_counter()
+        try:
+            results = await asyncio.gather(*(
+                self._fetch(pool, semaphore, stats,
+                            feed_url(self.feed_urls[feeds[k]], feeds[k], oil_names[i], start_year, end_year))
+                for i, k in jobs
+            ), return_exceptions=True)
+        finally:
+            await pool.close()
+
+        missing = 0
+        for (i, k), result in zip(jobs, results):
+            if isinstance(result, BaseException):
+                failures.append({'huile': oil_names[i], 'flux': feeds[k], 'erreur': str(result)})
+                continue
+            if result is None:
+                missing += 1
+                continue
+            result_years, values = result
+            inside = (result_years >= start_year) & (result_years <= end_year)
+            values = values[inside]
+            data[i, result_years[inside] - start_year, k] = values
+
+        report = {
+            'huiles': len(oil_names),
+            'flux': feeds,
+            'requetes': stats['requests'],
+            'nouvelles_tentatives': stats['retries'],
+            'connexions_ouvertes': pool.opened,
+            'connexions_reutilisees': pool.reused,
+            'series_absentes': missing,
+            'echecs': failures,
+            'duree_s': time.perf_counter() - started,
+        }
+        return data, years, [FEEDS[feed][0] for feed in feeds], report
+
+    def ingest(self, oil_names, start_year=2000, end_year=2025, base=None):
+        """Panel long au schéma du dashboard et rapport d'ingestion
+
+        Les indicateurs non alimentés viennent de `base` (DataSource, le générateur par
+        exemple) ou restent NaN; un flux en échec laisse son indicateur à NaN.
+        """
+        oil_names = list(oil_names)
+        fed, years, indicators, report = asyncio.run(self.fetch_all(oil_names, start_year, end_year))
+        if base is not None:
+            data, _ = base.load_batch(oil_names, start_year, end_year)
+            data = np.asarray(data, dtype=MEASURE_DTYPE).copy()
+        else:
+            data = np.full((len(oil_names), len(years), len(INDICATOR_INDEX)), np.nan, dtype=MEASURE_DTYPE)
+        data[:, :, [INDICATOR_INDEX[name] for name in indicators]] = fed
+        return cube_to_panel(data, oil_names, years), report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingestion asynchrone des flux régionaux des huiles essentielles")
+    parser.add_argument('--output', required=True, help="Fichier produit (.parquet ou .arrow)")
+    parser.add_argument('--base-url', help="URL de base commune à tous les flux")
+    parser.add_argument('--feed-url', action='append', default=[], metavar='FLUX=URL',
+                        help="URL de base d'un flux (répétable), prioritaire sur --base-url")
+    parser.add_argument('--oils', nargs='*', help="Huiles à ingérer (tout le catalogue par défaut)")
+    parser.add_argument('--start-year', type=int, default=2000)
+    parser.add_argument('--end-year', type=int, default=2025)
+    parser.add_argument('--concurrency', type=int, default=MAX_CONCURRENCY, help="Requêtes simultanées")
+    parser.add_argument('--connections', type=int, default=CONNECTIONS_PER_HOST, help="Connexions par hôte")
+    parser.add_argument('--timeout', type=float, default=REQUEST_TIMEOUT, help="Délai par tentative (s)")
+    parser.add_argument('--retries', type=int, default=RETRIES)
+    parser.add_argument('--fill-from', default='synthetic',
+                        help="Source des indicateurs non alimentés ('synthetic', fichier, ou 'none')")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--stub', action='store_true', help="Démarre un serveur de flux simulé local")
+    parser.add_argument('--latency', type=float, default=0.0, help="Latence du serveur simulé (s)")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="Part de réponses 503 du serveur simulé")
+    args = parser.parse_args(argv)
+
+    catalog = get_catalog()
+    stub = None
+    base_url = args.base_url
+    if args.stub:
+        import threading
+        from feed_stub import make_stub_server
+        stub = make_stub_server(port=0, catalog=catalog, seed=args.seed, latency=args.latency,
+                                failure_rate=args.failure_rate)
+        threading.Thread(target=stub.serve_forever, daemon=True).start()
+        base_url = f'http://127.0.0.1:{stub.server_port}'
+    feed_urls = {feed: base_url for feed in FEEDS} if base_url else {}
+    for entry in args.feed_url:
+        feed, _, url = entry.partition('=')
+        feed_urls[feed] = url
+    if not feed_urls:
+        parser.error("--base-url, --feed-url ou --stub requis")
+
+    ingestor = FeedIngestor(feed_urls, args.concurrency, args.connections, args.timeout, args.retries)
+    base = None if args.fill_from == 'none' else open_data_source(args.fill_from, catalog, seed=args.seed)
+    try:
+        panel, report = ingestor.ingest(args.oils or list(catalog.names), args.start_year, args.end_year, base)
+    finally:
+        if stub is not None:
+            stub.shutdown()
+    write_columnar(panel, args.output)
+
+    print(f"{report['requetes']} requêtes ({report['nouvelles_tentatives']} nouvelles tentatives, "
+          f"{report['connexions_ouvertes']} connexions) en {report['duree_s']:.2f} s; "
+          f"{len(panel)} lignes écrites dans {args.output}")
+    for failure in report['echecs']:
+        print(f"  échec {failure['flux']} / {failure['huile']}: {failure['erreur']}")
+
+if __name__ == '__main__':
+    main()
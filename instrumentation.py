@@ -0,0 +1,161 @@
+"""Instrumentation des sections chaudes: temps par section et par rerun, exports JSON/Prometheus et profil cProfile
+
+Désactivée par défaut: hors d'un rerun instrumenté, `section()` se réduit à la lecture
+d'une variable de contexte. Les sections s'imbriquent (chemins « parent/enfant »), ce
+qui sépare génération, pandas, construction et sérialisation des figures.
+"""
+import cProfile
+import functools
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Rerun instrumenté en cours dans ce thread (None: instrumentation inactive)
+_current_rerun = ContextVar('dashboard_rerun', default=None)
+
+class RerunTimings:
+    """Temps des sections d'un rerun, dans l'ordre où elles se terminent"""
+
+    def __init__(self):
+        self.sections = []
+        self.total = None
+        self.profile_path = None
+        self._stack = []
+        self._started = time.perf_counter()
+
+    def finish(self):
+        self.total = time.perf_counter() - self._started
+
+    def summary(self):
+        """Temps par chemin de section: total, temps propre (hors sous-sections) et appels"""
+        summary = {}
+        for path, seconds in self.sections:
+            entry = summary.setdefault(path, {'seconds': 0.0, 'self_seconds': 0.0, 'calls': 0})
+            entry['seconds'] += seconds
+            entry['self_seconds'] += seconds
+            entry['calls'] += 1
+        for path, seconds in self.sections:
+            parent = path.rpartition('/')[0]
+            if parent in summary:
+                summary[parent]['self_seconds'] -= seconds
+        return summary
+
+@contextmanager
+def section(name):
+    """Mesure le bloc `with` comme sous-section de la section courante"""
+    rerun = _current_rerun.get()
+    if rerun is None:
+        yield
+        return
+    rerun._stack.append(name)
+    path = '/'.join(rerun._stack)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        rerun.sections.append((path, time.perf_counter() - started))
+        rerun._stack.pop()
+
+def timed(name=None):
+    """Décorateur: chaque appel de la fonction est une section (nom de la fonction par défaut)"""
+    def decorator(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_rerun.get() is None:
+                return func(*args, **kwargs)
+            with section(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+class TimingRegistry:
+    """Agrégats des reruns du processus: appels, temps total et maximum par section"""
+
+    def __init__(self):
+        self.reruns = 0
+        self._sections = {}
+        self._lock = threading.Lock()
+
+    def record(self, rerun):
+        with self._lock:
+            self.reruns += 1
+            for path, seconds in [('rerun', rerun.total)] + rerun.sections:
+                entry = self._sections.setdefault(path, {'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0})
+                entry['calls'] += 1
+                entry['seconds'] += seconds
+                entry['max_seconds'] = max(entry['max_seconds'], seconds)
+
+    def snapshot(self):
+        with self._lock:
+            return {'reruns': self.reruns,
+                    'sections': {path: dict(entry) for path, entry in self._sections.items()}}
+
+    def to_json(self):
+        """Export JSON des agrégats"""
+        return json.dumps(self.snapshot(), indent=2, ensure_ascii=False)
+
+    def to_prometheus(self):
+        """Export au format texte Prometheus (summary par section, maximum en gauge)"""
+        snapshot = self.snapshot()
+        lines = [
+            '# HELP dashboard_reruns_total Reruns instrumentés',
+            '# TYPE dashboard_reruns_total counter',
+            f"dashboard_reruns_total {snapshot['reruns']}",
+            '# HELP dashboard_section_seconds Temps passé par section',
+            '# TYPE dashboard_section_seconds summary',
+        ]
+        for path, entry in sorted(snapshot['sections'].items()):
+            label = path.replace('\\', '\\\\').replace('"', '\\"')
+            lines.append(f'dashboard_section_seconds_sum{{section="{label}"}} {entry["seconds"]:.6f}')
+            lines.append(f'dashboard_section_seconds_count{{section="{label}"}} {entry["calls"]}')
+        lines += [
+            '# HELP dashboard_section_max_seconds Temps maximal d\'un appel par section',
+            '# TYPE dashboard_section_max_seconds gauge',
+        ]
+        for path, entry in sorted(snapshot['sections'].items()):
+            label = path.replace('\\', '\\\\').replace('"', '\\"')
+            lines.append(f'dashboard_section_max_seconds{{section="{label}"}} {entry["max_seconds"]:.6f}')
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self._lock:
+            self.reruns = 0
+            self._sections.clear()
+
+# Agrégats partagés par toutes les sessions du processus
+REGISTRY = TimingRegistry()
+
+@contextmanager
+def instrumented_rerun(enabled=True, profile=False, registry=REGISTRY, profile_dir=None):
+    """Active l'instrumentation pour un rerun; produit le RerunTimings (None si désactivé)
+
+    Avec `profile`, le rerun est aussi profilé par cProfile et le fichier .prof
+    (lisible par pstats, snakeviz ou flameprof pour un flamegraph) est écrit dans
+    `profile_dir` (répertoire temporaire par défaut).
+    """
+    if not enabled:
+        yield None
+        return
+    rerun = RerunTimings()
+    token = _current_rerun.set(rerun)
+    profiler = cProfile.Profile() if profile else None
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield rerun
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        _current_rerun.reset(token)
+        rerun.finish()
+        registry.record(rerun)
+        if profiler is not None:
+            profile_dir = profile_dir or tempfile.gettempdir()
+            rerun.profile_path = os.path.join(profile_dir, f"dashboard_rerun_{time.time_ns()}.prof")
+            profiler.dump_stats(rerun.profile_path)
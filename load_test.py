@@ -0,0 +1,153 @@
+"""Test de charge multi-sessions: N utilisateurs simulés (AppTest) sur un même processus
+
+    python load_test.py                          # 50, 200 puis 1000 utilisateurs
+    python load_test.py --users 50 --concurrency 25 --json charge.json
+
+Chaque utilisateur ouvre sa session, choisit une huile et une vue au hasard puis
+relance le script plusieurs fois. Les ressources partagées (catalogue, séries,
+figures) sont créées une seule fois par processus: la mémoire par session mesurée
+ici est ce qui reste propre à chaque utilisateur.
+
+Le runtime d'AppTest est global au processus: les sessions d'une vague restent
+ouvertes ensemble et leurs reruns sont entrelacés, mais exécutés l'un après
+l'autre. La mémoire par session inclut l'arbre d'éléments qu'AppTest garde côté
+« navigateur »: c'est une borne haute.
+"""
+import argparse
+import gc
+import json
+import os
+import pickle
+import random
+import sys
+import time
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Dashboard.py')
+DEFAULT_USERS = (50, 200, 1000)
+
+def rss_bytes():
+    """Mémoire résidente actuelle du processus"""
+    try:
+        with open('/proc/self/statm') as handle:
+            return int(handle.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def session_state_bytes(app):
+    """Taille sérialisée de l'état de session (widgets et valeurs propres à l'utilisateur)"""
+    state = {key: app.session_state[key] for key in app.session_state}
+    try:
+        return len(pickle.dumps(state))
+    except Exception:
+        return None
+
+class SimulatedUser:
+    """Une session AppTest qui choisit au hasard une huile et une vue à chaque interaction"""
+
+    def __init__(self, seed):
+        from streamlit.testing.v1 import AppTest
+
+        self.rng = random.Random(seed)
+        self.app = AppTest.from_file(APP_PATH, default_timeout=300)
+        self.latencies = []
+        self.errors = set()
+
+    def step(self):
+        """Un rerun (le premier affiche la page par défaut)"""
+        if self.latencies:
+            oil_box = self.app.selectbox[0]
+            oil_box.set_value(self.rng.choice(oil_box.options))
+            if self.app.radio:
+                # Vues calculées à la demande, hors onglet temps réel
+                self.app.radio[0].set_value(self.rng.choice(self.app.radio[0].options[:-1]))
+        started = time.perf_counter()
+        self.app.run()
+        self.latencies.append(time.perf_counter() - started)
+        self.errors.update(error.message for error in self.app.exception)
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+def run_load(users, reruns=3, concurrency=50, seed=0):
+    """Simule `users` sessions par vagues de `concurrency` sessions ouvertes simultanément"""
+    latencies, errors, state_sizes, per_session = [], set(), [], []
+    gc.collect()
+    rss_start = rss_bytes()
+    started = time.perf_counter()
+
+    for first in range(0, users, concurrency):
+        gc.collect()
+        rss_before = rss_bytes()
+        wave = [SimulatedUser(seed + i) for i in range(first, min(first + concurrency, users))]
+        for _ in range(reruns + 1):
+            for user in wave:
+                user.step()
+        # Toutes les sessions de la vague sont encore ouvertes
+        gc.collect()
+        per_session.append((rss_bytes() - rss_before) / len(wave))
+        for user in wave:
+            latencies.extend(user.latencies)
+            errors.update(user.errors)
+            size = session_state_bytes(user.app)
+            if size is not None:
+                state_sizes.append(size)
+        del wave
+
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    report = {
+        'users': users,
+        'reruns_per_user': reruns + 1,
+        'concurrency': concurrency,
+        'elapsed_s': elapsed,
+        'rerun_p50_s': percentile(latencies, 50),
+        'rerun_p95_s': percentile(latencies, 95),
+        'rerun_max_s': max(latencies),
+        'rss_start_mb': rss_start / 1e6,
+        'rss_end_mb': rss_bytes() / 1e6,
+        'rss_per_session_kb': max(per_session) / 1e3,
+        'session_state_bytes': sum(state_sizes) / len(state_sizes) if state_sizes else None,
+        'errors': sorted(errors),
+    }
+
+    # Ressources partagées: une seule instance du dashboard doit exister, quel que soit N
+    from dashboard_core import CompleteEssentialOilDashboard
+    instances = [obj for obj in gc.get_objects() if isinstance(obj, CompleteEssentialOilDashboard)]
+    report['dashboard_instances'] = len(instances)
+    if not instances:
+        return report
+    dashboard = instances[0]
+    report['shared'] = {
+        'dataset_cache': dashboard.cache.stats(),
+        'figure_cache': dashboard.figures.stats(),
+        'memory_budget': dashboard.memory_budget.stats() if dashboard.memory_budget else None,
+    }
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Test de charge multi-sessions du dashboard")
+    parser.add_argument('--users', type=int, nargs='+', default=list(DEFAULT_USERS),
+                        help="Nombres d'utilisateurs simulés (un palier par valeur)")
+    parser.add_argument('--reruns', type=int, default=3, help="Interactions par utilisateur")
+    parser.add_argument('--concurrency', type=int, default=50, help="Sessions ouvertes simultanément")
+    parser.add_argument('--json', help="Fichier de sortie JSON")
+    args = parser.parse_args(argv)
+
+    reports = []
+    for users in args.users:
+        report = run_load(users, args.reruns, args.concurrency)
+        reports.append(report)
+        print(f"{users:>5} utilisateurs: p50 {report['rerun_p50_s'] * 1000:7.1f} ms | "
+              f"p95 {report['rerun_p95_s'] * 1000:7.1f} ms | "
+              f"{report['rss_per_session_kb']:8.1f} Ko RSS/session | "
+              f"état de session {report['session_state_bytes'] or 0:.0f} o | "
+              f"{len(report['errors'])} erreur(s)")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as handle:
+            json.dump(reports, handle, indent=2, default=str)
+    return 0 if not any(report['errors'] for report in reports) else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""Agrégats matérialisés de la vue marché: dernières valeurs par huile, totaux par type et classement
+
+La table est construite une fois par version du jeu de données (par blocs d'huiles,
+sans garder les séries complètes), puis tenue à jour quand des huiles changent.
+Le classement par valeur de marché est maintenu trié: le top-k se lit en O(k).
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from data_sources import INDICATOR_INDEX, MEASURE_DTYPE, oil_categorical
+
+# Nombre d'huiles du nuage prix/production (les premières par valeur de marché)
+SCATTER_OILS = 500
+
+class MarketAggregates:
+    """Table matérialisée du marché pour une liste d'huiles"""
+
+    def __init__(self, catalog, oil_names, latest, version=0):
+        self.catalog = catalog
+        self.oil_names = list(oil_names)
+        self.version = version
+        self._position = {name: i for i, name in enumerate(self.oil_names)}
+        self._latest = np.array(latest, dtype=MEASURE_DTYPE)
+        self._types = catalog.codes('type', self.oil_names)
+        self._type_counts = np.bincount(self._types, minlength=len(catalog.levels('type')))
+        self._type_totals = np.bincount(self._types, weights=self._rank_values(),
+                                        minlength=len(self._type_counts))
+        self._order = np.argsort(-self._rank_values(), kind='stable')
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, source, catalog, oil_names, start_year=2000, end_year=2025, block=1000, version=0):
+        """Matérialise la dernière année de chaque huile, bloc par bloc"""
+        oil_names = list(oil_names)
+        latest = np.empty((len(oil_names), len(INDICATOR_INDEX)), dtype=MEASURE_DTYPE)
+        for i in range(0, len(oil_names), block):
+            data, _ = source.load_batch(oil_names[i:i + block], start_year, end_year)
+            latest[i:i + block] = data[:, -1, :]
+        return cls(catalog, oil_names, latest, version)
+
+    def _rank_values(self, positions=None):
+        values = self._latest[:, INDICATOR_INDEX['Valeur_Marche']]
+        if positions is not None:
+            values = values[positions]
+        return np.nan_to_num(values, nan=0.0)
+
+    def __len__(self):
+        return len(self.oil_names)
+
+    def __contains__(self, oil_name):
+        return oil_name in self._position
+
+    def copy(self):
+        """Table indépendante (mêmes huiles et valeurs), modifiable sans toucher à l'originale"""
+        with self._lock:
+            return MarketAggregates(self.catalog, self.oil_names, self._latest, self.version)
+
+    def update(self, oil_names, latest):
+        """Remplace la dernière année d'huiles existantes et maintient totaux et classement"""
+        positions = np.fromiter((self._position[name] for name in oil_names), dtype=np.int64)
+        latest = np.atleast_2d(np.asarray(latest, dtype=MEASURE_DTYPE))
+        with self._lock:
+            np.subtract.at(self._type_totals, self._types[positions], self._rank_values(positions))
+            self._latest[positions] = latest
+            np.add.at(self._type_totals, self._types[positions], self._rank_values(positions))
+
+            # Réinsertion des huiles modifiées dans le classement (sans retrier le reste)
+            order = self._order[~np.isin(self._order, positions)]
+            keys = -self._rank_values(order)
+            new_keys = -self._rank_values(positions)
+            moved = np.argsort(new_keys, kind='stable')
+            slots = np.searchsorted(keys, new_keys[moved], side='right')
+            self._order = np.insert(order, slots, positions[moved])
+            self.version += 1
+
+    def frame(self, positions):
+        """Lignes de la table pour des positions données, au format de market_frame"""
+        names = [self.oil_names[i] for i in positions]
+        latest = self._latest[positions]
+        return pd.DataFrame({
+            'Huile': oil_categorical(names),
+            'Production (t)': latest[:, INDICATOR_INDEX['Production_Mondiale']],
+            'Prix (€/kg)': latest[:, INDICATOR_INDEX['Prix_Moyen']],
+            'Valeur Marché (M€)': latest[:, INDICATOR_INDEX['Valeur_Marche']],
+            'Type': self.catalog.categorical('type', names).remove_unused_categories(),
+            'Rendement (%)': (self.catalog.numeric('rendement', names) * 100).astype(MEASURE_DTYPE),
+            'Couleur': self.catalog.categorical('couleur', names).remove_unused_categories()
+        })
+
+    def top(self, k=10):
+        """Les k huiles de plus forte valeur de marché, par ordre décroissant"""
+        with self._lock:
+            positions = self._order[:k].copy()
+        return self.frame(positions)
+
+    def type_counts(self):
+        """Nombre d'huiles par type thérapeutique, par ordre décroissant"""
+        counts = pd.Series(self._type_counts, index=self.catalog.levels('type'))
+        return counts[counts > 0].sort_values(ascending=False, kind='stable')
+
+    def type_totals(self):
+        """Valeur de marché cumulée par type thérapeutique"""
+        with self._lock:
+            totals = pd.Series(self._type_totals.copy(), index=self.catalog.levels('type'))
+        return totals[self._type_counts > 0].sort_values(ascending=False, kind='stable')
@@ -0,0 +1,57 @@
+"""Budget mémoire global des caches partagés par toutes les sessions du processus
+
+Les caches inscrits (séries, figures) déclarent leur volume et la date d'accès de
+leur plus ancienne entrée; au-delà du budget, l'entrée la moins récemment utilisée,
+tous caches confondus, est évincée jusqu'à repasser sous la limite.
+"""
+import os
+import threading
+
+DEFAULT_BUDGET_MB = 512
+
+def budget_from_env(default_mb=DEFAULT_BUDGET_MB):
+    """Budget en octets lu dans DASHBOARD_MEMORY_BUDGET_MB"""
+    return int(float(os.environ.get('DASHBOARD_MEMORY_BUDGET_MB', default_mb)) * 1024 * 1024)
+
+class MemoryBudget:
+    """Limite commune à plusieurs caches LRU
+
+    Un cache inscrit expose `nbytes`, `oldest_access()` (None s'il est vide) et
+    `evict_oldest()` (octets libérés), et appelle `enforce()` après chaque insertion,
+    en dehors de son propre verrou.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._caches = []
+        self._lock = threading.Lock()
+
+    def register(self, cache):
+        self._caches.append(cache)
+
+    @property
+    def used(self):
+        return sum(cache.nbytes for cache in self._caches)
+
+    def enforce(self):
+        """Évince les entrées les plus anciennes jusqu'à respecter le budget"""
+        with self._lock:
+            while self.used > self.max_bytes:
+                candidates = [(cache.oldest_access(), cache) for cache in self._caches]
+                candidates = [(stamp, cache) for stamp, cache in candidates if stamp is not None]
+                if not candidates:
+                    break
+                _, cache = min(candidates, key=lambda candidate: candidate[0])
+                if not cache.evict_oldest():
+                    break
+                self.evictions += 1
+
+    def stats(self):
+        """Occupation par cache et totale"""
+        return {
+            'max_bytes': self.max_bytes,
+            'used_bytes': self.used,
+            'evictions': self.evictions,
+            'caches': {type(cache).__name__: cache.nbytes for cache in self._caches},
+        }
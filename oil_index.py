@@ -0,0 +1,182 @@
+"""Index inversé du catalogue: un bitset par terme (propriétés, molécules, régions, contre-indications)"""
+import bisect
+import unicodedata
+
+import numpy as np
+
+from catalog import LIST_FIELDS
+
+def normalize_term(term):
+    """Forme de recherche d'un terme: minuscules, sans accents"""
+    decomposed = unicodedata.normalize('NFKD', str(term).casefold())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).strip()
+
+class OilSet:
+    """Ensemble d'huiles sous forme de bitset (mots de 64 bits), combinable avec & | ~ -"""
+
+    __slots__ = ('words', 'size')
+
+    def __init__(self, words, size):
+        self.words = words
+        self.size = size
+
+    @classmethod
+    def empty(cls, size):
+        return cls(np.zeros((size + 63) // 64, dtype=np.uint64), size)
+
+    @classmethod
+    def full(cls, size):
+        return ~cls.empty(size)
+
+    @classmethod
+    def from_positions(cls, positions, size):
+        result = cls.empty(size)
+        positions = np.asarray(positions, dtype=np.uint64)
+        np.bitwise_or.at(result.words, positions >> np.uint64(6),
+                         np.uint64(1) << (positions & np.uint64(63)))
+        return result
+
+    def __and__(self, other):
+        return OilSet(self.words & other.words, self.size)
+
+    def __or__(self, other):
+        return OilSet(self.words | other.words, self.size)
+
+    def __sub__(self, other):
+        return OilSet(self.words & ~other.words, self.size)
+
+    def __invert__(self):
+        words = ~self.words
+        # Les bits au-delà de la dernière huile restent à zéro
+        tail = self.size % 64
+        if tail and len(words):
+            words[-1] &= np.uint64((1 << tail) - 1)
+        return OilSet(words, self.size)
+
+    def __len__(self):
+        return int(np.unpackbits(self.words.view(np.uint8)).sum())
+
+    def positions(self):
+        """Indices des huiles de l'ensemble"""
+        bits = np.unpackbits(self.words.astype('<u8').view(np.uint8), bitorder='little')
+        return np.flatnonzero(bits[:self.size])
+
+class OilIndex:
+    """Index inversé construit une fois à partir du catalogue
+
+    Exemple: huiles antivirales contenant du cinéole, sans contre-indication
+    pour la grossesse et produites hors de Madagascar::
+
+        q = (index.prefix('proprietes', 'antivir')
+             & index.term('molecules_principales', 'Cinéole')
+             - index.term('contre_indications', 'Femmes enceintes')
+             - index.term('regions', 'Madagascar'))
+        index.names(q)
+    """
+
+    FIELDS = LIST_FIELDS + ('type',)
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.size = len(catalog)
+        self._bitsets = {}
+        self._sorted_terms = {}
+        self._labels = {}
+        for field in LIST_FIELDS:
+            offsets, codes, vocabulary = catalog.list_field(field)
+            rows = np.repeat(np.arange(self.size), np.diff(offsets))
+            self._add_field(field, rows, codes, vocabulary)
+        for field in ('type',):
+            self._add_field(field, np.arange(self.size), catalog.codes(field), catalog.levels(field))
+
+        # Recherche par préfixe sur le nom des huiles
+        self._sorted_names = sorted((normalize_term(name), i) for i, name in enumerate(catalog.names))
+
+    def _add_field(self, field, rows, codes, vocabulary):
+        # Regroupement des lignes par terme normalisé, puis un bitset par groupe
+        keys = [normalize_term(term) for term in vocabulary]
+        unique_keys = sorted(set(keys))
+        key_positions = {key: k for k, key in enumerate(unique_keys)}
+        key_codes = np.array([key_positions[key] for key in keys], dtype=np.int64)
+        term_codes = key_codes[codes] if len(codes) else np.zeros(0, dtype=np.int64)
+        order = np.argsort(term_codes, kind='stable')
+        bounds = np.searchsorted(term_codes[order], np.arange(len(unique_keys) + 1))
+
+        bitsets = {}
+        for k, key in enumerate(unique_keys):
+            bitsets[key] = OilSet.from_positions(rows[order[bounds[k]:bounds[k + 1]]], self.size)
+        self._bitsets[field] = bitsets
+        self._sorted_terms[field] = unique_keys
+        labels = {}
+        for key, term in zip(keys, vocabulary):
+            labels.setdefault(key, term)
+        self._labels[field] = labels
+
+    def terms(self, field):
+        """Termes indexés d'un champ (forme d'origine), triés"""
+        return sorted(self._labels[field].values(), key=normalize_term)
+
+    def all(self):
+        return OilSet.full(self.size)
+
+    def term(self, field, value):
+        """Huiles dont le champ contient exactement `value` (casse et accents ignorés)"""
+        bitset = self._bitsets[field].get(normalize_term(value))
+        return OilSet(bitset.words, self.size) if bitset is not None else OilSet.empty(self.size)
+
+    def prefix(self, field, prefix):
+        """Huiles dont le champ contient un terme commençant par `prefix`"""
+        result = OilSet.empty(self.size)
+        for key in self.expand_prefix(field, prefix):
+            result = result | self._bitsets[field][key]
+        return result
+
+    def expand_prefix(self, field, prefix):
+        """Termes normalisés commençant par `prefix`"""
+        prefix = normalize_term(prefix)
+        terms = self._sorted_terms[field]
+        start = bisect.bisect_left(terms, prefix)
+        end = bisect.bisect_left(terms, prefix + '\uffff')
+        return terms[start:end]
+
+    def any_of(self, field, values):
+        """OU sur une liste de termes"""
+        result = OilSet.empty(self.size)
+        for value in values:
+            result = result | self.term(field, value)
+        return result
+
+    def all_of(self, field, values):
+        """ET sur une liste de termes"""
+        result = self.all()
+        for value in values:
+            result = result & self.term(field, value)
+        return result
+
+    def name_prefix(self, prefix):
+        """Huiles dont le nom commence par `prefix`"""
+        prefix = normalize_term(prefix)
+        start = bisect.bisect_left(self._sorted_names, (prefix,))
+        end = bisect.bisect_left(self._sorted_names, (prefix + '\uffff',))
+        return OilSet.from_positions([i for _, i in self._sorted_names[start:end]], self.size)
+
+    def names(self, oil_set):
+        """Noms des huiles d'un ensemble, dans l'ordre du catalogue"""
+        names = self.catalog.names
+        return [names[i] for i in oil_set.positions()]
+
+    def search(self, require=None, any_of=None, exclude=None, prefixes=None):
+        """Requête combinée: `require`/`any_of`/`exclude` sont des dicts {champ: [termes]},
+        `prefixes` un dict {champ: préfixe}"""
+        result = self.all()
+        for field, values in (require or {}).items():
+            result = result & self.all_of(field, values)
+        for field, values in (any_of or {}).items():
+            if values:
+                result = result & self.any_of(field, values)
+        for field, prefix in (prefixes or {}).items():
+            if prefix:
+                result = result & self.prefix(field, prefix)
+        for field, values in (exclude or {}).items():
+            result = result - self.any_of(field, values)
+        return result
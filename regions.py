@@ -0,0 +1,172 @@
+"""Répartition géographique de la production: matrice creuse huile × région × année
+
+Chaque huile n'est produite que dans les quelques régions de sa fiche: les parts
+sont stockées au format CSR (une ligne par huile, une entrée par région), avec une
+colonne par année. Les agrégations par pays passent par une permutation triée par
+région et np.add.reduceat, sans boucle Python ni matrice dense huiles × pays.
+"""
+import numpy as np
+import pandas as pd
+
+from data_sources import INDICATOR_INDEX, MEASURE_DTYPE
+
+# Codes ISO 3166-1 alpha-3 des régions du catalogue (None: zone sans code pays)
+REGION_ISO3 = {
+    'France': 'FRA', 'Bulgarie': 'BGR', 'Chine': 'CHN', 'USA': 'USA', 'Inde': 'IND',
+    'Australie': 'AUS', 'Afrique du Sud': 'ZAF', 'Portugal': 'PRT', 'Madagascar': 'MDG',
+    'Comores': 'COM', 'Nepal': 'NPL', 'Indonésie': 'IDN', 'Mayotte': 'MYT',
+    'Sri Lanka': 'LKA', 'Italie': 'ITA', 'Espagne': 'ESP', 'Argentine': 'ARG', 'Maroc': 'MAR',
+    'Tunisie': 'TUN', 'Egypte': 'EGY', 'Réunion': 'REU', 'Allemagne': 'DEU', 'Croatie': 'HRV',
+    'Nouvelle-Calédonie': 'NCL', 'Himalaya': None, 'Oman': 'OMN', 'Somalie': 'SOM',
+    'Ethiopie': 'ETH', 'Yémen': 'YEM', 'Haïti': 'HTI',
+}
+# Graphies d'une même région dans les fiches
+REGION_ALIASES = {'Indonesie': 'Indonésie'}
+
+# Dérive annuelle des parts: la première région de la fiche (historique) cède du terrain aux suivantes
+LEADER_DRIFT = -0.005
+FOLLOWER_DRIFT = 0.01
+
+def hhi(shares, axis=-1):
+    """Indice de Herfindahl-Hirschman (0 à 10 000) de parts dont la somme vaut 1"""
+    return (np.square(shares) * 10000).sum(axis=axis)
+
+def allocation_shares(catalog, oil_names, years):
+    """Parts CSR (offsets par huile, codes région, parts entrées × années) tirées des fiches
+
+    Les régions sont pondérées par leur rang dans la fiche (1, 1/2, 1/3...), et les
+    poids dérivent linéairement dans le temps avant d'être renormalisés chaque année.
+    """
+    offsets, codes, vocabulary = catalog.list_field('regions')
+    # Les variantes de graphie partagent le code de leur forme canonique
+    regions = list(dict.fromkeys(REGION_ALIASES.get(region, region) for region in vocabulary))
+    canonical = np.array([regions.index(REGION_ALIASES.get(region, region)) for region in vocabulary],
+                         dtype=codes.dtype)
+    positions = catalog.positions(oil_names)
+    starts, lengths = offsets[positions], offsets[positions + 1] - offsets[positions]
+    row_offsets = np.concatenate([[0], np.cumsum(lengths)])
+    gather = np.repeat(starts - row_offsets[:-1], lengths) + np.arange(row_offsets[-1])
+    rank = np.arange(row_offsets[-1]) - np.repeat(row_offsets[:-1], lengths)
+
+    elapsed = np.asarray(years, dtype=float) - years[0]
+    drift = np.where(rank == 0, LEADER_DRIFT, FOLLOWER_DRIFT)
+    weights = (1 / (rank + 1))[:, None] * np.maximum(1 + drift[:, None] * elapsed, 0.05)
+    totals = np.add.reduceat(weights, row_offsets[:-1][lengths > 0], axis=0)
+    shares = weights / np.repeat(totals, lengths[lengths > 0], axis=0)
+    return row_offsets, canonical[codes[gather]], shares.astype(MEASURE_DTYPE), regions
+
+class RegionalSupply:
+    """Production par huile, région et année, avec agrégations vectorisées sur tout le catalogue"""
+
+    def __init__(self, oil_names, years, row_offsets, region_codes, shares, regions, production):
+        self.oil_names = list(oil_names)
+        self.years = np.asarray(years)
+        self.regions = list(regions)
+        self._position = {name: i for i, name in enumerate(self.oil_names)}
+        self._region_index = {name: i for i, name in enumerate(self.regions)}
+        self._offsets = row_offsets
+        self._codes = region_codes
+        self._shares = shares
+        # Ligne (huile) de chaque entrée, et permutation triée par région pour les cumuls par pays
+        self._rows = np.repeat(np.arange(len(self.oil_names)), np.diff(row_offsets))
+        self._by_region = np.argsort(region_codes, kind='stable')
+        sorted_codes = region_codes[self._by_region]
+        self._region_starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]]) \
+            if len(sorted_codes) else np.empty(0, dtype=np.int64)
+        self._present = sorted_codes[self._region_starts]
+        self._oil_counts = np.bincount(region_codes, minlength=len(self.regions))
+        # Les parts sont fixes: la concentration de chaque huile est calculée une fois
+        self._oil_hhi = np.zeros((len(self.oil_names), len(self.years)), dtype=MEASURE_DTYPE)
+        filled = np.diff(row_offsets) > 0
+        if filled.any():
+            self._oil_hhi[filled] = np.add.reduceat(np.square(shares, dtype=np.float64) * 10000,
+                                                    row_offsets[:-1][filled], axis=0)
+        self.set_production(production)
+
+    @classmethod
+    def build(cls, source, catalog, oil_names, start_year=2000, end_year=2025, block=1000):
+        """Parts des fiches et production mondiale de chaque huile, chargée bloc par bloc"""
+        oil_names = list(oil_names)
+        years = source.year_axis(start_year, end_year)
+        production = np.empty((len(oil_names), len(years)), dtype=MEASURE_DTYPE)
+        for i in range(0, len(oil_names), block):
+            data, _ = source.load_batch(oil_names[i:i + block], start_year, end_year)
+            production[i:i + block] = data[:, :, INDICATOR_INDEX['Production_Mondiale']]
+        row_offsets, codes, shares, regions = allocation_shares(catalog, oil_names, years)
+        return cls(oil_names, years, row_offsets, codes, shares, regions, production)
+
+    def set_production(self, production):
+        """Remplace la production (huiles × années) et recalcule volumes et cumuls par région"""
+        self._production = np.nan_to_num(np.asarray(production, dtype=MEASURE_DTYPE))
+        self._volumes = self._shares * self._production[self._rows]
+        self._supply = np.zeros((len(self.regions), len(self.years)), dtype=np.float64)
+        if len(self._region_starts):
+            self._supply[self._present] = np.add.reduceat(self._volumes[self._by_region], self._region_starts,
+                                                          axis=0, dtype=np.float64)
+        self._world = self._production.sum(axis=0, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.oil_names)
+
+    def position(self, oil_name):
+        return self._position[oil_name]
+
+    def year_position(self, year):
+        return int(np.searchsorted(self.years, year))
+
+    def supply_by_region(self):
+        """Production par région (régions × années), en tonnes"""
+        return self._supply
+
+    def world_supply(self):
+        """Production mondiale par année (somme des huiles)"""
+        return self._world
+
+    def region_frame(self, year):
+        """Production, part mondiale et nombre d'huiles par région pour une année"""
+        t = self.year_position(year)
+        supply = self.supply_by_region()[:, t]
+        counts = self._oil_counts
+        frame = pd.DataFrame({
+            'Région': self.regions,
+            'ISO3': [REGION_ISO3.get(region) for region in self.regions],
+            'Production (t)': supply,
+            'Part mondiale (%)': supply / max(self.world_supply()[t], 1e-12) * 100,
+            'Huiles': counts,
+        })
+        return frame[frame['Huiles'] > 0].sort_values('Production (t)', ascending=False, ignore_index=True)
+
+    def market_hhi(self):
+        """Concentration géographique de l'offre mondiale par année (HHI des pays)"""
+        supply = self.supply_by_region()
+        return hhi(supply / np.maximum(supply.sum(axis=0), 1e-12), axis=0)
+
+    def oil_hhi(self):
+        """Concentration géographique de chaque huile (huiles × années)"""
+        return self._oil_hhi
+
+    def exposure(self, region):
+        """Part de l'offre mondiale provenant d'une région, par année"""
+        supply = self.supply_by_region()[self._region_index[region]]
+        return supply / np.maximum(self.world_supply(), 1e-12)
+
+    def oil_exposure(self, region, year):
+        """Part de la production de chaque huile réalisée dans une région (huiles exposées seulement)"""
+        entries = self._codes == self._region_index[region]
+        t = self.year_position(year)
+        return pd.DataFrame({
+            'Huile': [self.oil_names[i] for i in self._rows[entries]],
+            'Part (%)': self._shares[entries, t] * 100,
+            'Production régionale (t)': self._volumes[entries, t],
+        }).sort_values('Part (%)', ascending=False, ignore_index=True)
+
+    def oil_breakdown(self, oil_name, year):
+        """Répartition d'une huile entre ses régions pour une année"""
+        i = self._position[oil_name]
+        entries = slice(self._offsets[i], self._offsets[i + 1])
+        t = self.year_position(year)
+        return pd.DataFrame({
+            'Région': [self.regions[code] for code in self._codes[entries]],
+            'Part (%)': self._shares[entries, t] * 100,
+            'Production (t)': self._volumes[entries, t],
+        })
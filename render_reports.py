@@ -0,0 +1,156 @@
+"""Rendu hors ligne des rapports par huile (HTML, JSON, PNG), réparti sur un pool de processus
+
+    python render_reports.py --output rapports --formats html,json --workers 8
+"""
+import argparse
+import html
+import os
+import re
+import time
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from dashboard_core import CompleteEssentialOilDashboard
+from data_sources import DEFAULT_SEED, cube_to_frame
+from figures import build_market_figures, build_oil_figures
+from market import SCATTER_OILS, MarketAggregates
+
+FORMATS = ('html', 'json', 'png')
+
+# État de chaque processus de travail, initialisé une fois par _init_worker
+_worker = {}
+
+def slugify(name):
+    """Nom de fichier ASCII stable pour une huile"""
+    ascii_name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9]+', '-', ascii_name.lower()).strip('-') or 'huile'
+
+def write_figure(fig, path_base, formats):
+    """Écrit une figure dans chacun des formats demandés"""
+    written = []
+    for fmt in formats:
+        path = f"{path_base}.{fmt}"
+        if fmt == 'html':
+            fig.write_html(path, include_plotlyjs='cdn', full_html=True)
+        elif fmt == 'json':
+            with open(path, 'w', encoding='utf-8') as handle:
+                handle.write(fig.to_json())
+        elif fmt == 'png':
+            fig.write_image(path)
+        written.append(path)
+    return written
+
+def _init_worker(dataset_path, years, oil_names, data_source, seed):
+    # Le cube est mappé en mémoire: tous les processus partagent les mêmes pages
+    _worker['data'] = np.load(dataset_path, mmap_mode='r')
+    _worker['years'] = years
+    _worker['positions'] = {oil: i for i, oil in enumerate(oil_names)}
+    _worker['dashboard'] = CompleteEssentialOilDashboard(seed=seed, data_source=data_source)
+
+def _render_oil(oil_name, output_dir, formats):
+    dashboard = _worker['dashboard']
+    df = cube_to_frame(_worker['data'][_worker['positions'][oil_name]], _worker['years'])
+    oil_dir = os.path.join(output_dir, slugify(oil_name))
+    os.makedirs(oil_dir, exist_ok=True)
+
+    files = []
+    for name, fig in build_oil_figures(df, oil_name, dashboard.catalog.record(oil_name)).items():
+        files.extend(write_figure(fig, os.path.join(oil_dir, name), formats))
+    return oil_name, [os.path.relpath(path, output_dir) for path in files]
+
+def write_index(output_dir, reports, market_files):
+    """Page d'accueil listant les rapports générés"""
+    rows = []
+    for oil_name, files in reports:
+        links = ' · '.join(f'<a href="{html.escape(path)}">{html.escape(os.path.basename(path))}</a>'
+                           for path in files)
+        rows.append(f"<tr><td>{html.escape(oil_name)}</td><td>{links}</td></tr>")
+    market_links = ' · '.join(f'<a href="{html.escape(path)}">{html.escape(path)}</a>' for path in market_files)
+    page = f"""<!DOCTYPE html>
+<html lang="fr"><head><meta charset="utf-8"><title>Rapports Huiles Essentielles</title></head>
+<body>
+<h1>🌿 Rapports Pharmacopée - Huiles Essentielles</h1>
+<p>Généré le {time.strftime('%Y-%m-%d %H:%M')} - {len(reports)} huiles</p>
+<h2>🏢 Vue Marché</h2><p>{market_links}</p>
+<h2>Huiles</h2>
+<table><tr><th>Huile</th><th>Figures</th></tr>
+{chr(10).join(rows)}
+</table>
+</body></html>
+"""
+    path = os.path.join(output_dir, 'index.html')
+    with open(path, 'w', encoding='utf-8') as handle:
+        handle.write(page)
+    return path
+
+def render_reports(output_dir, formats=('html',), oil_names=None, workers=None,
+                   start_year=2000, end_year=2025, data_source=None, seed=DEFAULT_SEED):
+    """Génère les figures de toutes les huiles et la page d'index; retourne le chemin de l'index"""
+    unknown = [fmt for fmt in formats if fmt not in FORMATS]
+    if unknown:
+        raise ValueError(f"Formats non supportés: {', '.join(unknown)}")
+    if 'png' in formats:
+        # L'export PNG de Plotly repose sur kaleido
+        import kaleido  # noqa: F401
+
+    os.makedirs(output_dir, exist_ok=True)
+    dashboard = CompleteEssentialOilDashboard(seed=seed, data_source=data_source)
+    if oil_names is None:
+        oil_names = dashboard.available_oils()
+
+    # Un seul jeu de données, calculé ici et partagé par les processus via un fichier mappé
+    data, years = dashboard.cache.get_batch(oil_names, start_year, end_year)
+    dataset_path = os.path.join(output_dir, '.dataset.npy')
+    np.save(dataset_path, data)
+
+    market_dir = os.path.join(output_dir, 'marche')
+    os.makedirs(market_dir, exist_ok=True)
+    market_files = []
+    market = MarketAggregates(dashboard.catalog, oil_names, data[:, -1, :])
+    market_figures = build_market_figures(market.top(10), market.type_counts(),
+                                          market.top(SCATTER_OILS), len(market))
+    for name, fig in market_figures.items():
+        market_files.extend(os.path.relpath(path, output_dir)
+                            for path in write_figure(fig, os.path.join(market_dir, name), formats))
+
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(oil_names) // (workers * 4))
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(dataset_path, years, oil_names, data_source, seed)) as pool:
+            reports = list(pool.map(_render_oil, oil_names,
+                                    [output_dir] * len(oil_names), [formats] * len(oil_names),
+                                    chunksize=chunksize))
+    finally:
+        os.remove(dataset_path)
+
+    return write_index(output_dir, reports, market_files)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rendu hors ligne des rapports par huile essentielle")
+    parser.add_argument('--output', default='rapports', help="Répertoire de sortie")
+    parser.add_argument('--formats', default='html', help="Formats séparés par des virgules: html,json,png")
+    parser.add_argument('--oils', nargs='*', help="Huiles à rendre (toutes par défaut)")
+    parser.add_argument('--workers', type=int, default=None, help="Nombre de processus (CPU par défaut)")
+    parser.add_argument('--start-year', type=int, default=2000)
+    parser.add_argument('--end-year', type=int, default=2025)
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--data-source', default=os.environ.get('DASHBOARD_DATA_SOURCE'),
+                        help="Fichier Parquet/Arrow IPC (générateur par défaut)")
+    args = parser.parse_args(argv)
+    if args.oils:
+        available = CompleteEssentialOilDashboard(seed=args.seed, data_source=args.data_source).available_oils()
+        unknown = sorted(set(args.oils).difference(available))
+        if unknown:
+            parser.error(f"huiles inconnues ou absentes de la source: {', '.join(unknown)}")
+
+    started = time.perf_counter()
+    formats = tuple(fmt.strip() for fmt in args.formats.split(',') if fmt.strip())
+    index_path = render_reports(args.output, formats, args.oils, args.workers,
+                                args.start_year, args.end_year, args.data_source, args.seed)
+    print(f"Rapports écrits dans {index_path} en {time.perf_counter() - started:.1f} s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Moteur Monte Carlo: N trajectoires par huile et par indicateur, résumées en bandes de percentiles
+
+Les trajectoires suivent exactement les règles du générateur (tendance, volatilité,
+événements 2008/2020, bornes) et sont simulées en bloc, une huile à la fois pour
+borner la mémoire. Chaque huile reçoit son propre flux enfant d'une SeedSequence
+racine (spawn_key dérivée du nom), ce qui rend les résultats indépendants de
+l'ordre des huiles et du découpage entre processus.
+"""
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from data_sources import DEFAULT_SEED, INDICATOR_INDEX, indicator_factors
+
+# Indicateurs simulés par défaut: ceux de la grille production & marché
+FAN_INDICATORS = ('Production_Mondiale', 'Demande_Mondiale', 'Prix_Moyen', 'Valeur_Marche')
+DEFAULT_PERCENTILES = (5, 50, 95)
+
+# Étiquette distinguant ces flux de ceux du générateur de séries
+_SCENARIO_STREAM = 0x4D43
+
+def oil_stream(seed, oil_name):
+    """Flux enfant propre à une huile (équivalent à SeedSequence.spawn avec une clé stable)"""
+    return np.random.SeedSequence([seed, _SCENARIO_STREAM],
+                                  spawn_key=(zlib.crc32(oil_name.encode('utf-8')),))
+
+def simulate_paths(bases, years, n_paths, seed_sequence, indicators=FAN_INDICATORS):
+    """Trajectoires d'une huile: tableau float32 (années × indicateurs × trajectoires)
+
+    Les trajectoires sont sur le dernier axe, contigu, ce qui accélère le calcul des percentiles.
+    """
+    columns = [INDICATOR_INDEX[name] for name in indicators]
+    factors, volatility, events, lower, upper = indicator_factors(np.asarray(years))
+    level = (bases[columns] * factors[:, columns] * events[:, columns]).astype(np.float32)
+
+    rng = np.random.default_rng(seed_sequence)
+    paths = rng.standard_normal((len(years), len(columns), n_paths), dtype=np.float32)
+    paths *= volatility[columns].astype(np.float32)[:, None]
+    paths += 1
+    paths *= level[:, :, None]
+    np.clip(paths, lower[columns][:, None], upper[columns][:, None], out=paths)
+    return paths
+
+def _simulate_bands(bases_block, years, n_paths, streams, indicators, percentiles):
+    bands = np.empty((len(bases_block), len(percentiles), len(years), len(indicators)), dtype=np.float32)
+    for i, (bases, stream) in enumerate(zip(bases_block, streams)):
+        paths = simulate_paths(bases, years, n_paths, stream, indicators)
+        bands[i] = np.percentile(paths, percentiles, axis=-1)
+    return bands
+
+def percentile_bands(generator, oil_names, n_paths=10000, start_year=2000, end_year=2025,
+                     seed=DEFAULT_SEED, indicators=FAN_INDICATORS,
+                     percentiles=DEFAULT_PERCENTILES, workers=1):
+    """Bandes de percentiles (huiles × percentiles × années × indicateurs) et axe des années
+
+    `generator` est une SyntheticSource (paramètres des huiles). Avec `workers > 1`,
+    les huiles sont réparties en blocs sur un pool de processus.
+    """
+    oil_names = list(oil_names)
+    years = np.arange(start_year, end_year + 1)
+    bases = generator.indicator_bases(oil_names)
+    streams = [oil_stream(seed, oil) for oil in oil_names]
+
+    workers = min(workers or os.cpu_count() or 1, max(len(oil_names), 1))
+    if workers <= 1:
+        return _simulate_bands(bases, years, n_paths, streams, indicators, percentiles), years
+
+    blocks = np.array_split(np.arange(len(oil_names)), workers)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_simulate_bands, bases[block], years, n_paths,
+                        [streams[i] for i in block], indicators, percentiles)
+            for block in blocks if len(block)
+        ]
+        return np.concatenate([future.result() for future in futures]), years
+
+def oil_bands(generator, oil_name, n_paths=10000, start_year=2000, end_year=2025,
+              seed=DEFAULT_SEED, indicators=FAN_INDICATORS, percentiles=DEFAULT_PERCENTILES):
+    """Bandes d'une huile sous forme {indicateur: {percentile: série}}"""
+    bands, years = percentile_bands(generator, [oil_name], n_paths, start_year, end_year,
+                                    seed, indicators, percentiles)
+    return {
+        'Annee': years,
+        **{name: {p: bands[0, j, :, k] for j, p in enumerate(percentiles)}
+           for k, name in enumerate(indicators)}
+    }
@@ -0,0 +1,168 @@
+"""Analyse de sensibilité: grille d'hypothèses du générateur évaluée en un seul calcul diffusé
+
+Chaque combinaison de paramètres (tendances, volatilité, chocs 2008/2020, amélioration
+de l'efficacité) est appliquée aux mêmes tirages aléatoires que le générateur: à la
+combinaison de référence, les résultats sont exactement les KPI du dashboard. Le
+tableau (combinaisons × huiles × années × indicateurs) est évalué par blocs de
+combinaisons, éventuellement répartis sur un pool de processus.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from data_sources import EVENT_MULTIPLIERS, INDICATOR_INDEX, INDICATOR_SPECS
+
+_SPECS = {spec['name']: spec for spec in INDICATOR_SPECS}
+
+# Hypothèses balayées: nom -> (valeur de référence du générateur, libellé)
+PARAMETERS = {
+    'trend_production': (_SPECS['Production_Mondiale']['trend'], "Tendance production"),
+    'trend_prix': (_SPECS['Prix_Moyen']['trend'], "Tendance prix"),
+    'trend_demande': (_SPECS['Demande_Mondiale']['trend'], "Tendance demande"),
+    'trend_valeur': (_SPECS['Valeur_Marche']['trend'], "Tendance valeur marché"),
+    'volatilite': (_SPECS['Production_Mondiale'].get('volatility', 0.1), "Volatilité des tendances"),
+    'choc_2008': (EVENT_MULTIPLIERS[2008], "Choc 2008"),
+    'choc_2020': (EVENT_MULTIPLIERS[2020], "Choc 2020"),
+    'amelioration_efficacite': (_SPECS['Efficacite_Therapeutique']['improvement'], "Amélioration efficacité"),
+}
+PARAMETER_NAMES = list(PARAMETERS)
+
+# Indicateurs simulés: ceux des KPI, plus la demande (seule sortie de sa tendance)
+SWEEP_INDICATORS = ('Production_Mondiale', 'Prix_Moyen', 'Valeur_Marche', 'Efficacite_Therapeutique',
+                    'Demande_Mondiale')
+_TRENDS = {'Production_Mondiale': 'trend_production', 'Prix_Moyen': 'trend_prix',
+           'Valeur_Marche': 'trend_valeur', 'Demande_Mondiale': 'trend_demande'}
+
+# Résultats par combinaison (libellés des KPI de create_kpi_metrics)
+OUTCOMES = (
+    'Production (t)', 'Croissance production (%)', 'Prix (€/kg)', 'Croissance prix (%)',
+    'Valeur marché (M€)', 'Croissance valeur (%)', 'Efficacité (/100)', 'Gain efficacité (pts)',
+    'Demande (t)', 'Valeur cumulée (M€)',
+)
+
+COMBOS_PER_BLOCK = 256
+
+def baseline():
+    """Vecteur des valeurs de référence, dans l'ordre de PARAMETER_NAMES"""
+    return np.array([PARAMETERS[name][0] for name in PARAMETER_NAMES])
+
+def full_grid(ranges):
+    """Produit cartésien des valeurs de `ranges` {paramètre: valeurs}; les autres restent à la référence"""
+    names = list(ranges)
+    mesh = np.meshgrid(*(np.asarray(ranges[name], dtype=float) for name in names), indexing='ij')
+    combos = np.tile(baseline(), (mesh[0].size if names else 1, 1))
+    for name, values in zip(names, mesh):
+        combos[:, PARAMETER_NAMES.index(name)] = values.ravel()
+    return combos
+
+def one_at_a_time(spread=0.5, names=None):
+    """Référence puis, pour chaque paramètre, sa valeur ×(1 - spread) et ×(1 + spread)"""
+    names = PARAMETER_NAMES if names is None else list(names)
+    combos = np.tile(baseline(), (1 + 2 * len(names), 1))
+    for i, name in enumerate(names):
+        k = PARAMETER_NAMES.index(name)
+        combos[1 + 2 * i, k] *= 1 - spread
+        combos[2 + 2 * i, k] *= 1 + spread
+    return combos
+
+def sweep_inputs(generator, oil_names, start_year=2000, end_year=2025):
+    """Niveaux de base (huiles × indicateurs), bruit du générateur (huiles × années × indicateurs) et années"""
+    years = np.arange(start_year, end_year + 1)
+    columns = [INDICATOR_INDEX[name] for name in SWEEP_INDICATORS]
+    bases = generator.indicator_bases(oil_names)[:, columns]
+    # Mêmes tirages que SyntheticSource.load_batch (un flux par huile)
+    noise = np.stack([generator.oil_rng(oil).standard_normal((len(years), len(INDICATOR_SPECS)))
+                      for oil in oil_names])[:, :, columns]
+    return bases, noise, years
+
+def evaluate(bases, noise, years, combos):
+    """Résultats (combinaisons × OUTCOMES) des huiles cumulées, en un calcul diffusé
+
+    Les volumes (production, valeur, demande) sont sommés sur les huiles, prix et
+    efficacité moyennés: pour une seule huile, ce sont ses KPI.
+    """
+    combos = np.atleast_2d(combos)
+    p = {name: combos[:, k] for k, name in enumerate(PARAMETER_NAMES)}
+    index = years - years[0]
+    elapsed = years - 2000
+
+    # Facteurs (combinaisons × années × indicateurs), volatilités et chocs par combinaison
+    n_combos, n_years = len(combos), len(years)
+    factors = np.empty((n_combos, n_years, len(SWEEP_INDICATORS)))
+    volatility = np.empty((n_combos, len(SWEEP_INDICATORS)))
+    events = np.ones((n_combos, n_years, len(SWEEP_INDICATORS)))
+    shocks = np.ones((n_combos, n_years))
+    for year, name in ((2008, 'choc_2008'), (2020, 'choc_2020')):
+        shocks[:, years == year] = p[name][:, None]
+    for k, indicator in enumerate(SWEEP_INDICATORS):
+        if indicator in _TRENDS:
+            factors[:, :, k] = 1 + p[_TRENDS[indicator]][:, None] * index
+            volatility[:, k] = p['volatilite']
+            events[:, :, k] = shocks
+        else:
+            factors[:, :, k] = 1 + p['amelioration_efficacite'][:, None] * elapsed
+            volatility[:, k] = 0.05
+
+    values = (bases[None, :, None, :] * factors[:, None] * (1 + volatility[:, None, None, :] * noise[None])
+              * events[:, None])
+    values[..., SWEEP_INDICATORS.index('Efficacite_Therapeutique')] = np.minimum(
+        values[..., SWEEP_INDICATORS.index('Efficacite_Therapeutique')], 100)
+
+    totals = values.sum(axis=1)
+    means = values.mean(axis=1)
+    first, last = totals[:, 0], totals[:, -1]
+    k = {name: SWEEP_INDICATORS.index(name) for name in SWEEP_INDICATORS}
+    return np.stack([
+        last[:, k['Production_Mondiale']],
+        (last[:, k['Production_Mondiale']] / first[:, k['Production_Mondiale']] - 1) * 100,
+        means[:, -1, k['Prix_Moyen']],
+        (means[:, -1, k['Prix_Moyen']] / means[:, 0, k['Prix_Moyen']] - 1) * 100,
+        last[:, k['Valeur_Marche']],
+        (last[:, k['Valeur_Marche']] / first[:, k['Valeur_Marche']] - 1) * 100,
+        means[:, -1, k['Efficacite_Therapeutique']],
+        means[:, -1, k['Efficacite_Therapeutique']] - means[:, 0, k['Efficacite_Therapeutique']],
+        last[:, k['Demande_Mondiale']],
+        totals[:, :, k['Valeur_Marche']].sum(axis=1),
+    ], axis=1)
+
+def _evaluate_blocks(bases, noise, years, combos, block):
+    outcomes = [evaluate(bases, noise, years, combos[i:i + block]) for i in range(0, len(combos), block)]
+    return np.concatenate(outcomes) if outcomes else np.empty((0, len(OUTCOMES)))
+
+def sweep(generator, oil_names, combos, start_year=2000, end_year=2025, workers=1,
+          block=COMBOS_PER_BLOCK):
+    """DataFrame (une ligne par combinaison): paramètres puis résultats
+
+    Avec `workers > 1`, les combinaisons sont réparties en tranches sur un pool de processus.
+    """
+    combos = np.atleast_2d(np.asarray(combos, dtype=float))
+    bases, noise, years = sweep_inputs(generator, list(oil_names), start_year, end_year)
+    # Bloc de combinaisons borné à ~64 Mo de valeurs intermédiaires
+    block = max(1, min(block, (64 << 20) // max(noise.size * 8, 1)))
+
+    workers = min(workers or os.cpu_count() or 1, max(len(combos) // block, 1))
+    if workers <= 1:
+        outcomes = _evaluate_blocks(bases, noise, years, combos, block)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_evaluate_blocks, bases, noise, years, chunk, block)
+                       for chunk in np.array_split(combos, workers)]
+            outcomes = np.concatenate([future.result() for future in futures])
+    return pd.concat([pd.DataFrame(combos, columns=PARAMETER_NAMES),
+                      pd.DataFrame(outcomes, columns=list(OUTCOMES))], axis=1)
+
+def tornado_frame(results, outcome, spread, names=None):
+    """Écarts au résultat de référence pour chaque paramètre (sortie de one_at_a_time), triés par amplitude"""
+    names = PARAMETER_NAMES if names is None else list(names)
+    reference = results[outcome].iloc[0]
+    low = results[outcome].iloc[1::2].to_numpy() - reference
+    high = results[outcome].iloc[2::2].to_numpy() - reference
+    frame = pd.DataFrame({
+        'Paramètre': [PARAMETERS[name][1] for name in names],
+        f'-{spread:.0%}': low,
+        f'+{spread:.0%}': high,
+        'Amplitude': np.abs(high - low),
+    })
+    return frame.sort_values('Amplitude', ignore_index=True), reference
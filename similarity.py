@@ -0,0 +1,144 @@
+"""Similarité entre huiles: Jaccard des molécules et propriétés (bitsets) et corrélation des séries d'indicateurs
+
+Les scores sont calculés par blocs de lignes (bloc × toutes les huiles, en float32):
+la mémoire reste bornée par BLOCK_BYTES quel que soit le nombre d'huiles, sans
+matrice dense n × n. Seuls les k plus proches voisins de chaque ligne sont gardés.
+"""
+import numpy as np
+import pandas as pd
+
+# Champs liste dont les termes forment le bitset de chaque huile
+TERM_FIELDS = ('molecules_principales', 'proprietes')
+# Poids du Jaccard dans le score combiné (le reste va à la corrélation des séries)
+DEFAULT_WEIGHT = 0.5
+# Mémoire de travail d'un bloc de scores
+BLOCK_BYTES = 64 * 1024 * 1024
+
+# Nombre de bits à 1 de chaque octet (numpy < 2.0, sans np.bitwise_count)
+_BYTE_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+def popcount(words):
+    """Nombre de bits à 1 de chaque mot de 64 bits"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words)
+    return _BYTE_POPCOUNT[words.view(np.uint8)].reshape(words.shape + (8,)).sum(axis=-1, dtype=np.uint8)
+
+def term_bitsets(catalog, oil_names, fields=TERM_FIELDS):
+    """Bitset (huiles × mots de 64 bits) des termes de chaque huile, vocabulaires des champs mis bout à bout"""
+    positions = catalog.positions(oil_names)
+    rows, bits = [], []
+    offset = 0
+    for field in fields:
+        offsets, codes, vocabulary = catalog.list_field(field)
+        starts, lengths = offsets[positions], offsets[positions + 1] - offsets[positions]
+        # Indices CSR des termes de chaque huile, sans boucle Python
+        gather = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        rows.append(np.repeat(np.arange(len(positions)), lengths))
+        bits.append(codes[gather].astype(np.uint64) + np.uint64(offset))
+        offset += len(vocabulary)
+    rows, bits = np.concatenate(rows), np.concatenate(bits)
+
+    words = np.zeros((len(positions), max((offset + 63) // 64, 1)), dtype=np.uint64)
+    np.bitwise_or.at(words, (rows, (bits >> np.uint64(6)).astype(np.int64)),
+                     np.uint64(1) << (bits & np.uint64(63)))
+    return words
+
+def series_profiles(data):
+    """Profils normalisés (huiles × périodes·indicateurs): leur produit scalaire est la corrélation
+    de Pearson moyenne sur les indicateurs"""
+    data = np.asarray(data, dtype=np.float64)
+    n_oils, n_periods, n_indicators = data.shape
+    mean = np.nanmean(data, axis=1, keepdims=True)
+    std = np.nanstd(data, axis=1, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        z = (data - mean) / std
+    # Séries constantes ou manquantes: aucune contribution
+    z = np.nan_to_num(z, nan=0.0, posinf=0.0, neginf=0.0) / np.sqrt(n_periods * n_indicators)
+    return z.reshape(n_oils, -1).astype(np.float32)
+
+class SimilarityEngine:
+    """Scores de similarité d'un ensemble d'huiles, calculés bloc par bloc"""
+
+    def __init__(self, oil_names, bitsets, profiles, weight=DEFAULT_WEIGHT, block_bytes=BLOCK_BYTES):
+        self.oil_names = list(oil_names)
+        self.weight = weight
+        self.block_bytes = block_bytes
+        self._position = {name: i for i, name in enumerate(self.oil_names)}
+        self._bitsets = bitsets
+        self._counts = popcount(bitsets).sum(axis=1, dtype=np.int32)
+        self._profiles = profiles
+
+    @classmethod
+    def build(cls, source, catalog, oil_names, start_year=2000, end_year=2025, block=1000,
+              weight=DEFAULT_WEIGHT):
+        """Bitsets du catalogue et profils des séries annuelles, chargées bloc par bloc"""
+        oil_names = list(oil_names)
+        profiles = None
+        for i in range(0, len(oil_names), block):
+            data, _ = source.load_batch(oil_names[i:i + block], start_year, end_year)
+            chunk = series_profiles(data)
+            if profiles is None:
+                profiles = np.empty((len(oil_names), chunk.shape[1]), dtype=np.float32)
+            profiles[i:i + block] = chunk
+        if profiles is None:
+            profiles = np.empty((0, 0), dtype=np.float32)
+        return cls(oil_names, term_bitsets(catalog, oil_names), profiles, weight)
+
+    def __len__(self):
+        return len(self.oil_names)
+
+    def __contains__(self, oil_name):
+        return oil_name in self._position
+
+    @property
+    def block_rows(self):
+        """Lignes par bloc: scores, intersections et temporaires (≈ 6 float32 par paire)"""
+        return max(1, self.block_bytes // (24 * max(len(self), 1)))
+
+    def scores(self, rows):
+        """(Jaccard, corrélation, score combiné) des lignes `rows` contre toutes les huiles, en float32"""
+        rows = np.asarray(rows)
+        intersection = np.zeros((len(rows), len(self)), dtype=np.int32)
+        for w in range(self._bitsets.shape[1]):
+            intersection += popcount(self._bitsets[rows, w, None] & self._bitsets[None, :, w])
+        union = self._counts[rows, None] + self._counts[None, :] - intersection
+        jaccard = np.divide(intersection, union, out=np.zeros(union.shape, dtype=np.float32),
+                            where=union > 0, dtype=np.float32)
+        correlation = self._profiles[rows] @ self._profiles.T
+        combined = self.weight * jaccard + (1 - self.weight) * correlation
+        return jaccard, correlation, combined
+
+    def _top(self, rows, combined, k):
+        # Exclut l'huile elle-même puis garde les k meilleurs scores, triés
+        combined[np.arange(len(rows)), rows] = -np.inf
+        k = min(k, len(self) - 1)
+        if k <= 0:
+            return np.empty((len(rows), 0), dtype=np.int64)
+        candidates = np.argpartition(-combined, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(combined, candidates, axis=1), axis=1, kind='stable')
+        return np.take_along_axis(candidates, order, axis=1)
+
+    def top_k(self, k=5):
+        """Voisins (huiles × k indices) et scores combinés de tout le catalogue, par blocs de lignes"""
+        k_eff = max(min(k, len(self) - 1), 0)
+        neighbours = np.empty((len(self), k_eff), dtype=np.int32)
+        scores = np.empty((len(self), k_eff), dtype=np.float32)
+        for first in range(0, len(self), self.block_rows):
+            rows = np.arange(first, min(first + self.block_rows, len(self)))
+            _, _, combined = self.scores(rows)
+            top = self._top(rows, combined, k_eff)
+            neighbours[rows] = top
+            scores[rows] = np.take_along_axis(combined, top, axis=1)
+        return neighbours, scores
+
+    def neighbours(self, oil_name, k=5):
+        """Les k huiles les plus proches d'une huile, par score décroissant"""
+        row = np.array([self._position[oil_name]])
+        jaccard, correlation, combined = self.scores(row)
+        top = self._top(row, combined, k)[0]
+        return pd.DataFrame({
+            'Huile': [self.oil_names[i] for i in top],
+            'Similarité': combined[0, top],
+            'Jaccard': jaccard[0, top],
+            'Corrélation': correlation[0, top],
+        })
@@ -0,0 +1,333 @@
+"""Instantané binaire précalculé (catalogue, séries annuelles, agrégats dérivés), ouvert par mmap au démarrage
+
+    python snapshot.py --output huiles.snapshot          # construit (ou reconstruit) l'instantané
+    python snapshot.py --output huiles.snapshot --check  # vérifie version et somme de contrôle
+
+Format (little-endian): préambule fixe (signature, version du format, taille de
+l'en-tête, somme BLAKE2b-256 de tout ce qui suit), en-tête JSON (huiles, modalités,
+vocabulaires, provenance des données, emplacement de chaque section), puis les
+sections alignées sur 64 octets. Les séries sont rangées en colonnes (une ligne
+contiguë par indicateur), avec un index d'offsets par huile.
+
+Les tableaux sont lus sans copie dans le fichier mappé: les processus du serveur
+partagent les mêmes pages via le cache du système. Seule la plage d'années de
+construction est stockée; les autres plages passent par la source d'origine. Un instantané dont la version,
+la provenance ou la somme de contrôle ne correspond plus est reconstruit.
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+import time
+
+import numpy as np
+
+from catalog import CATEGORICAL_FIELDS, LIST_FIELDS, NUMERIC_FIELDS, OILS_CONFIG, OilCatalog
+from data_sources import DEFAULT_SEED, INDICATOR_COLUMNS, MEASURE_DTYPE, YEAR_DTYPE, DataSource, open_data_source
+from forecasting import DEFAULT_LEVELS, HORIZON_YEAR, forecast_cube
+
+MAGIC = b'HESNAP\x00\x00'
+# Version du format: à incrémenter dès que la disposition des sections change
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+# Signature, version du format, taille de l'en-tête JSON, somme de contrôle
+PREAMBLE = struct.Struct('<8sII32s')
+OILS_PER_BLOCK = 1000
+
+class StaleSnapshot(Exception):
+    """Instantané absent, corrompu ou construit pour d'autres données"""
+
+def catalog_fingerprint(records):
+    """Empreinte des fiches du catalogue (un changement de fiche rend l'instantané périmé)"""
+    return hashlib.blake2b(json.dumps(records, sort_keys=True, ensure_ascii=False).encode('utf-8'),
+                           digest_size=16).hexdigest()
+
+def provenance(source, records, start_year=2000, end_year=2025):
+    """Champs de l'en-tête qui doivent correspondre pour que l'instantané soit à jour"""
+    return {
+        'format': FORMAT_VERSION,
+        'source': [str(part) for part in source.cache_token()],
+        'catalog': catalog_fingerprint(records),
+        'years': [start_year, end_year],
+        'forecast': [HORIZON_YEAR, list(DEFAULT_LEVELS)],
+    }
+
+def _checksum(buffer, start):
+    digest = hashlib.blake2b(digest_size=32)
+    view = memoryview(buffer)
+    for offset in range(start, len(view), 16 << 20):
+        digest.update(view[offset:offset + (16 << 20)])
+    return digest.digest()
+
+def build_snapshot(path, catalog, source, records=OILS_CONFIG, start_year=2000, end_year=2025,
+                   block=OILS_PER_BLOCK):
+    """Écrit l'instantané de toutes les huiles de `source` (remplacement atomique du fichier)"""
+    provided = set(source.oils())
+    oil_names = [oil for oil in catalog.names if oil in provided]
+    years = source.year_axis(start_year, end_year)
+    n_oils, n_years, n_indicators = len(oil_names), len(years), len(INDICATOR_COLUMNS)
+    future = np.arange(int(years[-1]) + 1, HORIZON_YEAR + 1) if n_years else np.arange(0)
+    positions = catalog.positions(oil_names)
+
+    # Disposition des sections: nom -> (type, forme)
+    layout = {f'numeric/{field}': (np.float64, (n_oils,)) for field in NUMERIC_FIELDS}
+    layout.update({f'categories/{field}': (np.int32, (n_oils,)) for field in CATEGORICAL_FIELDS})
+    lists = {}
+    for field in LIST_FIELDS:
+        offsets, codes, vocabulary = catalog.list_field(field)
+        starts, lengths = offsets[positions], offsets[positions + 1] - offsets[positions]
+        row_offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        gather = np.repeat(starts - row_offsets[:-1], lengths) + np.arange(row_offsets[-1])
+        lists[field] = (row_offsets, codes[gather].astype(np.int32), vocabulary)
+        layout[f'lists/{field}/offsets'] = (np.int64, (n_oils + 1,))
+        layout[f'lists/{field}/codes'] = (np.int32, (int(row_offsets[-1]),))
+    layout['series/offsets'] = (np.int64, (n_oils + 1,))
+    layout['series/years'] = (YEAR_DTYPE, (n_oils * n_years,))
+    layout['series/values'] = (MEASURE_DTYPE, (n_indicators, n_oils * n_years))
+    layout['market/latest'] = (MEASURE_DTYPE, (n_oils, n_indicators))
+    layout['forecast/mean'] = (MEASURE_DTYPE, (n_oils, len(future), n_indicators))
+    for level in DEFAULT_LEVELS:
+        layout[f'forecast/{level}/low'] = (MEASURE_DTYPE, (n_oils, len(future), n_indicators))
+        layout[f'forecast/{level}/high'] = (MEASURE_DTYPE, (n_oils, len(future), n_indicators))
+
+    header = {
+        **provenance(source, records, start_year, end_year),
+        'oils': oil_names,
+        'indicators': INDICATOR_COLUMNS,
+        'series_years': [int(year) for year in years],
+        'forecast_years': [int(year) for year in future],
+        'categories': {field: list(catalog.levels(field)) for field in CATEGORICAL_FIELDS},
+        'vocabularies': {field: list(vocabulary) for field, (_, _, vocabulary) in lists.items()},
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'sections': {},
+    }
+    # Les offsets dépendent de la taille de l'en-tête, qui contient les offsets: point fixe en deux passes
+    data_start = 0
+    for _ in range(2):
+        offset = data_start
+        for name, (dtype, shape) in layout.items():
+            header['sections'][name] = [offset, np.dtype(dtype).str, list(shape)]
+            offset += -(-int(np.prod(shape)) * np.dtype(dtype).itemsize // ALIGNMENT) * ALIGNMENT
+        encoded = json.dumps(header, ensure_ascii=False).encode('utf-8')
+        data_start = -(-(PREAMBLE.size + len(encoded)) // ALIGNMENT) * ALIGNMENT
+    total = offset
+
+    directory = os.path.dirname(os.path.abspath(path))
+    handle, temporary = tempfile.mkstemp(prefix='.snapshot-', dir=directory)
+    try:
+        with os.fdopen(handle, 'w+b') as file:
+            file.truncate(max(total, data_start))
+            with mmap.mmap(file.fileno(), 0) as buffer:
+                buffer[PREAMBLE.size:PREAMBLE.size + len(encoded)] = encoded
+
+                def section(name):
+                    offset, dtype, shape = header['sections'][name]
+                    return np.frombuffer(buffer, dtype=dtype, count=int(np.prod(shape)), offset=offset).reshape(shape)
+
+                for field in NUMERIC_FIELDS:
+                    section(f'numeric/{field}')[:] = catalog.numeric(field)[positions]
+                for field in CATEGORICAL_FIELDS:
+                    section(f'categories/{field}')[:] = catalog.codes(field)[positions]
+                for field, (row_offsets, codes, _) in lists.items():
+                    section(f'lists/{field}/offsets')[:] = row_offsets
+                    section(f'lists/{field}/codes')[:] = codes
+                section('series/offsets')[:] = np.arange(n_oils + 1) * n_years
+                section('series/years')[:] = np.tile(years, n_oils)
+
+                values = section('series/values')
+                for first in range(0, n_oils, block):
+                    data, _ = source.load_batch(oil_names[first:first + block], start_year, end_year)
+                    rows = slice(first * n_years, (first + len(data)) * n_years)
+                    values[:, rows] = data.reshape(-1, n_indicators).T
+                    section('market/latest')[first:first + len(data)] = data[:, -1, :]
+                    _, mean, bands = forecast_cube(data, years, HORIZON_YEAR, DEFAULT_LEVELS)
+                    section('forecast/mean')[first:first + len(data)] = mean
+                    for level, (low, high) in bands.items():
+                        section(f'forecast/{level}/low')[first:first + len(data)] = low
+                        section(f'forecast/{level}/high')[first:first + len(data)] = high
+                del values
+
+                checksum = _checksum(buffer, PREAMBLE.size)
+                buffer[:PREAMBLE.size] = PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(encoded), checksum)
+                buffer.flush()
+        os.replace(temporary, path)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.unlink(temporary)
+        raise
+    return path
+
+class Snapshot:
+    """Instantané mappé en mémoire: tableaux en lecture seule, sans copie"""
+
+    def __init__(self, path, buffer, header):
+        self.path = path
+        self.header = header
+        self.oil_names = header['oils']
+        self.years = np.asarray(header['series_years'])
+        self.forecast_years = np.asarray(header['forecast_years'])
+        self._buffer = buffer
+        self._position = {name: i for i, name in enumerate(self.oil_names)}
+        self._catalog = None
+
+    @classmethod
+    def open(cls, path, expected=None, verify=True):
+        """Mappe le fichier; StaleSnapshot si le format, la provenance `expected` ou la somme diffère"""
+        try:
+            with open(path, 'rb') as file:
+                buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError) as error:
+            raise StaleSnapshot(f"Instantané illisible: {error}") from None
+        if len(buffer) < PREAMBLE.size:
+            raise StaleSnapshot("Instantané tronqué")
+        magic, version, header_size, checksum = PREAMBLE.unpack_from(buffer)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise StaleSnapshot(f"Format d'instantané {version} (attendu {FORMAT_VERSION})")
+        try:
+            header = json.loads(bytes(buffer[PREAMBLE.size:PREAMBLE.size + header_size]))
+        except ValueError:
+            raise StaleSnapshot("En-tête illisible") from None
+        for key, value in (expected or {}).items():
+            if header.get(key) != value:
+                raise StaleSnapshot(f"Instantané périmé ({key}: {header.get(key)!r} au lieu de {value!r})")
+        if verify and _checksum(buffer, PREAMBLE.size) != checksum:
+            raise StaleSnapshot("Somme de contrôle invalide")
+        return cls(path, buffer, header)
+
+    def array(self, name):
+        """Section en lecture seule, vue directe sur les pages mappées"""
+        offset, dtype, shape = self.header['sections'][name]
+        return np.frombuffer(self._buffer, dtype=dtype, count=int(np.prod(shape)), offset=offset).reshape(shape)
+
+    def positions(self, oil_names):
+        return np.fromiter((self._position[name] for name in oil_names), dtype=np.int64)
+
+    @property
+    def catalog(self):
+        """Catalogue reconstitué sur les sections mappées (sans relire les fiches)"""
+        if self._catalog is None:
+            numeric = {field: self.array(f'numeric/{field}') for field in NUMERIC_FIELDS}
+            categories = {field: (self.array(f'categories/{field}'), self.header['categories'][field])
+                          for field in CATEGORICAL_FIELDS}
+            lists = {field: (self.array(f'lists/{field}/offsets'), self.array(f'lists/{field}/codes'),
+                             self.header['vocabularies'][field]) for field in LIST_FIELDS}
+            self._catalog = OilCatalog(self.oil_names, numeric, categories, lists)
+        return self._catalog
+
+    def latest(self):
+        """Dernière année de chaque huile (huiles × indicateurs), pour la table du marché"""
+        return self.array('market/latest')
+
+    def forecast_batch(self, oil_names):
+        """Prévisions précalculées au format de forecasting.forecast_cube"""
+        positions = self.positions(oil_names)
+        bands = {level: (self.array(f'forecast/{level}/low')[positions],
+                         self.array(f'forecast/{level}/high')[positions])
+                 for level in self.header['forecast'][1]}
+        return self.forecast_years, self.array('forecast/mean')[positions], bands
+
+class SnapshotSource(DataSource):
+    """Séries annuelles lues dans l'instantané pour sa plage d'années
+
+    Les autres plages et granularités sont servies par la source d'origine (`fallback`).
+    """
+
+    def __init__(self, snapshot, fallback=None):
+        self.snapshot = snapshot
+        self.fallback = fallback
+        self.granularities = ('Y',) + tuple(g for g in getattr(fallback, 'granularities', ()) if g != 'Y')
+        self._offsets = snapshot.array('series/offsets')
+        self._years = snapshot.array('series/years')
+        self._values = snapshot.array('series/values')
+
+    def oils(self):
+        return list(self.snapshot.oil_names)
+
+    def cache_token(self):
+        return ('snapshot',) + tuple(self.snapshot.header['source'])
+
+    def _stored(self, start_year, end_year):
+        """Vrai si la plage demandée est celle de l'instantané; sinon la source d'origine la sert
+
+        La source d'origine peut dépendre de la plage (le générateur recalcule ses tendances
+        depuis la première année): une tranche des séries stockées n'en serait pas l'équivalent.
+        """
+        if [start_year, end_year] == self.snapshot.header['years']:
+            return True
+        if self.fallback is None:
+            raise ValueError(f"Années {start_year}-{end_year} absentes de l'instantané "
+                             f"({'-'.join(map(str, self.snapshot.header['years']))})")
+        return False
+
+    def year_axis(self, start_year, end_year):
+        if not self._stored(start_year, end_year):
+            return self.fallback.year_axis(start_year, end_year)
+        return self.snapshot.years
+
+    def load_batch(self, oil_names, start_year=2000, end_year=2025, granularity='Y'):
+        if granularity != 'Y' or not self._stored(start_year, end_year):
+            if self.fallback is None:
+                self.time_axis(start_year, end_year, granularity)
+            return self.fallback.load_batch(oil_names, start_year, end_year, granularity)
+        oil_names = list(oil_names)
+        years = self.year_axis(start_year, end_year)
+        data = np.full((len(oil_names), len(years), len(INDICATOR_COLUMNS)), np.nan, dtype=MEASURE_DTYPE)
+        if not oil_names or not len(years):
+            return data, years
+
+        # Lignes de chaque huile via l'index d'offsets, puis placement par année
+        positions = self.snapshot.positions(oil_names)
+        starts, lengths = self._offsets[positions], np.diff(self._offsets)[positions]
+        row_offsets = np.concatenate([[0], np.cumsum(lengths)])
+        rows = np.repeat(starts - row_offsets[:-1], lengths) + np.arange(row_offsets[-1])
+        owners = np.repeat(np.arange(len(oil_names)), lengths)
+        row_years = self._years[rows].astype(np.int64)
+        inside = (row_years >= years[0]) & (row_years <= years[-1])
+        data[owners[inside], row_years[inside] - years[0]] = self._values[:, rows[inside]].T
+        return data, years
+
+def open_or_build(path, data_source=None, seed=DEFAULT_SEED, records=OILS_CONFIG, verify=True):
+    """Instantané à jour des données de `data_source`, reconstruit s'il est absent ou périmé
+
+    La source n'a besoin du catalogue que pour produire des séries: sa provenance se
+    lit sans le construire, qui n'est donc reconstruit que si l'instantané l'est aussi.
+    """
+    expected = provenance(open_data_source(data_source, None, seed=seed), records)
+    try:
+        return Snapshot.open(path, expected, verify=verify)
+    except StaleSnapshot:
+        catalog = OilCatalog.from_records(records)
+        build_snapshot(path, catalog, open_data_source(data_source, catalog, seed=seed), records)
+        return Snapshot.open(path, expected, verify=False)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Instantané binaire du catalogue et des séries annuelles")
+    parser.add_argument('--output', default=os.environ.get('DASHBOARD_SNAPSHOT', 'huiles.snapshot'))
+    parser.add_argument('--data-source', default=os.environ.get('DASHBOARD_DATA_SOURCE'),
+                        help="Fichier Parquet/Arrow IPC (générateur par défaut)")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--check', action='store_true', help="Vérifie seulement l'instantané existant")
+    args = parser.parse_args(argv)
+
+    expected = provenance(open_data_source(args.data_source, None, seed=args.seed), OILS_CONFIG)
+    if args.check:
+        try:
+            snapshot = Snapshot.open(args.output, expected)
+        except StaleSnapshot as error:
+            print(f"{args.output}: {error}")
+            return 1
+        print(f"{args.output}: à jour ({len(snapshot.oil_names)} huiles, créé le {snapshot.header['created']})")
+        return 0
+
+    started = time.perf_counter()
+    catalog = OilCatalog.from_records(OILS_CONFIG)
+    build_snapshot(args.output, catalog, open_data_source(args.data_source, catalog, seed=args.seed))
+    print(f"{args.output} écrit ({os.path.getsize(args.output) / 1e6:.1f} Mo) "
+          f"en {time.perf_counter() - started:.2f} s")
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,109 @@
+"""Budget de démarrage à froid: temps d'import et de premier affichage, mesurés dans un interpréteur neuf
+
+    python startup_budget.py              # affiche les mesures, code retour 1 si le budget est dépassé
+    python startup_budget.py --json startup.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Dashboard.py')
+
+# Budget en secondes (médiane des essais)
+STARTUP_BUDGET = {
+    'import_streamlit_s': 1.5,
+    'import_app_s': 1.0,
+    'first_paint_s': 2.5,
+}
+
+# Modules que `import dashboard_core` ne doit pas charger (streamlit importe déjà plotly:
+# vérifié dans un interpréteur sans streamlit)
+APP_IMPORT_DEFERRED_MODULES = ('plotly', 'plotly.graph_objects', 'plotly.express')
+# Modules qui ne doivent pas être chargés avant le premier affichage (préchargement désactivé)
+FIRST_PAINT_DEFERRED_MODULES = ('plotly.express',)
+
+def app_import_modules():
+    """Modules différés chargés par `import dashboard_core` seul, dans un interpréteur neuf"""
+    code = ('import json, sys, dashboard_core; '
+            f'print(json.dumps([name for name in {APP_IMPORT_DEFERRED_MODULES!r} if name in sys.modules]))')
+    output = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True,
+                            cwd=os.path.dirname(APP_PATH)).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def measure():
+    """Mesure unique, exécutée dans le processus enfant"""
+    timings = {}
+    started = time.perf_counter()
+    import streamlit  # noqa: F401
+    from streamlit.testing.v1 import AppTest
+    timings['import_streamlit_s'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    import dashboard_core  # noqa: F401
+    timings['import_app_s'] = time.perf_counter() - started
+
+    # Premier affichage: exécution complète du script sur la vue par défaut, sans préchargement
+    # en arrière-plan (qui masquerait un import anticipé de la vue affichée)
+    os.environ['DASHBOARD_PREFETCH'] = '0'
+    started = time.perf_counter()
+    app = AppTest.from_file(APP_PATH, default_timeout=120)
+    app.run()
+    timings['first_paint_s'] = time.perf_counter() - started
+    timings['errors'] = [error.message for error in app.exception]
+    timings['loaded_deferred_modules'] = [f'{name} (premier affichage)' for name in FIRST_PAINT_DEFERRED_MODULES
+                                          if name in sys.modules]
+    return timings
+
+def run_budget(runs=3):
+    """Lance `runs` démarrages à froid et retourne les médianes et le verdict"""
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--child'],
+            check=True, capture_output=True, text=True, cwd=os.path.dirname(APP_PATH)
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+
+    report = {'runs': runs, 'budget': STARTUP_BUDGET, 'timings': {}, 'over_budget': []}
+    for key, limit in STARTUP_BUDGET.items():
+        values = sorted(sample[key] for sample in samples)
+        report['timings'][key] = values[len(values) // 2]
+        if report['timings'][key] > limit:
+            report['over_budget'].append(key)
+    report['errors'] = sorted({error for sample in samples for error in sample['errors']})
+    report['loaded_deferred_modules'] = sorted(
+        {name for sample in samples for name in sample['loaded_deferred_modules']}
+        | {f'{name} (import dashboard_core)' for name in app_import_modules()}
+    )
+    report['ok'] = not (report['over_budget'] or report['errors'] or report['loaded_deferred_modules'])
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Budget de démarrage à froid du dashboard")
+    parser.add_argument('--runs', type=int, default=3, help="Nombre de démarrages mesurés")
+    parser.add_argument('--json', help="Fichier de sortie JSON")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(measure()))
+        return 0
+
+    report = run_budget(args.runs)
+    for key, value in report['timings'].items():
+        flag = '❌' if key in report['over_budget'] else '✅'
+        print(f"{flag} {key}: {value:.3f} s (budget {STARTUP_BUDGET[key]:.1f} s)")
+    if report['loaded_deferred_modules']:
+        print(f"❌ modules chargés trop tôt: {', '.join(report['loaded_deferred_modules'])}")
+    for error in report['errors']:
+        print(f"❌ erreur: {error}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+    return 0 if report['ok'] else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,70 @@
+import http.client
+import json
+import threading
+
+import pytest
+
+from api import ApiError, DashboardApi, make_server
+from dashboard_core import CompleteEssentialOilDashboard
+
+@pytest.fixture(scope='module')
+def dashboard():
+    return CompleteEssentialOilDashboard()
+
+@pytest.fixture(scope='module')
+def server(dashboard):
+    server = make_server(port=0, dashboard=dashboard)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def request(server, path, headers=None):
+    connection = http.client.HTTPConnection('127.0.0.1', server.server_port, timeout=30)
+    connection.request('GET', path, headers=headers or {})
+    response = connection.getresponse()
+    body = response.read()
+    connection.close()
+    return response, body
+
+@pytest.mark.parametrize('path, status', [
+    ('/api/inconnue', 404),
+    ('/api/oils/Inexistante/series', 404),
+    ('/api/oils/Lavande/series?granularity=X', 400),
+    ('/api/oils/Lavande/series?start_year=abc', 400),
+    ('/api/oils/Lavande/series?start_year=2030', 400),
+    ('/api/oils/Lavande/series?start_year=2010&end_year=2005', 400),
+])
+def test_erreurs(dashboard, path, status):
+    api = DashboardApi(dashboard)
+    route, _, query = path.partition('?')
+    query = {name: [value] for name, _, value in (item.partition('=') for item in query.split('&') if item)}
+    with pytest.raises(ApiError) as error:
+        api.get(route, query)
+    assert error.value.status == status
+
+def test_etag_et_revalidation(server):
+    path = '/api/oils/Lavande/series?start_year=2010&end_year=2012'
+    response, body = request(server, path)
+    assert response.status == 200
+    payload = json.loads(body)
+    assert payload['periodes'] == [2010, 2011, 2012]
+    etag = response.getheader('ETag')
+
+    response, body = request(server, path, {'If-None-Match': etag})
+    assert response.status == 304 and body == b''
+    response, _ = request(server, path, {'If-None-Match': '"autre"'})
+    assert response.status == 200 and response.getheader('ETag') == etag
+
+def test_etag_change_avec_la_version_des_donnees(server, dashboard):
+    _, first = request(server, '/api/health')
+    response, _ = request(server, '/api/health')
+    etag = response.getheader('ETag')
+    dashboard.cache.clear()
+    response, second = request(server, '/api/health')
+    assert response.getheader('ETag') != etag and second != first
+
+def test_erreur_json_404(server):
+    response, body = request(server, '/api/oils/Inexistante/kpis')
+    assert response.status == 404
+    assert 'erreur' in json.loads(body)
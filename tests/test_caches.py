@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from catalog import get_catalog
+from data_sources import DatasetCache, SyntheticSource
+from figure_cache import FigureCache
+from memory_budget import MemoryBudget
+
+@pytest.fixture
+def source():
+    return SyntheticSource(get_catalog())
+
+def test_succes_et_absences(source):
+    cache = DatasetCache(source)
+    names = source.oils()[:3]
+    first, _ = cache.get_batch(names)
+    assert (cache.hits, cache.misses) == (0, 3)
+    again, _ = cache.get_batch(names[:2] + [source.oils()[3]])
+    assert (cache.hits, cache.misses) == (2, 4)
+    np.testing.assert_array_equal(again[:2], first[:2])
+    # Le cube retourné est une copie: le modifier ne touche pas aux entrées partagées
+    again[0, 0, 0] = -1
+    np.testing.assert_array_equal(cache.get_batch(names[:1])[0][0], first[0])
+
+def test_changement_de_version_apres_clear(source):
+    cache = DatasetCache(source)
+    names = source.oils()[:2]
+    cache.get_batch(names)
+    version = cache.version
+    cache.clear()
+    assert cache.version != version
+    assert len(cache) == 0 and cache.nbytes == 0
+    cache.get_batch(names)
+    assert (cache.hits, cache.misses) == (0, 4)
+
+def test_cle_par_plage_et_granularite(source):
+    cache = DatasetCache(source)
+    oil = source.oils()[0]
+    cache.get_batch([oil], 2000, 2025)
+    cache.get_batch([oil], 2010, 2025)
+    cache.get_batch([oil], 2000, 2025, 'M')
+    assert (cache.hits, cache.misses) == (0, 3)
+
+def test_eviction_lru(source):
+    cache = DatasetCache(source, max_entries=2)
+    a, b, c = source.oils()[:3]
+    cache.get_batch([a])
+    cache.get_batch([b])
+    cache.get_batch([a])
+    cache.get_batch([c])
+    assert cache.evictions == 1
+    cache.get_batch([a])
+    assert cache.stats()['hits'] == 2
+    cache.get_batch([b])
+    assert cache.stats()['misses'] == 4
+
+def test_budget_evince_le_plus_ancien_tous_caches_confondus(source):
+    entry_bytes = source.load_batch(source.oils()[:1])[0].nbytes
+    budget = MemoryBudget(max_bytes=3 * entry_bytes)
+    cache = DatasetCache(source, budget=budget)
+    for oil in source.oils()[:5]:
+        cache.get_batch([oil])
+    assert budget.used <= budget.max_bytes
+    assert len(cache) == 3 and budget.evictions == 2
+    # Les entrées restantes sont les plus récentes
+    cache.get_batch(source.oils()[2:5])
+    assert cache.hits == 3
+
+def test_cache_de_figures_invalide_a_chaque_version():
+    import plotly.graph_objects as go
+
+    figures = FigureCache()
+    builds = []
+
+    def build():
+        builds.append(1)
+        return {'courbe': go.Figure(go.Scatter(x=[0, 1], y=[1, 2]))}
+
+    first = figures.get_or_build('vue', ['Lavande'], 1, 'light', build)
+    assert figures.get_or_build('vue', ['Lavande'], 1, 'light', build) is first
+    figures.get_or_build('vue', ['Lavande'], 2, 'light', build)
+    assert len(builds) == 2 and len(figures) == 1
+    assert figures.stats()['hits'] == 1 and figures.nbytes > 0
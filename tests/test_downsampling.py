@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+from downsampling import WEBGL_THRESHOLD, downsample_frame, line_trace, point_budget
+
+def daily_frame(years=26):
+    dates = pd.date_range('2000-01-01', periods=365 * years, freq='D')
+    return pd.DataFrame({
+        'Date': dates,
+        'Annee': dates.year.astype(np.int16),
+        'Production_Mondiale': np.linspace(0, 1, len(dates), dtype=np.float32),
+    })
+
+def test_serie_quotidienne_pluridecennale_en_webgl():
+    df = daily_frame()
+    trace = line_trace(df['Date'], df['Production_Mondiale'], width_px=600)
+    assert trace.type == 'scattergl'
+    assert len(trace.y) <= point_budget(600)
+
+def test_serie_courte_en_svg():
+    trace = line_trace(np.arange(WEBGL_THRESHOLD), np.zeros(WEBGL_THRESHOLD))
+    assert trace.type == 'scatter'
+
+def test_reduction_garde_les_annees_entieres():
+    df = daily_frame()
+    reduced = downsample_frame(df, 'Date', 600)
+    assert len(reduced) <= 600
+    assert reduced['Annee'].dtype == np.int16
+    assert set(reduced['Annee']) <= set(df['Annee'])
+    # Les mesures restent des moyennes par seau
+    assert reduced['Production_Mondiale'].iloc[0] > df['Production_Mondiale'].iloc[0]
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from catalog import get_catalog, synthetic_catalog
+from data_sources import GRANULARITIES, INDICATOR_COLUMNS, SyntheticSource
+
+@pytest.mark.parametrize('granularity', GRANULARITIES)
+def test_generation_par_lot_identique_a_la_generation_par_huile(granularity):
+    source = SyntheticSource(get_catalog(), seed=42)
+    names = source.oils()[:5]
+    batch, periods = source.load_batch(names, 2015, 2020, granularity)
+    assert batch.shape == (len(names), len(periods), len(INDICATOR_COLUMNS))
+    for i, name in enumerate(names):
+        single, single_periods = source.load_batch([name], 2015, 2020, granularity)
+        np.testing.assert_array_equal(single_periods, periods)
+        np.testing.assert_array_equal(single[0], batch[i])
+
+def test_ordre_des_huiles_sans_effet():
+    source = SyntheticSource(get_catalog())
+    names = source.oils()
+    forward, _ = source.load_batch(names)
+    backward, _ = source.load_batch(names[::-1])
+    np.testing.assert_array_equal(forward, backward[::-1])
+
+def test_graine_reproductible_et_distincte():
+    catalog = synthetic_catalog(50, seed=3)
+    first, _ = SyntheticSource(catalog, seed=1).load_batch(catalog.names)
+    again, _ = SyntheticSource(catalog, seed=1).load_batch(catalog.names)
+    other, _ = SyntheticSource(catalog, seed=2).load_batch(catalog.names)
+    np.testing.assert_array_equal(first, again)
+    assert not np.array_equal(first, other)
+    assert np.isfinite(first).all()
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from catalog import get_catalog
+from dashboard_core import CompleteEssentialOilDashboard, LiveSession
+from data_sources import INDICATOR_COLUMNS, DatasetCache, SyntheticSource
+from incremental import AppendableSeries, IncrementalStore, RunningAggregates, simulated_periods
+
+def test_agregats_courants_egaux_au_recalcul():
+    rng = np.random.default_rng(0)
+    values = rng.uniform(1, 10, (30, len(INDICATOR_COLUMNS)))
+    aggregates = RunningAggregates(values[:10])
+    aggregates.update(values[10:25])
+    aggregates.update(values[25:])
+    full = RunningAggregates(values)
+    np.testing.assert_array_equal(aggregates.first, full.first)
+    np.testing.assert_array_equal(aggregates.latest, full.latest)
+    np.testing.assert_array_equal(aggregates.maximum, full.maximum)
+    assert aggregates.count == full.count == 30
+    assert aggregates.growth(INDICATOR_COLUMNS[0]) == pytest.approx(values[-1, 0] / values[0, 0] - 1)
+
+def test_serie_extensible():
+    values = np.ones((3, len(INDICATOR_COLUMNS)))
+    series = AppendableSeries(np.array([2000, 2001, 2002]), values)
+    for year in range(2003, 2010):
+        series.append([year], values[:1] * year)
+    assert len(series) == 10 and series.version == 7
+    assert series.periods[-1] == 2009
+    assert series.aggregates.latest[0] == 2009
+    with pytest.raises(ValueError):
+        series.append([2009], values[:1])
+    with pytest.raises(ValueError):
+        series.append([2010, 2011], values[:1])
+
+def test_remise_a_zero_du_magasin():
+    source = SyntheticSource(get_catalog())
+    store = IncrementalStore(DatasetCache(source))
+    oil = source.oils()[0]
+    series = store.series(oil)
+    periods, values = simulated_periods(source, series, oil)
+    assert store.append(oil, periods, values) == 1
+    assert list(store.appended()) == [oil]
+    store.reset(oil)
+    assert store.appended() == {}
+    df, _, version = store.snapshot(oil)
+    assert version == 0 and df['Annee'].iloc[-1] == 2025
+
+def test_sessions_en_direct_isolees():
+    dashboard = CompleteEssentialOilDashboard()
+    shared = dashboard.market_aggregates()
+    shared_top = shared.top(3)
+    first, second = LiveSession(dashboard), LiveSession(dashboard)
+    oil = dashboard.catalog.names[0]
+    series = first.store.series(oil)
+    first.store.append(oil, *simulated_periods(dashboard.generator, series, oil))
+
+    key, market = first.market()
+    assert market is not shared and key != shared.version
+    assert second.market() == (shared.version, shared)
+    assert shared.version == 0
+    assert shared.top(3).equals(shared_top)
+    assert len(second.store.series(oil)) == 26
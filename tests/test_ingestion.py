@@ -0,0 +1,63 @@
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from catalog import get_catalog
+from data_sources import INDICATOR_INDEX, SyntheticSource
+from feed_stub import make_stub_server
+from ingestion import FEEDS, FeedError, FeedIngestor, parse_series
+
+@pytest.fixture
+def stub():
+    server = make_stub_server(malformed=['Sauge'], missing=['Basilic'])
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+    server.server_close()
+
+def test_parse_series_rejette_les_corps_mal_formes():
+    with pytest.raises(FeedError):
+        parse_series(b'{"annees": [2000]}', 'url')
+    with pytest.raises(FeedError):
+        parse_series(b'{"annees": [2000, 2001], "valeurs": [1.0]}', 'url')
+    with pytest.raises(FeedError):
+        parse_series(b'pas du json', 'url')
+    years, values = parse_series(b'{"annees": [2000, 2001], "valeurs": [1.0, 2.5]}', 'url')
+    assert years.tolist() == [2000, 2001] and values.tolist() == [1.0, 2.5]
+
+def test_ingestion_reproduit_le_generateur_et_isole_les_echecs(stub):
+    oils = ['Lavande', 'Sauge', 'Basilic']
+    ingestor = FeedIngestor({feed: stub for feed in FEEDS}, backoff=0.01, seed=0)
+    panel, report = ingestor.ingest(oils, base=SyntheticSource(get_catalog()))
+
+    assert {failure['huile'] for failure in report['echecs']} == {'Sauge'}
+    assert len(report['echecs']) == len(FEEDS)
+    assert report['series_absentes'] == len(FEEDS)
+
+    expected, _ = SyntheticSource(get_catalog()).load_batch(['Lavande'], 2000, 2025)
+    lavande = panel[panel['Huile'] == 'Lavande']
+    for indicator, _ in FEEDS.values():
+        np.testing.assert_allclose(lavande[indicator].to_numpy(), expected[0, :, INDICATOR_INDEX[indicator]],
+                                   rtol=1e-6)
+    assert panel.loc[panel['Huile'] == 'Sauge', 'Exportations'].isna().all()
+
+def test_en_tete_trop_long_compte_comme_un_echec():
+    async def run():
+        async def handle(reader, writer):
+            await reader.readuntil(b'\r\n\r\n')
+            writer.write(b'HTTP/1.1 200 OK\r\nX-Bourrage: ' + b'x' * 200_000 + b'\r\n\r\n')
+            await writer.drain()
+            writer.close()
+
+        server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            ingestor = FeedIngestor({'prix': f'http://127.0.0.1:{port}'}, retries=1, backoff=0.01)
+            return await ingestor.fetch_all(['Lavande'], 2000, 2001)
+
+    data, _, _, report = asyncio.run(run())
+    assert len(report['echecs']) == 1
+    assert 'LimitOverrunError' in report['echecs'][0]['erreur']
+    assert np.isnan(data).all()
@@ -0,0 +1,39 @@
+import numpy as np
+
+from catalog import synthetic_catalog
+from data_sources import INDICATOR_INDEX, SyntheticSource
+from market import MarketAggregates
+
+def build():
+    catalog = synthetic_catalog(200, seed=1)
+    return MarketAggregates.build(SyntheticSource(catalog), catalog, catalog.names), catalog
+
+def latest_values(catalog):
+    data, _ = SyntheticSource(catalog).load_batch(catalog.names)
+    return data[:, -1, :].copy()
+
+def test_mise_a_jour_reclasse_comme_une_reconstruction():
+    market, catalog = build()
+    names = catalog.names
+    changed = [names[5], names[150], names[199]]
+    latest = np.zeros((3, len(INDICATOR_INDEX)))
+    latest[:, INDICATOR_INDEX['Valeur_Marche']] = [1e9, 0, 5e8]
+    market.update(changed, latest)
+
+    expected = latest_values(catalog)
+    expected[[5, 150, 199]] = latest
+    rebuilt = MarketAggregates(catalog, names, expected)
+    assert market.top(10)['Huile'].tolist() == rebuilt.top(10)['Huile'].tolist()
+    assert market.top(2)['Huile'].tolist() == [names[5], names[199]]
+    np.testing.assert_allclose(market.type_totals().sort_index(), rebuilt.type_totals().sort_index(), rtol=1e-5)
+    assert market.version == 1
+
+def test_copie_independante():
+    market, catalog = build()
+    top = market.top(5)
+    copy = market.copy()
+    latest = np.zeros((1, len(INDICATOR_INDEX)))
+    latest[0, INDICATOR_INDEX['Valeur_Marche']] = 1e9
+    copy.update([catalog.names[0]], latest)
+    assert copy.top(1)['Huile'].tolist() == [catalog.names[0]]
+    assert market.top(5).equals(top)
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from catalog import OILS_CONFIG, get_catalog
+from data_sources import SyntheticSource
+from snapshot import PREAMBLE, Snapshot, SnapshotSource, StaleSnapshot, build_snapshot, open_or_build, provenance
+
+@pytest.fixture
+def built(tmp_path):
+    catalog = get_catalog()
+    source = SyntheticSource(catalog)
+    path = build_snapshot(str(tmp_path / 'huiles.snapshot'), catalog, source)
+    return path, source
+
+def test_series_identiques_au_generateur(built):
+    path, source = built
+    snapshot = Snapshot.open(path, provenance(source, OILS_CONFIG))
+    names = source.oils()[::3]
+    stored, years = SnapshotSource(snapshot).load_batch(names)
+    expected, expected_years = source.load_batch(names)
+    np.testing.assert_array_equal(years, expected_years)
+    np.testing.assert_array_equal(stored, expected)
+
+def test_autres_plages_servies_par_la_source_d_origine(built):
+    path, source = built
+    snapshot = Snapshot.open(path)
+    served, _ = SnapshotSource(snapshot, fallback=source).load_batch(source.oils()[:2], 2010, 2020)
+    expected, _ = source.load_batch(source.oils()[:2], 2010, 2020)
+    np.testing.assert_array_equal(served, expected)
+    with pytest.raises(ValueError):
+        SnapshotSource(snapshot).load_batch(source.oils()[:2], 2010, 2020)
+
+def test_somme_de_controle(built):
+    path, _ = built
+    with open(path, 'r+b') as handle:
+        handle.seek(-1, 2)
+        last = handle.read(1)
+        handle.seek(-1, 2)
+        handle.write(bytes([last[0] ^ 0xFF]))
+    with pytest.raises(StaleSnapshot, match="contrôle"):
+        Snapshot.open(path)
+    Snapshot.open(path, verify=False)
+
+def test_provenance_perimee(built):
+    path, _ = built
+    with pytest.raises(StaleSnapshot, match="périmé"):
+        Snapshot.open(path, provenance(SyntheticSource(get_catalog(), seed=7), OILS_CONFIG))
+
+def test_reconstruction_si_perime(built, tmp_path):
+    path, source = built
+    with open(path, 'r+b') as handle:
+        handle.seek(PREAMBLE.size + 10)
+        handle.write(b'\xff')
+    snapshot = open_or_build(path)
+    assert snapshot.header['source'] == [str(part) for part in source.cache_token()]
+    Snapshot.open(path, provenance(source, OILS_CONFIG))
+
+    missing = str(tmp_path / 'absent.snapshot')
+    assert open_or_build(missing).oil_names == source.oils()